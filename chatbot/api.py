@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Headless HTTP API over the chatbot core, for the React frontend and for load
+testing without Streamlit:
+
+    pip install -r requirements.txt
+    python api.py --port 8000
+    SHARED_CACHE_DB=.cache/shared-cache.db python api.py --port 8000 --workers 4
+
+    POST /chat             answer a question; JSON, or Server-Sent Events with "stream": true
+    GET  /analysis/{year}  the expense summary for a year (or ?month=0-11)
+    GET  /health           which AI services are loaded and how healthy they are
+    GET  /metrics          per-stage latency in Prometheus text format
+
+Expense data is read with the same `Authorization: Bearer <token>` header the
+Express backend takes. A conversation belongs to the token that started it and
+is continued by sending back the session_id each /chat response returns. Several
+workers need SHARED_CACHE_DB, where conversations are kept so any worker can
+continue them (run_workers.py --api sets it up).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Tuple
+
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from chatbot_core import ExpenseChatbot, log_notice
+from circuit_breaker import breakers
+from expense_cache import TTLLRUCache, hash_token
+from inference_pool import pool_size_per_process
+from metrics import metrics
+from model_registry import registry
+from shared_cache import SHARED_CACHE_DB, SharedCache, shared_cache
+
+API_HOST = os.getenv('API_HOST', '127.0.0.1')
+API_PORT = int(os.getenv('API_PORT', '8000'))
+# Workers only share conversations through SHARED_CACHE_DB, so without it there is one
+API_WORKERS = int(os.getenv('API_WORKERS', str(min(4, os.cpu_count() or 1) if SHARED_CACHE_DB else 1)))
+# Conversations kept; idle ones expire after API_SESSION_TTL seconds
+API_SESSION_LIMIT = int(os.getenv('API_SESSION_LIMIT', '1024'))
+API_SESSION_TTL = float(os.getenv('API_SESSION_TTL', '3600'))
+API_CORS_ORIGINS = [origin.strip() for origin in os.getenv('API_CORS_ORIGINS', '*').split(',') if origin.strip()]
+
+# Years compared for year-over-year questions, ending with the current year
+HISTORY_SPAN = 6
+
+
+@dataclass
+class ChatSession:
+    """A conversation: its chatbot, plus the notices raised since the last response"""
+    # (token hash, session id); a session is only found again with the token that started it
+    key: Tuple[str, str] = ("", "")
+    chatbot: Optional[ExpenseChatbot] = None
+    notices: List[Dict[str, str]] = field(default_factory=list)
+    # One turn at a time, so the conversation memory stays in order
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def __post_init__(self):
+        if self.chatbot is None:
+            # Backend setup notices are the same for every session; load_backends logs them once
+            self.chatbot = ExpenseChatbot(notify=lambda level, message: None)
+            self.chatbot.notify = self.notify
+
+    def notify(self, level: str, message: str):
+        log_notice(level, message)
+        if level in ("warning", "error"):
+            self.notices.append({"level": level, "message": message})
+
+    def drain_notices(self) -> List[Dict[str, str]]:
+        notices, self.notices = self.notices, []
+        return notices
+
+
+class SessionStore:
+    """Chat sessions by token and id, bounded and expiring like the other caches.
+
+    Each worker keeps its own chatbot objects. With a `shared` store the
+    conversation memory is saved there after every turn and restored before the
+    next, so a follow-up can land on any worker.
+    """
+
+    def __init__(self, max_entries: int = API_SESSION_LIMIT, ttl_seconds: float = API_SESSION_TTL,
+                 shared: Optional[SharedCache] = None):
+        self._sessions = TTLLRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.shared = shared
+        self._lock = threading.Lock()
+
+    def get_or_create(self, token: Optional[str], session_id: Optional[str] = None) -> Tuple[str, ChatSession]:
+        """A new session, or the caller's existing one; raises KeyError for an id it does not own"""
+        owner = hash_token(token) if token else ""
+        with self._lock:
+            if session_id is None:
+                session_id = uuid.uuid4().hex
+                session = ChatSession(key=(owner, session_id))
+            else:
+                session = self._sessions.get_item((owner, session_id))
+                if session is None:
+                    if self.shared is None or self.shared.get_item((owner, session_id)) is None:
+                        raise KeyError(session_id)
+                    session = ChatSession(key=(owner, session_id))
+            # Storing again restarts the idle timer
+            self._sessions.set_item((owner, session_id), session)
+        return session_id, session
+
+    def restore(self, session: ChatSession):
+        """Pick up turns another worker added since this one last served the session"""
+        if self.shared is not None:
+            state = self.shared.get_item(session.key)
+            if state is not None:
+                session.chatbot.memory.restore(state)
+
+    def save(self, session: ChatSession):
+        if self.shared is not None:
+            self.shared.set_item(session.key, session.chatbot.memory.state())
+
+    def __len__(self) -> int:
+        return len(self._sessions.keys())
+
+
+sessions = SessionStore(shared=shared_cache("api_sessions", API_SESSION_LIMIT, API_SESSION_TTL))
+# (token hash, year, month) -> (payload, summary); a new payload object means new data
+summaries = TTLLRUCache(max_entries=256, ttl_seconds=3600)
+_reader: Optional[ExpenseChatbot] = None
+
+
+class ChatRequest(BaseModel):
+    message: str = Field(min_length=1)
+    session_id: Optional[str] = None
+    year: Optional[int] = None
+    # Detected from the message when omitted
+    user_type: Optional[Literal["student", "professional", "general"]] = None
+    stream: bool = False
+
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    if authorization and authorization.startswith('Bearer ') and len(authorization) > len('Bearer '):
+        return authorization[len('Bearer '):]
+    return None
+
+
+def server_sent_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def prepare_turn(session: ChatSession, request: ChatRequest, token: Optional[str]):
+    """User type and expense context for a turn, as main() gathers them"""
+    chatbot = session.chatbot
+    user_type = request.user_type or chatbot.detect_user_type(request.message)
+    current_year = datetime.now().year
+    years = range(current_year - HISTORY_SPAN + 1, current_year + 1)
+    expense_data, history = chatbot.expense_context(request.message, token, request.year or current_year, years)
+    return user_type, expense_data, history
+
+
+def run_turn(session: ChatSession, request: ChatRequest, token: Optional[str]) -> Tuple[str, str]:
+    sessions.restore(session)
+    user_type, expense_data, history = prepare_turn(session, request, token)
+    response = session.chatbot.generate_expense_advice(request.message, user_type, expense_data, history)
+    sessions.save(session)
+    return user_type, session.chatbot.adjust_response_tone(response, user_type)
+
+
+def load_backends():
+    """Load every AI service once per worker, before the first request"""
+    global _reader
+    _reader = ExpenseChatbot()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(load_backends)
+    yield
+
+
+app = FastAPI(title="Expense Tracker AI Assistant", lifespan=lifespan)
+app.add_middleware(CORSMiddleware, allow_origins=API_CORS_ORIGINS, allow_methods=["*"], allow_headers=["*"])
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest, authorization: Optional[str] = Header(None)):
+    token = bearer_token(authorization)
+    try:
+        session_id, session = await run_in_threadpool(sessions.get_or_create, token, request.session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown or expired session_id; omit it to start a new conversation")
+
+    if request.stream:
+        return StreamingResponse(stream_chat(session_id, session, request, token), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    async with session.lock:
+        started = time.perf_counter()
+        user_type, response = await run_in_threadpool(run_turn, session, request, token)
+        metrics.observe("chat_turn", time.perf_counter() - started)
+        return {
+            "session_id": session_id,
+            "user_type": user_type,
+            "response": response,
+            "stats": session.chatbot.last_stream_stats,
+            "notices": session.drain_notices(),
+        }
+
+
+async def stream_chat(session_id: str, session: ChatSession, request: ChatRequest,
+                      token: Optional[str]) -> AsyncIterator[str]:
+    """The answer as Server-Sent Events: meta, then token events as text arrives, then done"""
+    async with session.lock:
+        started = time.perf_counter()
+        await run_in_threadpool(sessions.restore, session)
+        user_type, expense_data, history = await run_in_threadpool(prepare_turn, session, request, token)
+        yield server_sent_event("meta", {"session_id": session_id, "user_type": user_type})
+
+        chunks = []
+        stream = session.chatbot.stream_expense_advice(request.message, user_type, expense_data, history)
+        async for chunk in iterate_in_threadpool(stream):
+            for notice in session.drain_notices():
+                yield server_sent_event("notice", notice)
+            chunks.append(chunk)
+            yield server_sent_event("token", {"text": chunk})
+
+        response = "".join(chunks)
+        await run_in_threadpool(sessions.save, session)
+        final_response = await run_in_threadpool(session.chatbot.adjust_response_tone, response, user_type)
+        for notice in session.drain_notices():
+            yield server_sent_event("notice", notice)
+        metrics.observe("chat_turn", time.perf_counter() - started)
+        yield server_sent_event("done", {
+            "session_id": session_id,
+            "response": final_response,
+            "rewritten": final_response != response,
+            "stats": session.chatbot.last_stream_stats,
+        })
+
+
+def expense_summary(token: str, year: int, month: Optional[int]):
+    from expense_summary import build_summary
+
+    data = _reader.get_expense_data(token, year, month)
+    if "error" in data:
+        raise HTTPException(status_code=502, detail=data["error"])
+
+    key = (hash_token(token), year, month)
+    cached = summaries.get_item(key)
+    if cached is not None and cached[0] is data:
+        return cached[1]
+    # A month comes back as a bare list of expenses
+    summary = build_summary({str(month): data} if isinstance(data, list) else data)
+    summaries.set_item(key, (data, summary))
+    return summary
+
+
+@app.get("/analysis/{year}")
+async def analysis(year: int, month: Optional[int] = Query(None, ge=0, le=11),
+                   authorization: Optional[str] = Header(None)):
+    token = bearer_token(authorization)
+    if token is None:
+        raise HTTPException(status_code=401, detail="No token, authorization denied")
+
+    summary = await run_in_threadpool(expense_summary, token, year, month)
+    if summary is None:
+        return {"year": year, "month": month, "total": 0.0, "expense_count": 0,
+                "categories": {}, "monthly_totals": {}, "insights": None}
+    return {
+        "year": year,
+        "month": month,
+        "total": summary.total,
+        "expense_count": summary.expense_count,
+        "categories": summary.category_breakdown(),
+        "monthly_totals": {str(m): float(amount) for m, amount in zip(summary.months, summary.monthly_totals)},
+        "insights": summary.markdown,
+    }
+
+
+@app.get("/health")
+async def health():
+    return {
+        "backends": registry.stats(),
+        "providers": breakers.snapshot(),
+        "sessions": len(sessions),
+        "pid": os.getpid(),
+    }
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the expense chatbot over HTTP")
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--port', type=int, default=API_PORT)
+    parser.add_argument('--workers', type=int, default=API_WORKERS,
+                        help="Worker processes; each loads its own copy of the AI services")
+    args = parser.parse_args()
+    if args.workers > 1 and not SHARED_CACHE_DB:
+        parser.error("several workers need SHARED_CACHE_DB to share conversations (or use run_workers.py --api)")
+    # Each worker starts its own model processes under HF_PROCESS_POOL; split the cores between them
+    os.environ.setdefault('HF_POOL_SIZE', str(pool_size_per_process(args.workers)))
+
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers)
@@ -1,572 +1,23 @@
 import os
-import requests
+import time
 import streamlit as st
-from datetime import datetime, date
-from typing import Dict, List, Optional, Any
-import json
-from dotenv import load_dotenv
-from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
-from huggingface_hub import HfApi
-from groq import Groq
-from ibm_watsonx_ai.foundation_models import Model
-from ibm_watsonx_ai.metanames import GenTextParamsMetaNames as GenParams
-from ibm_watsonx_ai import Credentials
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+from datetime import datetime
+from model_registry import registry
+from expense_cache import expense_cache
+from response_cache import response_cache
+from circuit_breaker import breakers
+from transcript import Transcript, render_transcript
+from metrics import metrics, start_metrics_server
+from chatbot_core import PROVIDER_LABELS, ExpenseChatbot
 
-# Load environment variables
-load_dotenv()
+# Show the latency panel in the sidebar (also enabled per visit with ?dev=1)
+DEV_MODE = os.getenv('CHATBOT_DEV_MODE', 'false').lower() in ('1', 'true', 'yes')
 
-class ExpenseChatbot:
-    def __init__(self):
-        self.backend_url = os.getenv('BACKEND_API_URL', 'https://finance-backend-zncc.onrender.com')
-        self.setup_huggingface()
-        self.setup_groq()
-        self.setup_watson()
-        
-    def setup_huggingface(self):
-        """Initialize Hugging Face AI client"""
-        try:
-            hf_token = os.getenv('HUGGINGFACE_TOKEN')
-            if hf_token and hf_token != 'your_huggingface_token_here':
-                # Use a lightweight, efficient model for financial advice
-                model_name = "microsoft/DialoGPT-small"  # Faster loading and inference
-                
-                self.hf_tokenizer = AutoTokenizer.from_pretrained(model_name, token=hf_token)
-                
-                # Add pad token if it doesn't exist
-                if self.hf_tokenizer.pad_token is None:
-                    self.hf_tokenizer.pad_token = self.hf_tokenizer.eos_token
-                
-                # Use pipeline for easier inference
-                self.hf_pipeline = pipeline(
-                    "text-generation",
-                    model=model_name,
-                    tokenizer=self.hf_tokenizer,
-                    token=hf_token,
-                    max_new_tokens=200,  # Use max_new_tokens instead of max_length
-                    temperature=0.7,
-                    do_sample=True,
-                    pad_token_id=self.hf_tokenizer.eos_token_id
-                )
-                st.success("✅ Hugging Face AI initialized successfully!")
-                st.info(f"🤖 Using model: {model_name}")
-            else:
-                self.hf_pipeline = None
-                self.hf_tokenizer = None
-                st.warning("⚠️ Hugging Face token not provided. Using fallback mode.")
-        except Exception as e:
-            st.error(f"Failed to initialize Hugging Face AI: {str(e)}")
-            self.hf_pipeline = None
-            self.hf_tokenizer = None
-        
-    def setup_groq(self):
-        """Initialize Groq AI client (now as fallback)"""
-        try:
-            groq_api_key = os.getenv('GROQ_API_KEY')
-            if groq_api_key and groq_api_key != 'your_groq_api_key_here':
-                self.groq_client = Groq(api_key=groq_api_key)
-                st.info("✅ Groq AI initialized as fallback service!")
-            else:
-                self.groq_client = None
-                st.info("ℹ️ Groq API key not provided. Using other fallback modes.")
-        except Exception as e:
-            st.warning(f"Groq AI initialization failed: {str(e)}")
-            self.groq_client = None
-        
-    def setup_watson(self):
-        """Initialize IBM Watson AI with Granite model"""
-        try:
-            # Watson AI credentials
-            credentials = Credentials(
-                url=os.getenv('IBM_WATSONX_URL', 'https://us-south.ml.cloud.ibm.com'),
-                api_key=os.getenv('IBM_WATSONX_API_KEY')
-            )
-            
-            # Model parameters for IBM Granite 3B
-            self.model_params = {
-                GenParams.DECODING_METHOD: "greedy",
-                GenParams.MAX_NEW_TOKENS: 500,
-                GenParams.MIN_NEW_TOKENS: 1,
-                GenParams.TEMPERATURE: 0.7,
-                GenParams.TOP_P: 1.0,
-                GenParams.REPETITION_PENALTY: 1.1
-            }
-            
-            # Initialize Granite 3B model
-            self.model = Model(
-                model_id="ibm/granite-3b-code-instruct",
-                params=self.model_params,
-                credentials=credentials,
-                project_id=os.getenv('IBM_WATSONX_PROJECT_ID')
-            )
-            
-        except Exception as e:
-            st.error(f"Failed to initialize Watson AI: {str(e)}")
-            self.model = None
-    
-    def detect_user_type(self, message: str) -> str:
-        """Detect user type based on message content and complexity"""
-        professional_indicators = ['budget', 'financial', 'analysis', 'report', 'quarterly', 'ROI']
-        student_indicators = ['homework', 'assignment', 'simple', 'basic', 'learn', 'help me understand']
-        
-        message_lower = message.lower()
-        
-        if any(indicator in message_lower for indicator in professional_indicators):
-            return "professional"
-        elif any(indicator in message_lower for indicator in student_indicators):
-            return "student"
-        else:
-            return "general"
-    
-    def adjust_response_tone(self, response: str, user_type: str) -> str:
-        """Adjust response tone based on user type"""
-        tone_prompts = {
-            "student": "Simplify this explanation and make it more educational and encouraging: ",
-            "professional": "Make this response more formal and include relevant business terminology: ",
-            "general": "Make this response conversational and helpful: "
-        }
-        
-        if self.model and user_type in tone_prompts:
-            try:
-                adjusted_prompt = tone_prompts[user_type] + response
-                adjusted_response = self.model.generate_text(prompt=adjusted_prompt)
-                return adjusted_response
-            except:
-                return response
-        return response
-    
-    def generate_huggingface_response(self, prompt: str, user_type: str = "general") -> str:
-        """Generate response using Hugging Face AI (Primary service)"""
-        if not self.hf_pipeline:
-            return "Hugging Face AI not available. Please configure HUGGINGFACE_TOKEN."
-        
-        try:
-            # System prompts for different user types based on comprehensive financial assistant approach
-            system_prompts = {
-                "student": """You are a smart, helpful, and friendly financial assistant specifically for students. Your job is to guide users step-by-step through financial topics including expense tracking, budgeting, saving strategies, and taxes. Your answers should be detailed, practical, and personalized for students.
-
-🟢 When a student asks a financial question:
-- Start by understanding their financial situation (income, expenses, goals)
-- Ask clarifying questions if needed (e.g., pocket money, rent, location, goals)
-- Break down the response into clear steps or strategies
-- Provide helpful tools or formulas (e.g., savings rate, emergency fund calculations)
-- Warn about common student financial mistakes and suggest best practices
-- Include practical tips for students (part-time work, student discounts, etc.)
-
-🧠 Focus on student-specific scenarios like:
-- Budgeting pocket money or part-time income
-- Saving for gadgets, books, or education expenses
-- Managing hostel/PG expenses
-- Building early financial habits
-
-🔐 Assume user data privacy and never store or share user info.
-🚀 Goal: Make financial literacy simple, actionable, and achievable for Indian students.
-
-Always conclude with: "Would you like a summary, a downloadable guide, or help creating a plan now?" """,
-
-                "professional": """You are a smart, helpful, and friendly financial assistant specifically for working professionals. Your job is to guide users step-by-step through financial topics including expense tracking, budgeting, saving strategies, taxes, and investments. Your answers should be detailed, practical, and personalized for professionals.
-
-🟢 When a professional asks a financial question:
-- Start by understanding their career stage and financial situation (salary, family, goals)
-- Ask clarifying questions if needed (e.g., income, EMIs, dependents, investment goals)
-- Break down the response into clear steps or strategies
-- Provide advanced tools or formulas (e.g., tax calculations, investment returns, retirement planning)
-- Warn about common professional financial mistakes and suggest best practices
-- Include professional-specific advice (tax savings, career investments, insurance)
-
-🧠 Focus on professional scenarios like:
-- Salary budgeting and tax planning
-- Investment strategies and portfolio management
-- Home loans, insurance, and major purchases
-- Retirement planning and wealth building
-
-🔐 Assume user data privacy and never store or share user info.
-🚀 Goal: Make advanced financial planning simple, actionable, and achievable for Indian professionals.
-
-Always conclude with: "Would you like a summary, a downloadable guide, or help creating a plan now?" """,
-
-                "general": """You are a smart, helpful, and friendly financial assistant for both students and professionals. Your job is to guide users step-by-step through financial topics including expense tracking, budgeting, saving strategies, and taxes. Your answers should be detailed, practical, and personalized based on whether the user is a student or a working professional.
-
-🟢 When a user asks a financial question:
-- Start by understanding if they are a student or a working professional (if not already known)
-- Ask clarifying questions if needed to personalize the answer (e.g., income, rent, location, goals)
-- Break down the response into clear steps or strategies
-- Provide helpful tools or formulas (e.g., how to calculate savings rate, emergency fund, tax slab, etc.)
-- Warn about common mistakes and suggest best practices
-- Include links or references to trustworthy resources when necessary
-
-🧠 You can handle queries like:
-- "How to budget my monthly income?"
-- "How much should I save as a student with ₹10,000 per month?"
-- "I'm a professional earning ₹60,000/month—how much tax will I pay?"
-- "How do I track my expenses?"
-- "Suggest the best app or method to manage finances."
-
-🔐 Assume user data privacy and never store or share user info.
-🚀 Goal: Make financial literacy simple, actionable, and achievable for Indian users.
-
-Always conclude with: "Would you like a summary, a downloadable guide, or help creating a plan now?" """
-            }
-            
-            system_prompt = system_prompts.get(user_type, system_prompts["general"])
-            
-            # Enhanced prompt for step-by-step financial guidance
-            enhanced_prompt = f"""
-            {system_prompt}
-            
-            User query: {prompt}
-            
-            Response (provide detailed, step-by-step guidance):"""
-            
-            # Generate response using Hugging Face pipeline
-            response = self.hf_pipeline(
-                enhanced_prompt,
-                max_new_tokens=200,  # Use max_new_tokens instead of max_length
-                num_return_sequences=1,
-                temperature=0.7,
-                do_sample=True,
-                pad_token_id=self.hf_tokenizer.eos_token_id
-            )
-            
-            # Extract the generated text (remove the input prompt)
-            generated_text = response[0]['generated_text']
-            if "Response:" in generated_text:
-                response_text = generated_text.split("Response:")[-1].strip()
-            else:
-                # Fallback: try to extract response after the prompt
-                response_text = generated_text[len(enhanced_prompt):].strip()
-            
-            # Clean up the response
-            response_text = response_text.replace("<|endoftext|>", "").strip()
-            
-            # Ensure we have a meaningful response
-            if len(response_text) < 10:
-                response_text = "I'd be happy to help you with comprehensive financial guidance! 🎯\n\nTo provide you with the most personalized and detailed advice, could you please tell me:\n• Are you a student or a working professional?\n• What's your specific financial question or goal?\n• Any details about your income or financial situation?\n\nI'll then break down my response into clear, actionable steps just for you!"
-            
-            return response_text
-            
-        except Exception as e:
-            st.error(f"Hugging Face AI error: {str(e)}")
-            return f"I apologize, but I'm experiencing technical difficulties with the AI service. Please try again later. Error: {str(e)}"
-
-    def generate_groq_response(self, prompt: str, user_type: str = "general") -> str:
-        """Generate response using Groq AI"""
-        if not self.groq_client:
-            return "Groq AI not available. Please configure GROQ_API_KEY."
-        
-        try:
-            # System prompts for different user types based on comprehensive financial assistant approach
-            system_prompts = {
-                "student": """You are a smart, helpful, and friendly financial assistant specifically for students. Your job is to guide users step-by-step through financial topics including expense tracking, budgeting, saving strategies, and taxes. Your answers should be detailed, practical, and personalized for students.
-
-🟢 When a student asks a financial question:
-- Start by understanding their financial situation (income, expenses, goals)
-- Ask clarifying questions if needed (e.g., pocket money, rent, location, goals)
-- Break down the response into clear steps or strategies
-- Provide helpful tools or formulas (e.g., savings rate, emergency fund calculations)
-- Warn about common student financial mistakes and suggest best practices
-- Include practical tips for students (part-time work, student discounts, etc.)
-
-🧠 Focus on student-specific scenarios like:
-- Budgeting pocket money or part-time income
-- Saving for gadgets, books, or education expenses
-- Managing hostel/PG expenses
-- Building early financial habits
-
-🔐 Assume user data privacy and never store or share user info.
-🚀 Goal: Make financial literacy simple, actionable, and achievable for Indian students.
-
-Always conclude with: "Would you like a summary, a downloadable guide, or help creating a plan now?" """,
-
-                "professional": """You are a smart, helpful, and friendly financial assistant specifically for working professionals. Your job is to guide users step-by-step through financial topics including expense tracking, budgeting, saving strategies, taxes, and investments. Your answers should be detailed, practical, and personalized for professionals.
-
-🟢 When a professional asks a financial question:
-- Start by understanding their career stage and financial situation (salary, family, goals)
-- Ask clarifying questions if needed (e.g., income, EMIs, dependents, investment goals)
-- Break down the response into clear steps or strategies
-- Provide advanced tools or formulas (e.g., tax calculations, investment returns, retirement planning)
-- Warn about common professional financial mistakes and suggest best practices
-- Include professional-specific advice (tax savings, career investments, insurance)
-
-🧠 Focus on professional scenarios like:
-- Salary budgeting and tax planning
-- Investment strategies and portfolio management
-- Home loans, insurance, and major purchases
-- Retirement planning and wealth building
-
-🔐 Assume user data privacy and never store or share user info.
-🚀 Goal: Make advanced financial planning simple, actionable, and achievable for Indian professionals.
-
-Always conclude with: "Would you like a summary, a downloadable guide, or help creating a plan now?" """,
-
-                "general": """You are a smart, helpful, and friendly financial assistant for both students and professionals. Your job is to guide users step-by-step through financial topics including expense tracking, budgeting, saving strategies, and taxes. Your answers should be detailed, practical, and personalized based on whether the user is a student or a working professional.
-
-🟢 When a user asks a financial question:
-- Start by understanding if they are a student or a working professional (if not already known)
-- Ask clarifying questions if needed to personalize the answer (e.g., income, rent, location, goals)
-- Break down the response into clear steps or strategies
-- Provide helpful tools or formulas (e.g., how to calculate savings rate, emergency fund, tax slab, etc.)
-- Warn about common mistakes and suggest best practices
-- Include links or references to trustworthy resources when necessary
-
-🧠 You can handle queries like:
-- "How to budget my monthly income?"
-- "How much should I save as a student with ₹10,000 per month?"
-- "I'm a professional earning ₹60,000/month—how much tax will I pay?"
-- "How do I track my expenses?"
-- "Suggest the best app or method to manage finances."
-
-🔐 Assume user data privacy and never store or share user info.
-🚀 Goal: Make financial literacy simple, actionable, and achievable for Indian users.
-
-Always conclude with: "Would you like a summary, a downloadable guide, or help creating a plan now?" """
-            }
-            
-            system_prompt = system_prompts.get(user_type, system_prompts["general"])
-            
-            # Enhanced prompt for step-by-step financial guidance
-            enhanced_prompt = f"""
-            {system_prompt}
-            
-            User query: {prompt}
-            
-            Please provide detailed, step-by-step guidance following the system instructions above.
-            """
-            
-            # Generate response using Groq
-            chat_completion = self.groq_client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role": "user", 
-                        "content": enhanced_prompt
-                    }
-                ],
-                model="mixtral-8x7b-32768",  # Fast and capable model
-                temperature=0.7,
-                max_tokens=500,
-                top_p=1,
-                stream=False
-            )
-            
-            return chat_completion.choices[0].message.content
-            
-        except Exception as e:
-            st.error(f"Groq AI error: {str(e)}")
-            return f"I apologize, but I'm experiencing technical difficulties. Please try again later. Error: {str(e)}"
-    
-    def get_expense_data(self, token: str, year: int = None, month: int = None) -> Dict:
-        """Fetch expense data from backend API"""
-        try:
-            headers = {'Authorization': f'Bearer {token}'}
-            
-            if year and month is not None:
-                url = f"{self.backend_url}/api/expenses/{year}/{month}"
-            elif year:
-                url = f"{self.backend_url}/api/expenses/annual/{year}"
-            else:
-                # Get current year data
-                current_year = datetime.now().year
-                url = f"{self.backend_url}/api/expenses/annual/{current_year}"
-            
-            response = requests.get(url, headers=headers)
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {"error": f"Failed to fetch data: {response.status_code}"}
-                
-        except Exception as e:
-            return {"error": f"API call failed: {str(e)}"}
-    
-    def analyze_expenses(self, data: Dict) -> str:
-        """Analyze expense data and provide insights"""
-        if "error" in data:
-            return f"I couldn't fetch your expense data: {data['error']}"
-        
-        if not data:
-            return "You don't have any expenses recorded yet. Start by adding some expenses to get insights!"
-        
-        # Calculate total expenses
-        total = 0
-        categories = {}
-        monthly_totals = {}
-        
-        for month_key, expenses in data.items():
-            if isinstance(expenses, list):
-                month_total = sum(expense.get('amount', 0) for expense in expenses)
-                monthly_totals[month_key] = month_total
-                total += month_total
-                
-                # Categorize expenses (you can enhance this based on expense names)
-                for expense in expenses:
-                    name = expense.get('name', '').lower()
-                    amount = expense.get('amount', 0)
-                    
-                    # Simple categorization logic
-                    if any(word in name for word in ['food', 'restaurant', 'grocery']):
-                        categories['Food'] = categories.get('Food', 0) + amount
-                    elif any(word in name for word in ['transport', 'fuel', 'bus', 'taxi']):
-                        categories['Transportation'] = categories.get('Transportation', 0) + amount
-                    elif any(word in name for word in ['rent', 'utilities', 'electricity']):
-                        categories['Housing'] = categories.get('Housing', 0) + amount
-                    else:
-                        categories['Other'] = categories.get('Other', 0) + amount
-        
-        # Generate insights
-        insights = f"💰 **Total Expenses**: ₹{total:.2f}\n\n"
-        
-        if categories:
-            insights += "📊 **Expense Categories**:\n"
-            for category, amount in sorted(categories.items(), key=lambda x: x[1], reverse=True):
-                percentage = (amount / total) * 100 if total > 0 else 0
-                insights += f"- {category}: ₹{amount:.2f} ({percentage:.1f}%)\n"
-        
-        if monthly_totals and len(monthly_totals) > 1:
-            insights += f"\n📈 **Monthly Spending Pattern**:\n"
-            months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-                     'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-            for month_num, amount in monthly_totals.items():
-                if int(month_num) < len(months):
-                    insights += f"- {months[int(month_num)]}: ₹{amount:.2f}\n"
-        
-        return insights
-    
-    def generate_expense_advice(self, query: str, user_type: str, expense_data: Dict = None) -> str:
-        """Generate contextual advice using Hugging Face AI (primary) with Groq and IBM Watson as fallbacks"""
-        
-        # Create context from expense data
-        context = ""
-        if expense_data and "error" not in expense_data:
-            context = self.analyze_expenses(expense_data)
-        
-        # Enhanced prompt with expense context
-        if context:
-            enhanced_query = f"""
-            Here's my expense data context:
-            {context}
-            
-            My question: {query}
-            
-            Please provide advice considering my actual spending patterns.
-            """
-        else:
-            enhanced_query = query
-        
-        # Try Hugging Face first (primary service)
-        if self.hf_pipeline:
-            try:
-                return self.generate_huggingface_response(enhanced_query, user_type)
-            except Exception as e:
-                st.warning(f"Hugging Face AI failed, trying Groq fallback: {str(e)}")
-        
-        # Try Groq as first fallback
-        if self.groq_client:
-            try:
-                return self.generate_groq_response(enhanced_query, user_type)
-            except Exception as e:
-                st.warning(f"Groq AI failed, trying Watson fallback: {str(e)}")
-        
-        # Fallback to IBM Watson if both Hugging Face and Groq fail or aren't available
-        if not self.model:
-            return """I'm sorry, but all AI services are currently unavailable. 
-            However, I can still help you with basic expense tracking and analysis. 
-            Please make sure to configure your API keys in the .env file:
-            - HUGGINGFACE_TOKEN for Hugging Face AI responses (primary)
-            - GROQ_API_KEY for fast Groq AI responses (fallback)
-            - IBM_WATSONX_API_KEY for IBM Watson fallback"""
-        
-        # Customize Watson prompt based on user type with comprehensive financial assistant approach
-        if user_type == "student":
-            system_prompt = """You are a smart, helpful, and friendly financial assistant specifically for students. Your job is to guide users step-by-step through financial topics including expense tracking, budgeting, saving strategies, and taxes. Your answers should be detailed, practical, and personalized for students.
-
-🟢 When a student asks a financial question:
-- Start by understanding their financial situation (income, expenses, goals)
-- Ask clarifying questions if needed (e.g., pocket money, rent, location, goals)
-- Break down the response into clear steps or strategies
-- Provide helpful tools or formulas (e.g., savings rate, emergency fund calculations)
-- Warn about common student financial mistakes and suggest best practices
-- Include practical tips for students (part-time work, student discounts, etc.)
 
-Focus on student-specific scenarios and always conclude with: "Would you like a summary, a downloadable guide, or help creating a plan now?" """
-        elif user_type == "professional":
-            system_prompt = """You are a smart, helpful, and friendly financial assistant specifically for working professionals. Your job is to guide users step-by-step through financial topics including expense tracking, budgeting, saving strategies, taxes, and investments. Your answers should be detailed, practical, and personalized for professionals.
+def streamlit_notice(level: str, message: str):
+    """Show the chatbot's notices in the page: st.success, st.info, st.warning or st.error"""
+    getattr(st, level, st.info)(message)
 
-🟢 When a professional asks a financial question:
-- Start by understanding their career stage and financial situation (salary, family, goals)
-- Ask clarifying questions if needed (e.g., income, EMIs, dependents, investment goals)
-- Break down the response into clear steps or strategies
-- Provide advanced tools or formulas (e.g., tax calculations, investment returns, retirement planning)
-- Warn about common professional financial mistakes and suggest best practices
-- Include professional-specific advice (tax savings, career investments, insurance)
-
-Focus on professional scenarios and always conclude with: "Would you like a summary, a downloadable guide, or help creating a plan now?" """
-        else:
-            system_prompt = """You are a smart, helpful, and friendly financial assistant for both students and professionals. Your job is to guide users step-by-step through financial topics including expense tracking, budgeting, saving strategies, and taxes. Your answers should be detailed, practical, and personalized.
-
-🟢 When a user asks a financial question:
-- Start by understanding if they are a student or a working professional (if not already known)
-- Ask clarifying questions if needed to personalize the answer (e.g., income, rent, location, goals)
-- Break down the response into clear steps or strategies
-- Provide helpful tools or formulas (e.g., how to calculate savings rate, emergency fund, tax slab, etc.)
-- Warn about common mistakes and suggest best practices
-
-Goal: Make financial literacy simple, actionable, and achievable for Indian users. Always conclude with: "Would you like a summary, a downloadable guide, or help creating a plan now?" """
-        
-        full_prompt = f"""
-        {system_prompt}
-        
-        Context about user's expenses:
-        {context}
-        
-        User question: {query}
-        
-        Provide a helpful response that addresses their specific question while considering their expense data.
-        """
-        
-        try:
-            response = self.model.generate_text(prompt=full_prompt)
-            return response
-        except Exception as e:
-            return f"I encountered an error while generating advice: {str(e)}"
-    
-    def create_expense_visualization(self, data: Dict) -> Optional[Any]:
-        """Create visualizations for expense data"""
-        if "error" in data or not data:
-            return None
-        
-        # Prepare data for visualization
-        months = []
-        amounts = []
-        
-        for month_key, expenses in data.items():
-            if isinstance(expenses, list):
-                month_total = sum(expense.get('amount', 0) for expense in expenses)
-                months.append(int(month_key))
-                amounts.append(month_total)
-        
-        if not months:
-            return None
-        
-        # Create DataFrame
-        df = pd.DataFrame({
-            'Month': months,
-            'Amount': amounts
-        })
-        
-        # Sort by month
-        df = df.sort_values('Month')
-        
-        # Create line chart
-        fig = px.line(df, x='Month', y='Amount', 
-                     title='Monthly Expense Trend',
-                     labels={'Month': 'Month', 'Amount': 'Amount (₹)'})
-        
-        return fig
 
 def main():
     st.set_page_config(
@@ -575,27 +26,30 @@ def main():
         layout="wide"
     )
     
+    # Prometheus/JSON latency endpoint on METRICS_PORT, once per process
+    start_metrics_server()
+    
     st.title("💰 Personal Finance AI Assistant")
     st.markdown("*Powered by Hugging Face AI - Your expert guide for saving, taxes, and investments*")
     
     # Initialize chatbot
     if 'chatbot' not in st.session_state:
-        st.session_state.chatbot = ExpenseChatbot()
+        st.session_state.chatbot = ExpenseChatbot(notify=streamlit_notice)
     
     # Auto-read token from URL parameters (for seamless integration)
     query_params = st.query_params
     auto_token = query_params.get("token", [None])[0] if isinstance(query_params.get("token"), list) else query_params.get("token")
     
     # Initialize chat history
-    if 'messages' not in st.session_state:
+    if 'transcript' not in st.session_state:
         if auto_token:
-            st.session_state.messages = [
+            st.session_state.transcript = Transcript([
                 {"role": "assistant", "content": "🎉 **Welcome back!** I've automatically connected to your expense data!\n\n💰 I'm your smart, helpful, and friendly financial assistant!\n\nI'm here to guide you step-by-step through:\n🎯 Expense tracking & budgeting (with YOUR data!)\n💰 Saving strategies & goal planning\n📊 Tax planning & optimization\n📈 Investment guidance\n🏦 Financial management tips\n\nSince you're logged in, I can provide **personalized advice** based on your actual spending patterns!\n\nTry asking me:\n• \"Analyze my spending patterns\"\n• \"How can I save 20% of my income?\"\n• \"Show me where I'm overspending\"\n\nI'll break everything down into clear steps and help you create actionable plans! 🚀"}
-            ]
+            ])
         else:
-            st.session_state.messages = [
+            st.session_state.transcript = Transcript([
                 {"role": "assistant", "content": "Hello! 👋 I'm your smart, helpful, and friendly financial assistant! 💰\n\nI'm here to guide you step-by-step through:\n🎯 Expense tracking & budgeting\n💰 Saving strategies & goal planning\n📊 Tax planning & optimization\n📈 Investment guidance\n🏦 Financial management tips\n\nWhether you're a student or a working professional, I'll provide detailed, practical, and personalized advice just for you!\n\nTo get started, let me know:\n• Are you a student or a working professional?\n• What's your main financial goal or question today?\n\nI'll break everything down into clear steps and help you create actionable plans! 🚀"}
-            ]
+            ])
     
     # Sidebar for configuration
     with st.sidebar:
@@ -613,14 +67,60 @@ def main():
         
         # Year and month selection for data analysis
         current_year = datetime.now().year
+        history_years = range(current_year - 5, current_year + 1)
         selected_year = st.selectbox("Select Year for Analysis:", 
-                                   range(current_year - 5, current_year + 1), 
+                                   history_years, 
                                    index=5)
         
         # User type selection (for demo purposes)
         user_type_manual = st.selectbox("User Type (optional):", 
                                       ["Auto-detect", "Student", "Professional", "General"])
         
+        # Shared AI backends: loaded once per server process
+        with st.expander("AI Backends"):
+            for name, stats in registry.stats().items():
+                memory = f"+{stats['rss_delta_mb']:.1f} MB" if stats['rss_delta_mb'] is not None else "n/a"
+                state = "✅" if stats['available'] else "⚪"
+                st.caption(f"{state} {name}: loaded in {stats['load_seconds']:.2f}s, {memory}")
+        
+        # Circuit breaker state per AI service: open ones are skipped until they cool down
+        with st.expander("Provider Health"):
+            health = breakers.snapshot()
+            if not health:
+                st.caption("No AI calls yet.")
+            for name, snapshot in health.items():
+                state = {"closed": "🟢", "half_open": "🟡", "open": "🔴"}[snapshot['state']]
+                p95 = f"{snapshot['p95_latency']:.2f}s" if snapshot['p95_latency'] is not None else "n/a"
+                line = (f"{state} {PROVIDER_LABELS.get(name, name)}: {snapshot['error_rate']:.0%} errors "
+                        f"over {snapshot['calls']} calls, p95 {p95}")
+                if snapshot['state'] == "open":
+                    line += f", retry in {snapshot['retry_in']:.0f}s"
+                st.caption(line)
+        
+        # Developer-only view of where time goes in a chat turn
+        if DEV_MODE or query_params.get("dev") == "1":
+            with st.expander("⏱️ Latency"):
+                series = metrics.snapshot()
+                if not series:
+                    st.caption("No timings yet.")
+                for entry in series:
+                    name = f"{entry['stage']} ({entry['provider']})" if entry['provider'] else entry['stage']
+                    st.caption(f"{name}: p50 {entry['p50'] * 1000:.0f} ms, p95 {entry['p95'] * 1000:.0f} ms, "
+                               f"n={entry['count']}")
+        
+        if st.button("🔄 Refresh Expense Data"):
+            if auth_token:
+                st.session_state.chatbot.invalidate_expense_data(auth_token)
+                st.success("Cached expense data cleared. Your next question will use fresh data.")
+            else:
+                st.error("Please enter your authentication token first.")
+        cache_stats = expense_cache.stats()
+        st.caption(f"Expense cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                   f"({cache_stats['hit_rate']:.0%} hit rate)")
+        answer_stats = response_cache.stats()
+        st.caption(f"Answer cache: {answer_stats['hits']} hits, {answer_stats['misses']} misses "
+                   f"({answer_stats['hit_rate']:.0%} hit rate)")
+        
         if st.button("Analyze My Expenses"):
             if auth_token:
                 with st.spinner("Fetching your expense data..."):
@@ -628,10 +128,9 @@ def main():
                     analysis = st.session_state.chatbot.analyze_expenses(expense_data)
                     
                     # Add analysis to chat
-                    st.session_state.messages.append({
-                        "role": "assistant", 
-                        "content": f"Here's your expense analysis for {selected_year}:\n\n{analysis}"
-                    })
+                    st.session_state.transcript.append(
+                        "assistant", f"Here's your expense analysis for {selected_year}:\n\n{analysis}"
+                    )
                     
                     # Create visualization
                     fig = st.session_state.chatbot.create_expense_visualization(expense_data)
@@ -641,16 +140,38 @@ def main():
                     st.rerun()
             else:
                 st.error("Please enter your authentication token first.")
+        
+        if st.button("Compare Years"):
+            if auth_token:
+                with st.spinner("Fetching your expense history..."):
+                    history = st.session_state.chatbot.get_expense_history(auth_token, history_years)
+                    if history is None:
+                        comparison = "I couldn't fetch your expense history. Please try again later."
+                    else:
+                        comparison = history.comparison_markdown()
+                    
+                    st.session_state.transcript.append(
+                        "assistant", f"Here's how your spending compares from {history_years[0]} to {history_years[-1]}:\n\n{comparison}"
+                    )
+                    
+                    fig = st.session_state.chatbot.create_history_visualization(history)
+                    if fig:
+                        st.plotly_chart(fig, use_container_width=True)
+                    
+                    st.rerun()
+            else:
+                st.error("Please enter your authentication token first.")
     
-    # Display chat messages
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    # Display chat messages: the latest page only, older pages on request
+    with metrics.timer("render_transcript"):
+        render_transcript(st.session_state.transcript)
     
     # Chat input
     if prompt := st.chat_input("Ask me about saving, taxes, investments, or financial planning..."):
+        turn_started = time.perf_counter()
+        
         # Add user message to chat history
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        st.session_state.transcript.append("user", prompt)
         
         # Display user message
         with st.chat_message("user"):
@@ -666,27 +187,25 @@ def main():
                     user_type = user_type_manual.lower()
                 
                 # Get expense data if auth token is available
-                expense_data = None
-                if st.session_state.get('auth_token'):
-                    expense_data = st.session_state.chatbot.get_expense_data(
-                        st.session_state.auth_token, selected_year
-                    )
-                
-                # Generate response
-                response = st.session_state.chatbot.generate_expense_advice(
-                    prompt, user_type, expense_data
+                expense_data, history = st.session_state.chatbot.expense_context(
+                    prompt, st.session_state.get('auth_token'), selected_year, history_years
                 )
-                
-                # Adjust tone based on user type
-                final_response = st.session_state.chatbot.adjust_response_tone(response, user_type)
-                
-                st.markdown(final_response)
-                
-                # Add assistant response to chat history
-                st.session_state.messages.append({
-                    "role": "assistant", 
-                    "content": final_response
-                })
+            
+            # Stream the response as it is generated
+            response_area = st.empty()
+            with response_area.container():
+                response = st.write_stream(st.session_state.chatbot.stream_expense_advice(
+                    prompt, user_type, expense_data, history
+                ))
+            
+            # Optional tone rewrite: the streamed answer stays unless the rewrite arrives in time
+            final_response = st.session_state.chatbot.adjust_response_tone(response, user_type)
+            if final_response != response:
+                response_area.markdown(final_response)
+            
+            # Add assistant response to chat history
+            st.session_state.transcript.append("assistant", final_response)
+        metrics.observe("chat_turn", time.perf_counter() - turn_started)
 
 if __name__ == "__main__":
     main()
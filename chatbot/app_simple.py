@@ -1,12 +1,13 @@
 import os
-import requests
 import streamlit as st
-from datetime import datetime, date
-from typing import Dict, List, Optional, Any
-import json
+from datetime import datetime
+from typing import Dict, Optional, Any
 from dotenv import load_dotenv
-import pandas as pd
 import plotly.express as px
+from expense_cache import expense_cache
+from backend_client import get_backend_client
+from chatbot_core import ExpenseChatbot as CoreChatbot
+from transcript import Transcript, render_transcript
 
 # Load environment variables
 load_dotenv()
@@ -14,6 +15,9 @@ load_dotenv()
 class ExpenseChatbot:
     def __init__(self):
         self.backend_url = os.getenv('BACKEND_API_URL', 'https://finance-backend-zncc.onrender.com')
+        self.backend = get_backend_client(self.backend_url)
+        self._summary = None
+        self._summary_source = None
         
     def detect_user_type(self, message: str) -> str:
         """Detect user type based on message content and complexity"""
@@ -29,28 +33,10 @@ class ExpenseChatbot:
         else:
             return "general"
     
-    def get_expense_data(self, token: str, year: int = None, month: int = None) -> Dict:
-        """Fetch expense data from backend API"""
-        try:
-            headers = {'Authorization': f'Bearer {token}'}
-            
-            if year and month is not None:
-                url = f"{self.backend_url}/api/expenses/{year}/{month}"
-            elif year:
-                url = f"{self.backend_url}/api/expenses/annual/{year}"
-            else:
-                # Get current year data
-                current_year = datetime.now().year
-                url = f"{self.backend_url}/api/expenses/annual/{current_year}"
-            
-            response = requests.get(url, headers=headers)
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {"error": f"Failed to fetch data: {response.status_code}"}
-                
-        except Exception as e:
-            return {"error": f"API call failed: {str(e)}"}
+    # The expense plumbing is shared with the full chatbot; only the advice differs
+    get_expense_data = CoreChatbot.get_expense_data
+    invalidate_expense_data = CoreChatbot.invalidate_expense_data
+    get_summary = CoreChatbot.get_summary
     
     def analyze_expenses(self, data: Dict) -> str:
         """Analyze expense data and provide insights"""
@@ -60,50 +46,7 @@ class ExpenseChatbot:
         if not data:
             return "You don't have any expenses recorded yet. Start by adding some expenses to get insights!"
         
-        # Calculate total expenses
-        total = 0
-        categories = {}
-        monthly_totals = {}
-        
-        for month_key, expenses in data.items():
-            if isinstance(expenses, list):
-                month_total = sum(expense.get('amount', 0) for expense in expenses)
-                monthly_totals[month_key] = month_total
-                total += month_total
-                
-                # Categorize expenses
-                for expense in expenses:
-                    name = expense.get('name', '').lower()
-                    amount = expense.get('amount', 0)
-                    
-                    # Simple categorization logic
-                    if any(word in name for word in ['food', 'restaurant', 'grocery']):
-                        categories['Food'] = categories.get('Food', 0) + amount
-                    elif any(word in name for word in ['transport', 'fuel', 'bus', 'taxi']):
-                        categories['Transportation'] = categories.get('Transportation', 0) + amount
-                    elif any(word in name for word in ['rent', 'utilities', 'electricity']):
-                        categories['Housing'] = categories.get('Housing', 0) + amount
-                    else:
-                        categories['Other'] = categories.get('Other', 0) + amount
-        
-        # Generate insights
-        insights = f"💰 **Total Expenses**: ₹{total:.2f}\n\n"
-        
-        if categories:
-            insights += "📊 **Expense Categories**:\n"
-            for category, amount in sorted(categories.items(), key=lambda x: x[1], reverse=True):
-                percentage = (amount / total) * 100 if total > 0 else 0
-                insights += f"- {category}: ₹{amount:.2f} ({percentage:.1f}%)\n"
-        
-        if monthly_totals and len(monthly_totals) > 1:
-            insights += f"\n📈 **Monthly Spending Pattern**:\n"
-            months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-                     'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-            for month_num, amount in monthly_totals.items():
-                if int(month_num) < len(months):
-                    insights += f"- {months[int(month_num)]}: ₹{amount:.2f}\n"
-        
-        return insights
+        return self.get_summary(data).markdown
     
     def generate_financial_advice(self, query: str, user_type: str, expense_data: Dict = None) -> str:
         """Generate financial advice based on user type and query"""
@@ -257,30 +200,12 @@ Would you like personalized advice based on your expense patterns?"""
     
     def create_expense_visualization(self, data: Dict) -> Optional[Any]:
         """Create visualizations for expense data"""
-        if "error" in data or not data:
+        summary = self.get_summary(data)
+        if summary is None or summary.empty:
             return None
         
-        # Prepare data for visualization
-        months = []
-        amounts = []
-        
-        for month_key, expenses in data.items():
-            if isinstance(expenses, list):
-                month_total = sum(expense.get('amount', 0) for expense in expenses)
-                months.append(int(month_key))
-                amounts.append(month_total)
-        
-        if not months:
-            return None
-        
-        # Create DataFrame
-        df = pd.DataFrame({
-            'Month': months,
-            'Amount': amounts
-        })
-        
-        # Sort by month
-        df = df.sort_values('Month')
+        # Monthly totals come from the same summary as the text insights
+        df = summary.monthly_frame()
         
         # Create line chart
         fig = px.line(df, x='Month', y='Amount', 
@@ -308,15 +233,15 @@ def main():
     auto_token = query_params.get("token", [None])[0] if isinstance(query_params.get("token"), list) else query_params.get("token")
     
     # Initialize chat history
-    if 'messages' not in st.session_state:
+    if 'transcript' not in st.session_state:
         if auto_token:
-            st.session_state.messages = [
+            st.session_state.transcript = Transcript([
                 {"role": "assistant", "content": "🎉 **Welcome back!** I've automatically connected to your expense data!\n\n💰 I'm your smart, helpful, and friendly financial assistant!\n\nI'm here to guide you step-by-step through:\n🎯 Expense tracking & budgeting (with YOUR data!)\n💰 Saving strategies & goal planning\n📊 Tax planning & optimization\n📈 Investment guidance\n🏦 Financial management tips\n\nSince you're logged in, I can provide **personalized advice** based on your actual spending patterns!\n\nTry asking me:\n• \"Analyze my spending patterns\"\n• \"How can I save 20% of my income?\"\n• \"Show me where I'm overspending\"\n\nI'll break everything down into clear steps and help you create actionable plans! 🚀"}
-            ]
+            ])
         else:
-            st.session_state.messages = [
+            st.session_state.transcript = Transcript([
                 {"role": "assistant", "content": "Hello! 👋 I'm your smart, helpful, and friendly financial assistant! 💰\n\nI'm here to guide you step-by-step through:\n🎯 Expense tracking & budgeting\n💰 Saving strategies & goal planning\n📊 Tax planning & optimization\n📈 Investment guidance\n🏦 Financial management tips\n\nWhether you're a student or a working professional, I'll provide detailed, practical, and personalized advice just for you!\n\nTo get started, let me know:\n• Are you a student or a working professional?\n• What's your main financial goal or question today?\n\nI'll break everything down into clear steps and help you create actionable plans! 🚀"}
-            ]
+            ])
     
     # Sidebar for configuration
     with st.sidebar:
@@ -342,6 +267,16 @@ def main():
         user_type_manual = st.selectbox("User Type (optional):", 
                                       ["Auto-detect", "Student", "Professional", "General"])
         
+        if st.button("🔄 Refresh Expense Data"):
+            if auth_token:
+                st.session_state.chatbot.invalidate_expense_data(auth_token)
+                st.success("Cached expense data cleared. Your next question will use fresh data.")
+            else:
+                st.error("Please enter your authentication token first.")
+        cache_stats = expense_cache.stats()
+        st.caption(f"Expense cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                   f"({cache_stats['hit_rate']:.0%} hit rate)")
+        
         if st.button("Analyze My Expenses"):
             if auth_token:
                 with st.spinner("Fetching your expense data..."):
@@ -349,10 +284,9 @@ def main():
                     analysis = st.session_state.chatbot.analyze_expenses(expense_data)
                     
                     # Add analysis to chat
-                    st.session_state.messages.append({
-                        "role": "assistant", 
-                        "content": f"Here's your expense analysis for {selected_year}:\n\n{analysis}"
-                    })
+                    st.session_state.transcript.append(
+                        "assistant", f"Here's your expense analysis for {selected_year}:\n\n{analysis}"
+                    )
                     
                     # Create visualization
                     fig = st.session_state.chatbot.create_expense_visualization(expense_data)
@@ -363,15 +297,13 @@ def main():
             else:
                 st.error("Please enter your authentication token first.")
     
-    # Display chat messages
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    # Display chat messages: the latest page only, older pages on request
+    render_transcript(st.session_state.transcript)
     
     # Chat input
     if prompt := st.chat_input("Ask me about saving, taxes, investments, or financial planning..."):
         # Add user message to chat history
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        st.session_state.transcript.append("user", prompt)
         
         # Display user message
         with st.chat_message("user"):
@@ -401,10 +333,7 @@ def main():
                 st.markdown(response)
                 
                 # Add assistant response to chat history
-                st.session_state.messages.append({
-                    "role": "assistant", 
-                    "content": response
-                })
+                st.session_state.transcript.append("assistant", response)
 
 if __name__ == "__main__":
     main()
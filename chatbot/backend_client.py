@@ -0,0 +1,81 @@
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class BackendClient:
+    """Pooled, retrying HTTP client for the expense tracker backend API"""
+
+    def __init__(self, base_url: str,
+                 connect_timeout: float = 3.05,
+                 read_timeout: float = 30.0,
+                 max_retries: int = 3,
+                 backoff_factor: float = 0.5,
+                 pool_size: int = 10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        # Keep-alive pool so repeated calls skip the TCP/TLS handshake
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
+        })
+
+    def get(self, path: str, token: Optional[str] = None, **kwargs) -> requests.Response:
+        """GET a backend path with the client's timeouts and retry policy"""
+        headers = kwargs.pop('headers', {})
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(f"{self.base_url}{path}", headers=headers, **kwargs)
+
+    def get_json(self, path: str, token: Optional[str] = None) -> Any:
+        """GET a backend path and decode its JSON body, raising on HTTP errors"""
+        response = self.get(path, token)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        self.session.close()
+
+
+_clients: Dict[str, BackendClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_backend_client(base_url: str) -> BackendClient:
+    """Return the process-wide client for a backend URL, creating it once"""
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = BackendClient(
+                base_url,
+                connect_timeout=float(os.getenv('BACKEND_CONNECT_TIMEOUT', '3.05')),
+                read_timeout=float(os.getenv('BACKEND_READ_TIMEOUT', '30')),
+                max_retries=int(os.getenv('BACKEND_MAX_RETRIES', '3')),
+                pool_size=int(os.getenv('BACKEND_POOL_SIZE', '10')),
+            )
+            _clients[base_url] = client
+        return client
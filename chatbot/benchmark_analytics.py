@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized analytics engine against the original per-row loop,
+and the compiled categorizer against an if/elif keyword chain as rules grow
+"""
+
+import argparse
+import time
+
+from categorizer import CategoryRule, KeywordCategorizer, normalize_name
+from expense_analytics import ExpenseAnalytics
+from stub_backend import generate_month
+
+
+def legacy_analyze(data):
+    """The per-row loop analyze_expenses used before the analytics engine"""
+    total = 0
+    categories = {}
+    monthly_totals = {}
+
+    for month_key, expenses in data.items():
+        if isinstance(expenses, list):
+            month_total = sum(expense.get('amount', 0) for expense in expenses)
+            monthly_totals[month_key] = month_total
+            total += month_total
+
+            for expense in expenses:
+                name = expense.get('name', '').lower()
+                amount = expense.get('amount', 0)
+
+                if any(word in name for word in ['food', 'restaurant', 'grocery']):
+                    categories['Food'] = categories.get('Food', 0) + amount
+                elif any(word in name for word in ['transport', 'fuel', 'bus', 'taxi']):
+                    categories['Transportation'] = categories.get('Transportation', 0) + amount
+                elif any(word in name for word in ['rent', 'utilities', 'electricity']):
+                    categories['Housing'] = categories.get('Housing', 0) + amount
+                else:
+                    categories['Other'] = categories.get('Other', 0) + amount
+
+    # The chart used to walk the payload a second time
+    chart_months = [int(k) for k, v in data.items() if isinstance(v, list)]
+    chart_amounts = [sum(e.get('amount', 0) for e in v) for v in data.values() if isinstance(v, list)]
+    return total, categories, monthly_totals, (chart_months, chart_amounts)
+
+
+def engine_analyze(data):
+    analytics = ExpenseAnalytics.from_payload(data)
+    return analytics.total, analytics.category_totals(), analytics.monthly_totals(), analytics.monthly_frame()
+
+
+def chain_categorize(rules, names):
+    """An if/elif chain of any(word in name ...) checks, one branch per rule"""
+    ordered = sorted(rules, key=lambda rule: rule.priority, reverse=True)
+    result = []
+    for name in names:
+        name = normalize_name(name)
+        for rule in ordered:
+            if any(word in name for word in rule.keywords):
+                result.append(rule.category)
+                break
+        else:
+            result.append('Other')
+    return result
+
+
+def synthetic_rules(count):
+    return [CategoryRule(f"Category {i}", (f"kw{i}a", f"kw{i}b", f"kw{i}c"), priority=count - i)
+            for i in range(count)]
+
+
+def best_of(func, data, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(data)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000, help="Expenses in the synthetic year")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    per_month = args.rows // 12
+    data = {str(m): generate_month('benchmark', 2025, m, per_month) for m in range(12)}
+
+    legacy_total, legacy_categories, _, _ = legacy_analyze(data)
+    engine_total, engine_categories, _, _ = engine_analyze(data)
+    assert abs(legacy_total - engine_total) < 1e-6 * max(1.0, legacy_total)
+    for category, amount in legacy_categories.items():
+        assert abs(engine_categories[category] - amount) < 1e-6 * max(1.0, amount)
+
+    legacy = best_of(legacy_analyze, data, args.repeat)
+    engine = best_of(engine_analyze, data, args.repeat)
+
+    print(f"📊 Analytics benchmark ({per_month * 12:,} expenses, best of {args.repeat})")
+    print(f"  Per-row loop:     {legacy * 1000:8.1f} ms")
+    print(f"  Vectorized engine:{engine * 1000:8.1f} ms")
+    print(f"  Speedup:          {legacy / engine:8.1f}x")
+
+    names = [expense['name'] + f" kw{i % 400}b" for i, expense in enumerate(data['0'])]
+    print(f"\n🏷️  Categorizer benchmark ({len(names):,} names, cold memo)")
+    for rule_count in (3, 30, 300):
+        rules = synthetic_rules(rule_count)
+        chain = best_of(lambda n: chain_categorize(rules, n), names, args.repeat)
+        compiled = best_of(lambda n: KeywordCategorizer(rules).category_codes(n), names, args.repeat)
+        print(f"  {rule_count:4d} rules: if/elif {chain * 1000:8.1f} ms   compiled {compiled * 1000:8.1f} ms")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Compare the local model's CPU backends (fp32 PyTorch, dynamic int8, ONNX Runtime)
+on load time, resident memory and generation speed. Each backend is measured in
+a fresh process so memory numbers do not leak between them.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from local_backends import LOCAL_BACKENDS
+from model_registry import HF_MODEL_NAME, current_rss_mb
+from prompt_templates import get_template
+
+QUERY = "How can I save 20% of my monthly income?"
+
+
+def measure(backend: str, model_name: str, new_tokens: int, repeat: int) -> dict:
+    """Load one backend in this process and time greedy generation"""
+    baseline_rss = current_rss_mb()
+    import torch
+    from transformers import AutoTokenizer
+    from local_backends import load_local_model
+
+    token = os.getenv('HUGGINGFACE_TOKEN') or None
+    tokenizer = AutoTokenizer.from_pretrained(model_name, token=token)
+    framework_rss = current_rss_mb()
+
+    started = time.perf_counter()
+    model, _ = load_local_model(model_name, backend, token)
+    load_seconds = time.perf_counter() - started
+    loaded_rss = current_rss_mb()
+
+    input_ids = torch.tensor([tokenizer.encode(get_template("huggingface", "general").render(QUERY))])
+    timings = []
+    for _ in range(repeat + 1):
+        started = time.perf_counter()
+        with torch.no_grad():
+            output = model.generate(input_ids=input_ids, attention_mask=torch.ones_like(input_ids),
+                                    max_new_tokens=new_tokens, min_new_tokens=new_tokens,
+                                    do_sample=False, pad_token_id=tokenizer.eos_token_id)
+        timings.append((time.perf_counter() - started, output.shape[1] - input_ids.shape[1]))
+    # The first call warms up kernels and is not counted
+    seconds, tokens = min(timings[1:])
+
+    return {
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "model_rss_mb": None if loaded_rss is None else loaded_rss - framework_rss,
+        "total_rss_mb": loaded_rss,
+        "baseline_rss_mb": baseline_rss,
+        "tokens_per_second": tokens / seconds,
+        "prompt_tokens": int(input_ids.shape[1]),
+    }
+
+
+def measure_in_subprocess(backend: str, args) -> dict:
+    command = [sys.executable, __file__, '--child', backend, '--model', args.model,
+               '--new-tokens', str(args.new_tokens), '--repeat', str(args.repeat)]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        error = (result.stderr.strip().splitlines() or ["failed"])[-1]
+        return {"backend": backend, "error": error}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--model', default=HF_MODEL_NAME)
+    parser.add_argument('--backends', nargs='+', default=list(LOCAL_BACKENDS), choices=LOCAL_BACKENDS)
+    parser.add_argument('--new-tokens', type=int, default=32)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    parser.add_argument('--child', choices=LOCAL_BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.model, args.new_tokens, args.repeat)))
+        sys.exit(0)
+
+    results = [measure_in_subprocess(backend, args) for backend in args.backends]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        sys.exit(0)
+
+    print(f"🧮 Local backend benchmark ({args.model}, {args.new_tokens} new tokens, best of {args.repeat})")
+    print(f"  {'backend':8s} {'load':>8s} {'model RSS':>10s} {'total RSS':>10s} {'tokens/s':>9s}")
+    for result in results:
+        if "error" in result:
+            print(f"  {result['backend']:8s} unavailable: {result['error']}")
+            continue
+        model_rss = "n/a" if result["model_rss_mb"] is None else f"{result['model_rss_mb']:.0f} MB"
+        total_rss = "n/a" if result["total_rss_mb"] is None else f"{result['total_rss_mb']:.0f} MB"
+        print(f"  {result['backend']:8s} {result['load_seconds']:7.2f}s {model_rss:>10s} {total_rss:>10s} "
+              f"{result['tokens_per_second']:9.1f}")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark local-model throughput under concurrent sessions: one-at-a-time
+generate calls behind a lock versus the micro-batching inference worker
+"""
+
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from inference_worker import GenerationRequest, MicroBatchWorker, huggingface_batch_generator
+from model_registry import HF_MODEL_NAME
+from prompt_templates import get_template, prefix_tokens
+
+QUERIES = [
+    "How can I save 20% of my monthly income?",
+    "Analyze my spending patterns",
+    "How much tax will I pay on ₹60,000 a month?",
+    "Help me understand an emergency fund",
+]
+
+
+def fake_batch_generator(step_seconds: float, row_seconds: float, new_tokens: int):
+    """Simulated model: each decode step costs a fixed overhead plus a little per row"""
+    def generate_batch(batch):
+        time.sleep(new_tokens * (step_seconds + row_seconds * len(batch)))
+        return ["ok"] * len(batch)
+    return generate_batch
+
+
+def run_load(call, requests: int, concurrency: int) -> float:
+    """Requests per second with `concurrency` sessions issuing `requests` calls in total"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--model', default=HF_MODEL_NAME)
+    parser.add_argument('--requests', type=int, default=32)
+    parser.add_argument('--concurrency', type=int, default=8, help="Simultaneous sessions")
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--max-wait', type=float, default=0.02)
+    parser.add_argument('--new-tokens', type=int, default=20)
+    parser.add_argument('--fake', action='store_true', help="Use a simulated model instead of loading one")
+    parser.add_argument('--fake-step', type=float, default=0.01, help="Simulated seconds per decode step")
+    parser.add_argument('--fake-row', type=float, default=0.001, help="Simulated extra seconds per row per step")
+    args = parser.parse_args()
+
+    if args.fake:
+        generate_batch = fake_batch_generator(args.fake_step, args.fake_row, args.new_tokens)
+        prompts = [[0]] * len(QUERIES)
+        label = "simulated model"
+    else:
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        token = os.getenv('HUGGINGFACE_TOKEN') or None
+        tokenizer = AutoTokenizer.from_pretrained(args.model, token=token)
+        model = AutoModelForCausalLM.from_pretrained(args.model, token=token).eval()
+        generate_batch = huggingface_batch_generator(model, tokenizer, do_sample=False)
+        template = get_template("huggingface", "general")
+        prompts = [prefix_tokens.encode(args.model, tokenizer, template, query) for query in QUERIES]
+        label = args.model
+
+    # Baseline: every session calls the model on its own, serialized by the model lock
+    model_lock = threading.Lock()
+
+    def one_at_a_time(i):
+        with model_lock:
+            return generate_batch([GenerationRequest(prompts[i % len(prompts)], args.new_tokens)])[0]
+
+    worker = MicroBatchWorker(generate_batch, max_batch_size=args.batch_size, max_wait=args.max_wait)
+
+    def batched(i):
+        return worker.submit(prompts[i % len(prompts)], args.new_tokens).result()
+
+    print(f"🚦 Micro-batching benchmark ({label}, {args.requests} requests, "
+          f"{args.concurrency} concurrent sessions, {args.new_tokens} new tokens)")
+    sequential = run_load(one_at_a_time, args.requests, args.concurrency)
+    print(f"  One at a time:   {sequential:7.2f} req/s")
+    throughput = run_load(batched, args.requests, args.concurrency)
+    stats = worker.stats()
+    print(f"  Micro-batched:   {throughput:7.2f} req/s  "
+          f"(mean batch {stats['mean_batch_size']:.1f}, max {args.batch_size}, wait {args.max_wait * 1000:.0f} ms)")
+    print(f"  Speedup:         {throughput / sequential:7.1f}x")
+    worker.stop()
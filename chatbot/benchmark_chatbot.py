@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Drive ExpenseChatbot headlessly through full chat turns against the stub
+backend and fake AI providers, and report per-stage latency, throughput and
+peak memory:
+
+    python benchmark_chatbot.py --users 8 --turns 10 --expenses-per-year 100000 --output run.json
+    python benchmark_chatbot.py ... --compare run.json
+    python benchmark_chatbot.py --processes 1 2 4       # core-count scaling
+
+Nothing here needs API keys, a model download or a running Express server.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import chatbot_core
+from chatbot_core import ExpenseChatbot
+from conversation_memory import approximate_tokens
+from fake_providers import FakeProvider
+from metrics import StageMetrics, metrics
+from model_registry import current_rss_mb
+from response_cache import response_cache
+from stub_backend import StubBackend
+from transcript import Transcript
+
+QUESTIONS = [
+    "Analyze my spending patterns",
+    "How can I save 20% of my income?",
+    "Show me where I'm overspending",
+    "Help me understand a basic budget for my assignment",
+    "Prepare a quarterly budget analysis report",
+    "How does my spending compare to last year?",
+]
+
+STAGE_ORDER = ["chat_turn", "detect_user_type", "get_expense_data", "get_expense_history", "analyze_expenses",
+               "first_token", "generation", "generation_failed", "adjust_response_tone"]
+
+
+class BenchmarkChatbot(ExpenseChatbot):
+    """ExpenseChatbot with the AI services swapped for deterministic fakes"""
+
+    def __init__(self, fakes: Dict[str, FakeProvider]):
+        self.fakes = fakes
+        super().__init__()
+
+    def setup_huggingface(self):
+        self.hf_pipeline = self.fakes.get("huggingface")
+        self.hf_tokenizer = None
+        self.hf_model_name = None
+        self.hf_prefix_cache = False
+        self.hf_lock = threading.Lock()
+        self.hf_token_counter = approximate_tokens
+        self.hf_pool = None
+        self.hf_context_window = None
+
+    def setup_groq(self):
+        self.groq_client = self.fakes.get("groq")
+
+    def setup_watson(self):
+        self.model = self.fakes.get("watson")
+        self.model_params = None
+
+    def stream_huggingface_response(self, prompt: str, user_type: str = "general", history: str = "",
+                                    cancelled: Optional[threading.Event] = None) -> Iterator[str]:
+        return self.fakes["huggingface"].stream()
+
+    def stream_groq_response(self, prompt: str, user_type: str = "general", history: str = "") -> Iterator[str]:
+        return self.fakes["groq"].stream()
+
+    def stream_watson_response(self, query: str, user_type: str = "general", context: str = "",
+                               history: str = "") -> Iterator[str]:
+        return self.fakes["watson"].stream()
+
+
+def make_fakes(args) -> Dict[str, FakeProvider]:
+    latencies = {"huggingface": args.hf_latency, "groq": args.groq_latency, "watson": args.watson_latency}
+    return {
+        name: FakeProvider(name, first_token_latency=latency, token_latency=args.token_latency,
+                           error=args.hf_error if name == "huggingface" else None)
+        for name, latency in latencies.items()
+        if name in args.providers
+    }
+
+
+def chat_turn(chatbot: ExpenseChatbot, transcript: Transcript, token: str, year: int, years: range, prompt: str):
+    """One chat turn as main() runs it, minus the Streamlit rendering"""
+    turn_started = time.perf_counter()
+    transcript.append("user", prompt)
+
+    user_type = chatbot.detect_user_type(prompt)
+    expense_data, history = chatbot.expense_context(prompt, token, year, years)
+
+    response = "".join(chatbot.stream_expense_advice(prompt, user_type, expense_data, history))
+    final_response = chatbot.adjust_response_tone(response, user_type)
+
+    transcript.append("assistant", final_response)
+    metrics.observe("chat_turn", time.perf_counter() - turn_started)
+
+
+def run_user(user: int, turns: int, offset: int, args, fakes: Dict[str, FakeProvider], years: range) -> int:
+    """A session's worth of turns; returns how many raised"""
+    chatbot = BenchmarkChatbot(fakes)
+    transcript = Transcript([{"role": "assistant", "content": "Hello!"}])
+    token = f"benchmark-user-{user}"
+    errors = 0
+    for turn in range(offset, offset + turns):
+        prompt = QUESTIONS[(user + turn) % len(QUESTIONS)]
+        if not args.cache:
+            # Distinct wording per turn, so every turn reaches a provider
+            prompt = f"{prompt} (turn {turn + 1})"
+        try:
+            chat_turn(chatbot, transcript, token, years[-1], years, prompt)
+        except Exception:
+            logging.exception("Turn %d for user %d failed", turn, user)
+            errors += 1
+    return errors
+
+
+def run_load(args, fakes: Dict[str, FakeProvider], years: range, turns: int, offset: int = 0,
+             users: Optional[List[int]] = None, concurrency: Optional[int] = None) -> int:
+    users = list(range(args.users)) if users is None else users
+    with ThreadPoolExecutor(max_workers=concurrency or args.concurrency, thread_name_prefix="benchmark-user") as pool:
+        futures = [pool.submit(run_user, user, turns, offset, args, fakes, years) for user in users]
+        return sum(future.result() for future in futures)
+
+
+def peak_rss_mb() -> float:
+    """High-water mark of this process's resident memory (the current RSS, or 0, where none is reported)"""
+    try:
+        import resource
+    except ImportError:
+        # Windows has no resource module; psutil reports the peak working set there
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except (ImportError, AttributeError):
+            return current_rss_mb() or 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def history_range(args) -> range:
+    current_year = datetime.now().year
+    return range(current_year - args.history_years + 1, current_year + 1)
+
+
+def stage_summaries(stage_metrics: StageMetrics) -> List[Dict[str, Any]]:
+    stages = [{key: value for key, value in entry.items() if key != "buckets"} for entry in stage_metrics.snapshot()]
+    stages.sort(key=lambda entry: (STAGE_ORDER.index(entry["stage"]) if entry["stage"] in STAGE_ORDER
+                                   else len(STAGE_ORDER), entry["stage"], entry["provider"] or ""))
+    return stages
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    fakes = make_fakes(args)
+    chatbot_core.PROVIDER_HEDGE_DELAY = args.hedge_delay
+    response_cache.clear()
+    years = history_range(args)
+
+    with StubBackend(expenses_per_year=args.expenses_per_year, latency=args.backend_latency) as stub:
+        os.environ['BACKEND_API_URL'] = stub.url
+        start_rss = current_rss_mb()
+
+        if args.warmup:
+            # Cold loads and first syncs, kept out of the reported numbers
+            run_load(args, fakes, years, args.warmup)
+            metrics.reset()
+
+        started = time.perf_counter()
+        errors = run_load(args, fakes, years, args.turns, offset=args.warmup)
+        elapsed = time.perf_counter() - started
+        backend_requests = stub.request_count
+
+    requests = args.users * args.turns
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "requests": requests,
+        "errors": errors,
+        "elapsed_seconds": elapsed,
+        "requests_per_second": requests / elapsed if elapsed else None,
+        "backend_requests": backend_requests,
+        "start_rss_mb": start_rss,
+        "peak_rss_mb": peak_rss_mb(),
+        "response_cache": response_cache.stats(),
+        "stages": stage_summaries(metrics),
+    }
+
+
+def process_worker(args, users: List[int], concurrency: int, barrier, results):
+    """One worker process: warm its sessions up, wait for the others, then run the measured turns"""
+    try:
+        fakes = make_fakes(args)
+        chatbot_core.PROVIDER_HEDGE_DELAY = args.hedge_delay
+        years = history_range(args)
+        if args.warmup:
+            run_load(args, fakes, years, args.warmup, users=users, concurrency=concurrency)
+            metrics.reset()
+        barrier.wait()
+        errors = run_load(args, fakes, years, args.turns, offset=args.warmup, users=users, concurrency=concurrency)
+    except Exception as e:
+        barrier.abort()
+        results.put({"error": f"{type(e).__name__}: {e}"})
+        return
+    results.put({"errors": errors, "samples": metrics.samples(), "peak_rss_mb": peak_rss_mb()})
+
+
+def run_scaling(args) -> Dict[str, Any]:
+    """The same load split across 1, 2, 4... worker processes sharing one cache file.
+
+    Sessions are dealt round-robin to the processes and the total concurrency stays
+    fixed, so the only thing that changes is how many interpreters (and GILs) do the work.
+    """
+    context = multiprocessing.get_context('spawn')
+    cache_dir = tempfile.mkdtemp(prefix="chatbot-bench-")
+    runs = []
+    with StubBackend(expenses_per_year=args.expenses_per_year, latency=args.backend_latency) as stub:
+        os.environ['BACKEND_API_URL'] = stub.url
+        for count in args.processes:
+            # A fresh shared cache per run; children read the environment when they start
+            os.environ['SHARED_CACHE_DB'] = os.path.join(cache_dir, f"cache-{count}.db")
+            barrier = context.Barrier(count + 1)
+            results = context.Queue()
+            users = list(range(args.users))
+            concurrency = max(1, args.concurrency // count)
+            processes = [context.Process(target=process_worker,
+                                         args=(args, users[index::count], concurrency, barrier, results))
+                         for index in range(count)]
+            for process in processes:
+                process.start()
+
+            barrier.wait(timeout=600)
+            backend_before = stub.request_count
+            started = time.perf_counter()
+            outcomes = [results.get() for _ in processes]
+            elapsed = time.perf_counter() - started
+            for process in processes:
+                process.join()
+
+            failures = [outcome["error"] for outcome in outcomes if "error" in outcome]
+            if failures:
+                raise RuntimeError(f"Worker process failed: {failures[0]}")
+            merged = StageMetrics()
+            for outcome in outcomes:
+                merged.merge(outcome["samples"])
+            requests = args.users * args.turns
+            runs.append({
+                "processes": count,
+                "requests": requests,
+                "errors": sum(outcome["errors"] for outcome in outcomes),
+                "elapsed_seconds": elapsed,
+                "requests_per_second": requests / elapsed if elapsed else None,
+                "backend_requests": stub.request_count - backend_before,
+                "peak_rss_mb": sum(outcome["peak_rss_mb"] for outcome in outcomes),
+                "stages": stage_summaries(merged),
+            })
+
+    base = runs[0]["requests_per_second"] if runs else None
+    for run in runs:
+        run["speedup"] = run["requests_per_second"] / base if base else None
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "cpu_count": os.cpu_count(),
+        "scaling": runs,
+    }
+
+
+def series_name(entry: Dict[str, Any]) -> str:
+    return f"{entry['stage']} ({entry['provider']})" if entry["provider"] else entry["stage"]
+
+
+def format_ms(seconds: Optional[float]) -> str:
+    return "n/a" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+def stage_p95(run: Dict[str, Any], stage: str) -> Optional[float]:
+    return next((entry["p95"] for entry in run["stages"] if entry["stage"] == stage), None)
+
+
+def print_scaling(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    config = result["config"]
+    print(f"🏋️  Chatbot scaling ({config['users']} users x {config['turns']} turns, "
+          f"{config['concurrency']} concurrent in total, {config['expenses_per_year']:,} expenses/year, "
+          f"{result['cpu_count']} CPUs)")
+    previous = {run["processes"]: run for run in (baseline or {}).get("scaling", [])}
+    print(f"  {'processes':>9s} {'req/s':>8s} {'speedup':>8s} {'turn p95 ms':>12s} {'backend':>8s} {'RSS MB':>8s}"
+          + (f" {'req/s Δ':>8s}" if baseline else ""))
+    for run in result["scaling"]:
+        line = (f"  {run['processes']:9d} {run['requests_per_second']:8.1f} {run['speedup']:7.2f}x "
+                f"{format_ms(stage_p95(run, 'chat_turn')):>12s} {run['backend_requests']:8d} {run['peak_rss_mb']:8.0f}")
+        before = previous.get(run["processes"])
+        if baseline:
+            if before and before["requests_per_second"]:
+                line += f" {(run['requests_per_second'] - before['requests_per_second']) / before['requests_per_second']:+8.0%}"
+            else:
+                line += f" {'new':>8s}"
+        print(line)
+        if run["errors"]:
+            print(f"  {'':9s} {run['errors']} errors")
+
+
+def print_report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    config = result["config"]
+    print(f"🏋️  Chatbot benchmark ({config['users']} users x {config['turns']} turns, "
+          f"{config['concurrency']} concurrent, {config['expenses_per_year']:,} expenses/year)")
+    print(f"  Requests:     {result['requests']} ({result['errors']} errors) in {result['elapsed_seconds']:.2f}s")
+    print(f"  Throughput:   {result['requests_per_second']:.1f} req/s")
+    print(f"  Peak RSS:     {result['peak_rss_mb']:.0f} MB")
+    print(f"  Backend hits: {result['backend_requests']}")
+
+    previous = {series_name(entry): entry for entry in (baseline or {}).get("stages", [])}
+    print(f"\n  {'stage':34s} {'n':>6s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}"
+          + (f" {'p95 Δ':>9s}" if baseline else ""))
+    for entry in result["stages"]:
+        name = series_name(entry)
+        line = (f"  {name:34s} {entry['count']:6d} {format_ms(entry['p50']):>9s} "
+                f"{format_ms(entry['p95']):>9s} {format_ms(entry['p99']):>9s}")
+        before = previous.get(name)
+        if baseline:
+            if before and before["p95"] and entry["p95"] is not None:
+                line += f" {(entry['p95'] - before['p95']) / before['p95']:+9.0%}"
+            else:
+                line += f" {'new':>9s}"
+        print(line)
+
+    if baseline:
+        print(f"\n  vs {baseline.get('commit') or 'baseline'}: "
+              f"{baseline['requests_per_second']:.1f} → {result['requests_per_second']:.1f} req/s, "
+              f"peak RSS {baseline['peak_rss_mb']:.0f} → {result['peak_rss_mb']:.0f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=4, help="Simulated sessions, each with its own expenses")
+    parser.add_argument('--turns', type=int, default=10, help="Measured chat turns per session")
+    parser.add_argument('--warmup', type=int, default=1, help="Unmeasured turns per session before the run")
+    parser.add_argument('--concurrency', type=int, default=4, help="Sessions chatting at the same time")
+    parser.add_argument('--expenses-per-year', type=int, default=10_000)
+    parser.add_argument('--history-years', type=int, default=6, help="Years fetched for year-over-year questions")
+    parser.add_argument('--backend-latency', type=float, default=0.0, help="Seconds added to every backend response")
+    parser.add_argument('--providers', nargs='+', default=["huggingface", "groq", "watson"],
+                        choices=["huggingface", "groq", "watson"])
+    parser.add_argument('--hf-latency', type=float, default=0.2, help="Seconds to the first token")
+    parser.add_argument('--groq-latency', type=float, default=0.05)
+    parser.add_argument('--watson-latency', type=float, default=0.1)
+    parser.add_argument('--token-latency', type=float, default=0.002, help="Seconds between streamed words")
+    parser.add_argument('--hf-error', default=None, help="Make the Hugging Face fake fail with this message")
+    parser.add_argument('--hedge-delay', type=float, default=chatbot_core.PROVIDER_HEDGE_DELAY)
+    parser.add_argument('--cache', action='store_true', help="Repeat questions verbatim so the answer cache can hit")
+    parser.add_argument('--processes', type=int, nargs='+',
+                        help="Run the load in each of these numbers of worker processes sharing a cache file")
+    parser.add_argument('--output', help="Save the results as JSON to this path")
+    parser.add_argument('--compare', help="A previous --output file to compare against")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    result = run_scaling(args) if args.processes else run_benchmark(args)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    if args.processes:
+        print_scaling(result, baseline)
+    else:
+        print_report(result, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Saved results to {args.output}")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark local Hugging Face latency per request on CPU, with the full prompt
+prefilled every time versus the cached system-prefix past_key_values
+"""
+
+import argparse
+import os
+import time
+
+from kv_prefix_cache import prefix_kv_cache
+from model_registry import HF_MODEL_NAME
+from prompt_templates import USER_TYPES, get_template, prefix_tokens
+
+QUERY = "How can I save 20% of my monthly income?"
+
+
+def timed_generate(model, tokenizer, input_ids, new_tokens, past_key_values=None):
+    import torch
+
+    started = time.perf_counter()
+    with torch.no_grad():
+        output = model.generate(
+            input_ids=input_ids,
+            attention_mask=torch.ones_like(input_ids),
+            past_key_values=past_key_values,
+            max_new_tokens=new_tokens,
+            do_sample=False,
+            pad_token_id=tokenizer.eos_token_id,
+        )
+    return time.perf_counter() - started, output[0, input_ids.shape[1]:].tolist()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--model', default=HF_MODEL_NAME)
+    parser.add_argument('--new-tokens', type=int, default=20, help="Tokens generated per request")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--threads', type=int, default=None, help="torch CPU threads (default: torch's choice)")
+    args = parser.parse_args()
+
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    token = os.getenv('HUGGINGFACE_TOKEN') or None
+    tokenizer = AutoTokenizer.from_pretrained(args.model, token=token)
+    model = AutoModelForCausalLM.from_pretrained(args.model, token=token).eval()
+
+    print(f"⚡ Prefix KV cache benchmark ({args.model}, {args.new_tokens} new tokens, best of {args.repeat})")
+    for user_type in USER_TYPES:
+        template = get_template("huggingface", user_type)
+        prefix_ids = prefix_tokens.prefix_ids(args.model, tokenizer, template)
+        input_ids = torch.tensor([prefix_tokens.encode(args.model, tokenizer, template, QUERY)])
+
+        # Warm up both paths, and build the prefix cache outside the timed loop
+        _, full_tokens = timed_generate(model, tokenizer, input_ids, args.new_tokens)
+        _, cached_tokens = timed_generate(model, tokenizer, input_ids, args.new_tokens,
+                                          prefix_kv_cache.get(args.model, model, template, prefix_ids))
+
+        full = min(timed_generate(model, tokenizer, input_ids, args.new_tokens)[0]
+                   for _ in range(args.repeat))
+        cached = min(timed_generate(model, tokenizer, input_ids, args.new_tokens,
+                                    prefix_kv_cache.get(args.model, model, template, prefix_ids))[0]
+                     for _ in range(args.repeat))
+
+        print(f"  {user_type:12s} prompt {input_ids.shape[1]:4d} tokens ({len(prefix_ids)} cached): "
+              f"full prefill {full * 1000:7.1f} ms   cached prefix {cached * 1000:7.1f} ms   "
+              f"{full / cached:4.1f}x   same output: {'yes' if full_tokens == cached_tokens else 'no'}")
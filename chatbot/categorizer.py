@@ -0,0 +1,121 @@
+import json
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_CATEGORY = 'Other'
+
+
+@dataclass(frozen=True)
+class CategoryRule:
+    """Keywords that map an expense name to a category; higher priority wins"""
+    category: str
+    keywords: Tuple[str, ...]
+    priority: int = 0
+
+
+DEFAULT_RULES = [
+    CategoryRule('Food', ('food', 'restaurant', 'grocery'), priority=300),
+    CategoryRule('Transportation', ('transport', 'fuel', 'bus', 'taxi'), priority=200),
+    CategoryRule('Housing', ('rent', 'utilities', 'electricity'), priority=100),
+]
+
+
+def normalize_name(name: str) -> str:
+    """Lower-case an expense name and collapse its whitespace"""
+    return ' '.join(name.lower().split())
+
+
+class KeywordCategorizer:
+    """Compiles a rule table into one regex and memoizes results per normalized name"""
+
+    def __init__(self, rules: Sequence[CategoryRule] = DEFAULT_RULES,
+                 default_category: str = DEFAULT_CATEGORY, cache_size: int = 4096):
+        self.rules = list(rules)
+        self.default_category = default_category
+
+        # Category order: rule table order, then the default
+        self.categories: List[str] = []
+        for rule in self.rules:
+            if rule.category not in self.categories:
+                self.categories.append(rule.category)
+        if default_category not in self.categories:
+            self.categories.append(default_category)
+        self.default_code = self.categories.index(default_category)
+
+        # Each keyword keeps its best (priority, table position); earlier rules win ties
+        best: Dict[str, Tuple[int, int, int]] = {}
+        for position, rule in enumerate(self.rules):
+            code = self.categories.index(rule.category)
+            for keyword in rule.keywords:
+                keyword = normalize_name(keyword)
+                if not keyword:
+                    continue
+                rank = (rule.priority, -position, code)
+                if keyword not in best or rank[:2] > best[keyword][:2]:
+                    best[keyword] = rank
+        self._keyword_rank = {keyword: rank[:2] for keyword, rank in best.items()}
+        self._keyword_code = {keyword: rank[2] for keyword, rank in best.items()}
+
+        # Zero-width lookahead finds keywords starting at every position, so
+        # overlapping keywords are all seen in a single left-to-right scan.
+        # Alternatives are ordered best-first, so the one reported at a given
+        # position is already the strongest keyword starting there.
+        ordered = sorted(best, key=lambda k: (self._keyword_rank[k], len(k)), reverse=True)
+        self._pattern = re.compile('(?=(' + '|'.join(map(re.escape, ordered)) + '))') if ordered else None
+
+        self._categorize_code = lru_cache(maxsize=cache_size)(self._match_code)
+
+    def _match_code(self, normalized: str) -> int:
+        if self._pattern is None:
+            return self.default_code
+        best_keyword = None
+        for match in self._pattern.finditer(normalized):
+            keyword = match.group(1)
+            if best_keyword is None or self._keyword_rank[keyword] > self._keyword_rank[best_keyword]:
+                best_keyword = keyword
+        if best_keyword is None:
+            return self.default_code
+        return self._keyword_code[best_keyword]
+
+    def category_code(self, name: Optional[str]) -> int:
+        """Index into self.categories for an expense name"""
+        return self._categorize_code(normalize_name(name or ''))
+
+    def categorize(self, name: Optional[str]) -> str:
+        return self.categories[self.category_code(name)]
+
+    def category_codes(self, names: Iterable[Optional[str]]) -> np.ndarray:
+        """Category indices for many names"""
+        return np.fromiter((self.category_code(name) for name in names), dtype=np.int16)
+
+    def cache_info(self):
+        return self._categorize_code.cache_info()
+
+
+def load_rules(path: str) -> List[CategoryRule]:
+    """Read a rule table: a JSON list of {"category", "keywords", "priority"} objects"""
+    with open(path, encoding='utf-8') as rules_file:
+        raw_rules = json.load(rules_file)
+    return [
+        CategoryRule(
+            category=str(rule['category']),
+            keywords=tuple(str(keyword) for keyword in rule['keywords']),
+            priority=int(rule.get('priority', 0)),
+        )
+        for rule in raw_rules
+    ]
+
+
+def load_categorizer() -> KeywordCategorizer:
+    """Build the categorizer from EXPENSE_CATEGORY_RULES, or the built-in rules"""
+    rules_path = os.getenv('EXPENSE_CATEGORY_RULES')
+    rules = load_rules(rules_path) if rules_path else DEFAULT_RULES
+    return KeywordCategorizer(rules, default_category=os.getenv('EXPENSE_DEFAULT_CATEGORY', DEFAULT_CATEGORY))
+
+
+default_categorizer = load_categorizer()
@@ -0,0 +1,605 @@
+import os
+import time
+import hashlib
+import logging
+from datetime import datetime, date
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from threading import Event, Thread
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Tuple, Any
+import json
+from dotenv import load_dotenv
+from model_registry import registry
+from expense_cache import TTLLRUCache, expense_cache
+from response_cache import response_cache
+from circuit_breaker import breakers
+from provider_orchestrator import AllProvidersFailed, DEFAULT_DEADLINES, Provider, ProviderOrchestrator
+from backend_client import get_backend_client
+from prompt_templates import PromptTemplate, get_template, prefix_tokens
+from conversation_memory import MEMORY_BUDGETS, ConversationMemory, token_counter
+from metrics import metrics
+from kv_prefix_cache import PREFIX_CACHE_ENABLED, prefix_kv_cache
+from inference_worker import MICRO_BATCH_ENABLED, get_batch_worker, huggingface_batch_generator
+
+# pandas, plotly and the provider SDKs are imported on first use to keep cold start fast
+if TYPE_CHECKING:
+    from expense_summary import ExpenseSummary
+    from expense_history import ExpenseHistory
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger("expense_chatbot")
+
+# Seconds to wait for the next token from the local model before giving up
+HF_STREAM_TIMEOUT = float(os.getenv('HF_STREAM_TIMEOUT', '120'))
+# Seconds between checks for cancellation while a batched request waits for its answer
+HF_CANCEL_POLL = 0.1
+# Tokens the local model generates per answer; they share its context window with the prompt
+HF_MAX_NEW_TOKENS = 200
+
+# Seconds to wait on a provider before also starting the next fallback
+PROVIDER_HEDGE_DELAY = float(os.getenv('PROVIDER_HEDGE_DELAY', '3'))
+
+PROVIDER_LABELS = {"huggingface": "Hugging Face AI", "groq": "Groq AI", "watson": "IBM Watson AI"}
+
+# Optional Watson tone rewrite after the answer is shown; off by default
+TONE_REWRITE_ENABLED = os.getenv('TONE_REWRITE', 'false').lower() in ('1', 'true', 'yes')
+TONE_REWRITE_DEADLINE = float(os.getenv('TONE_REWRITE_DEADLINE', '2'))
+tone_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tone-rewrite")
+tone_cache = TTLLRUCache(max_entries=256, ttl_seconds=3600)
+
+# Receives (level, message) for anything the user should see: "success", "info", "warning" or "error"
+Notifier = Callable[[str, str], None]
+
+NOTICE_LEVELS = {"success": logging.INFO, "info": logging.INFO, "warning": logging.WARNING, "error": logging.ERROR}
+
+
+def log_notice(level: str, message: str):
+    """Default notifier for clients without a UI to show notices in"""
+    logger.log(NOTICE_LEVELS.get(level, logging.INFO), message)
+
+
+class ExpenseChatbot:
+    """One user's chat session over the shared AI backends, independent of any UI.
+    
+    Notices meant for the user go to `notify`, so Streamlit, the HTTP API and the
+    benchmark can each surface them in their own way.
+    """
+    
+    def __init__(self, notify: Notifier = log_notice):
+        self.notify = notify
+        self.backend_url = os.getenv('BACKEND_API_URL', 'https://finance-backend-zncc.onrender.com')
+        self.backend = get_backend_client(self.backend_url)
+        self._summary = None
+        self._summary_source = None
+        self._history = None
+        self._history_sources = None
+        # Recent turns verbatim, older ones summarized; packed into each prompt per model budget
+        self.memory = ConversationMemory()
+        self.last_stream_stats = {}
+        self.setup_huggingface()
+        self.setup_groq()
+        self.setup_watson()
+        
+    def setup_huggingface(self):
+        """Attach the shared Hugging Face AI client"""
+        handle = registry.get("huggingface")
+        self.hf_pipeline = handle.client
+        self.hf_tokenizer = handle.components.get("tokenizer")
+        self.hf_model_name = handle.components.get("model_name")
+        self.hf_prefix_cache = PREFIX_CACHE_ENABLED and handle.components.get("prefix_cache", True)
+        self.hf_lock = handle.lock
+        self.hf_token_counter = token_counter(self.hf_tokenizer)
+        self.hf_context_window = handle.components.get("context_window")
+        # Set when generation runs in worker processes (HF_PROCESS_POOL)
+        self.hf_pool = handle.components.get("pool")
+        if handle.error:
+            self.notify("error", f"Failed to initialize Hugging Face AI: {handle.error}")
+        elif self.hf_pipeline:
+            self.notify("success", handle.status)
+            self.notify("info", f"🤖 Using model: {handle.components['model_name']} ({handle.components.get('backend', 'pytorch')})")
+        else:
+            self.notify("warning", handle.status)
+        
+    def setup_groq(self):
+        """Attach the shared Groq AI client (now as fallback)"""
+        handle = registry.get("groq")
+        self.groq_client = handle.client
+        if handle.error:
+            self.notify("warning", f"Groq AI initialization failed: {handle.error}")
+        else:
+            self.notify("info", handle.status)
+        
+    def setup_watson(self):
+        """Attach the shared IBM Watson AI client with Granite model"""
+        handle = registry.get("watson")
+        self.model = handle.client
+        self.model_params = handle.components.get("params")
+        if handle.error:
+            self.notify("error", f"Failed to initialize Watson AI: {handle.error}")
+        elif not self.model:
+            self.notify("info", handle.status)
+    
+    @metrics.timed("detect_user_type")
+    def detect_user_type(self, message: str) -> str:
+        """Detect user type based on message content and complexity"""
+        professional_indicators = ['budget', 'financial', 'analysis', 'report', 'quarterly', 'ROI']
+        student_indicators = ['homework', 'assignment', 'simple', 'basic', 'learn', 'help me understand']
+        
+        message_lower = message.lower()
+        
+        if any(indicator in message_lower for indicator in professional_indicators):
+            return "professional"
+        elif any(indicator in message_lower for indicator in student_indicators):
+            return "student"
+        else:
+            return "general"
+    
+    @metrics.timed("adjust_response_tone")
+    def adjust_response_tone(self, response: str, user_type: str) -> str:
+        """Optionally rewrite the tone with Watson, keeping the original if the rewrite misses its deadline.
+        
+        Tone is normally part of the primary prompt (see prompt_templates.TONE_INSTRUCTIONS), so this second
+        generation only runs when TONE_REWRITE is enabled.
+        """
+        tone_prompts = {
+            "student": "Simplify this explanation and make it more educational and encouraging: ",
+            "professional": "Make this response more formal and include relevant business terminology: ",
+            "general": "Make this response conversational and helpful: "
+        }
+        
+        if not TONE_REWRITE_ENABLED or not self.model or user_type not in tone_prompts:
+            return response
+        
+        key = (hashlib.sha256(response.encode('utf-8')).hexdigest(), user_type)
+        cached = tone_cache.get_item(key)
+        if cached is not None:
+            return cached
+        
+        def remember(done):
+            # Late rewrites still land in the cache for the next identical answer
+            if not done.cancelled() and done.exception() is None and done.result():
+                tone_cache.set_item(key, done.result())
+        
+        future = tone_executor.submit(self.model.generate_text, prompt=tone_prompts[user_type] + response)
+        future.add_done_callback(remember)
+        try:
+            return future.result(timeout=TONE_REWRITE_DEADLINE) or response
+        except Exception:
+            return response
+    
+    def generate_huggingface_response(self, prompt: str, user_type: str = "general") -> str:
+        """Generate response using Hugging Face AI (Primary service)"""
+        if not self.hf_pipeline:
+            return "Hugging Face AI not available. Please configure HUGGINGFACE_TOKEN."
+        
+        try:
+            return "".join(self.stream_huggingface_response(prompt, user_type))
+        except Exception as e:
+            self.notify("error", f"Hugging Face AI error: {str(e)}")
+            return f"I apologize, but I'm experiencing technical difficulties with the AI service. Please try again later. Error: {str(e)}"
+    
+    def huggingface_memory_budget(self, prompt: str, user_type: str = "general") -> Optional[int]:
+        """Tokens of conversation memory the local model can take for this prompt.
+
+        The system prefix, the prompt and the generated answer share the model's
+        context window; memory gets what is left, up to MEMORY_BUDGETS. None when
+        the prompt alone leaves no room for an answer.
+        """
+        budget = MEMORY_BUDGETS["huggingface"]
+        if not self.hf_context_window or self.hf_tokenizer is None:
+            return budget
+        template = get_template("huggingface", user_type)
+        prompt_length = len(prefix_tokens.encode(self.hf_model_name, self.hf_tokenizer, template, prompt))
+        room = self.hf_context_window - prompt_length - HF_MAX_NEW_TOKENS
+        if room < 0:
+            return None
+        return min(budget, room)
+
+    def stream_huggingface_response(self, prompt: str, user_type: str = "general", history: str = "",
+                                    cancelled: Optional[Event] = None) -> Iterator[str]:
+        """Stream a Hugging Face AI response as tokens are generated; raises on failure.
+
+        Setting `cancelled` stops local generation at the next token.
+        """
+        if not self.hf_pipeline:
+            yield "Hugging Face AI not available. Please configure HUGGINGFACE_TOKEN."
+            return
+        
+        template = get_template("huggingface", user_type)
+        
+        # The fixed system prefix is tokenized once per model; only the query is encoded here
+        prompt_ids = prefix_tokens.encode(self.hf_model_name, self.hf_tokenizer, template, prompt, history=history)
+        if self.hf_pool is not None:
+            # Raises InferencePoolBusy when the queue is full, so the next provider answers instead
+            texts = self.hf_pool.stream({"prompt_ids": prompt_ids, "user_type": user_type,
+                                         "max_new_tokens": HF_MAX_NEW_TOKENS},
+                                        timeout=HF_STREAM_TIMEOUT, cancelled=cancelled)
+        elif MICRO_BATCH_ENABLED:
+            texts = self.batched_huggingface_text(prompt_ids, cancelled)
+        else:
+            texts = self.streamed_huggingface_text(template, prompt_ids, cancelled)
+        
+        generated_text = ""
+        for text in texts:
+            # Clean up the response
+            text = text.replace("<|endoftext|>", "")
+            if text:
+                generated_text += text
+                yield text
+        
+        # Ensure we have a meaningful response
+        if len(generated_text.strip()) < 10:
+            yield "I'd be happy to help you with comprehensive financial guidance! 🎯\n\nTo provide you with the most personalized and detailed advice, could you please tell me:\n• Are you a student or a working professional?\n• What's your specific financial question or goal?\n• Any details about your income or financial situation?\n\nI'll then break down my response into clear, actionable steps just for you!"
+    
+    def streamed_huggingface_text(self, template: PromptTemplate, prompt_ids: List[int],
+                                  cancelled: Optional[Event] = None) -> Iterator[str]:
+        """Generate for this session alone, yielding decoded text as tokens arrive"""
+        import torch
+        from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+        
+        input_ids = torch.tensor([prompt_ids])
+        model = self.hf_pipeline.model
+        # Set by the orchestrator, or when the reader stops early, so generation frees hf_lock
+        stop = cancelled or Event()
+        
+        class StopWhenCancelled(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                return torch.full((input_ids.shape[0],), stop.is_set(), dtype=torch.bool)
+        
+        # Generation runs in a worker thread; the streamer hands decoded text back
+        streamer = TextIteratorStreamer(self.hf_tokenizer, skip_prompt=True,
+                                        skip_special_tokens=True, timeout=HF_STREAM_TIMEOUT)
+        errors = []
+        
+        def run_generation():
+            try:
+                with self.hf_lock:
+                    if stop.is_set():
+                        streamer.end()
+                        return
+                    # Reuse the system prefix's keys and values so only the query is prefilled
+                    past_key_values = None
+                    if self.hf_prefix_cache:
+                        past_key_values = prefix_kv_cache.get(
+                            self.hf_model_name, model, template,
+                            prefix_tokens.prefix_ids(self.hf_model_name, self.hf_tokenizer, template))
+                    model.generate(
+                        input_ids=input_ids,
+                        attention_mask=torch.ones_like(input_ids),
+                        past_key_values=past_key_values,
+                        max_new_tokens=HF_MAX_NEW_TOKENS,
+                        temperature=0.7,
+                        do_sample=True,
+                        pad_token_id=self.hf_tokenizer.eos_token_id,
+                        streamer=streamer,
+                        stopping_criteria=StoppingCriteriaList([StopWhenCancelled()])
+                    )
+            except Exception as e:
+                errors.append(e)
+                streamer.end()
+        
+        Thread(target=run_generation, daemon=True).start()
+        
+        try:
+            yield from streamer
+        finally:
+            stop.set()
+        
+        if errors:
+            raise errors[0]
+    
+    def batched_huggingface_text(self, prompt_ids: List[int], cancelled: Optional[Event] = None) -> Iterator[str]:
+        """Generate through the shared micro-batching worker; the answer arrives in one piece"""
+        model, tokenizer, lock = self.hf_pipeline.model, self.hf_tokenizer, self.hf_lock
+        worker = get_batch_worker(
+            self.hf_model_name,
+            lambda: huggingface_batch_generator(model, tokenizer, lock, temperature=0.7, do_sample=True),
+        )
+        future = worker.submit(prompt_ids, max_new_tokens=HF_MAX_NEW_TOKENS)
+        deadline = time.monotonic() + HF_STREAM_TIMEOUT
+        try:
+            # Wait in short slices so a cancelled request leaves the queue before its batch is built
+            while not future.done():
+                if cancelled is not None and cancelled.is_set():
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise FutureTimeout(f"No answer from the local model within {HF_STREAM_TIMEOUT:.0f}s")
+                wait([future], timeout=min(HF_CANCEL_POLL, remaining))
+            yield future.result()
+        finally:
+            # A caller that stopped waiting gives up its place in the queue
+            future.cancel()
+
+    def generate_groq_response(self, prompt: str, user_type: str = "general") -> str:
+        """Generate response using Groq AI"""
+        if not self.groq_client:
+            return "Groq AI not available. Please configure GROQ_API_KEY."
+        
+        try:
+            return "".join(self.stream_groq_response(prompt, user_type))
+        except Exception as e:
+            self.notify("error", f"Groq AI error: {str(e)}")
+            return f"I apologize, but I'm experiencing technical difficulties. Please try again later. Error: {str(e)}"
+    
+    def stream_groq_response(self, prompt: str, user_type: str = "general", history: str = "") -> Iterator[str]:
+        """Stream a Groq AI response chunk by chunk; raises on failure"""
+        if not self.groq_client:
+            yield "Groq AI not available. Please configure GROQ_API_KEY."
+            return
+        
+        template = get_template("groq", user_type)
+        
+        # Generate response using Groq; the system prompt is sent once, as its own message
+        chat_completion = self.groq_client.chat.completions.create(
+            messages=[
+                {
+                    "role": "system",
+                    "content": template.system
+                },
+                {
+                    "role": "user", 
+                    "content": template.render(prompt, history=history)
+                }
+            ],
+            model="mixtral-8x7b-32768",  # Fast and capable model
+            temperature=0.7,
+            max_tokens=500,
+            top_p=1,
+            stream=True
+        )
+        
+        for chunk in chat_completion:
+            content = chunk.choices[0].delta.content if chunk.choices else None
+            if content:
+                yield content
+    
+    @metrics.timed("get_expense_data")
+    def get_expense_data(self, token: str, year: int = None, month: int = None) -> Dict:
+        """Fetch expense data from backend API, refreshing only what may have changed"""
+        if not year:
+            # Get current year data
+            year = datetime.now().year
+            month = None
+        
+        if month is None:
+            # A year is kept as a per-month snapshot; only stale months are fetched again
+            from expense_sync import SyncError, expense_sync
+            
+            try:
+                return expense_sync.sync(self.backend, token, year).payload()
+            except SyncError as e:
+                return {"error": str(e)}
+            except Exception as e:
+                return {"error": f"API call failed: {str(e)}"}
+        
+        cached = expense_cache.get(token, year, month)
+        if cached is not None:
+            return cached
+        
+        try:
+            path = f"/api/expenses/{year}/{month}"
+            response = self.backend.get(path, token)
+            if response.status_code == 200:
+                data = response.json()
+                expense_cache.set(token, year, month, data)
+                return data
+            else:
+                return {"error": f"Failed to fetch data: {response.status_code}"}
+                
+        except Exception as e:
+            return {"error": f"API call failed: {str(e)}"}
+    
+    def invalidate_expense_data(self, token: str, year: int = None, month: int = None) -> int:
+        """Forget cached expense data after expenses are added or deleted"""
+        from expense_sync import expense_sync
+        
+        return expense_cache.invalidate(token, year, month) + expense_sync.invalidate(token, year, month)
+    
+    def get_summary(self, data: Dict) -> Optional['ExpenseSummary']:
+        """Summarize the expenses once per data version and reuse it on every turn.
+        
+        The sync layer returns the same payload object until a month changes, so the
+        payload's identity is its data version.
+        """
+        from expense_summary import build_summary
+        
+        if self._summary_source is not data:
+            self._summary = build_summary(data)
+            self._summary_source = data
+        return self._summary
+    
+    @metrics.timed("analyze_expenses")
+    def analyze_expenses(self, data: Dict) -> str:
+        """Analyze expense data and provide insights"""
+        if "error" in data:
+            return f"I couldn't fetch your expense data: {data['error']}"
+        
+        if not data:
+            return "You don't have any expenses recorded yet. Start by adding some expenses to get insights!"
+        
+        return self.get_summary(data).markdown
+    
+    def needs_history(self, message: str) -> bool:
+        """Whether a question compares years and so needs more than the selected year"""
+        from expense_history import is_multi_year_question
+        
+        return is_multi_year_question(message)
+    
+    @metrics.timed("get_expense_history")
+    def get_expense_history(self, token: str, years) -> Optional['ExpenseHistory']:
+        """Fetch several years concurrently and merge them into one history, reused until any year changes"""
+        from expense_history import build_history, fetch_years
+        
+        payloads, errors = fetch_years(self.backend, token, years)
+        for year, error in errors.items():
+            logger.warning("Could not load expenses for %s: %s", year, error)
+        if not payloads:
+            return None
+        
+        # Holding the payloads keeps them alive, so identity is a safe test for "unchanged"
+        sources = sorted(payloads.items())
+        if not self._same_sources(sources):
+            self._history = build_history(payloads)
+            self._history_sources = sources
+        return self._history
+    
+    def _same_sources(self, sources: List[Tuple[int, Any]]) -> bool:
+        previous = self._history_sources
+        return (previous is not None and len(previous) == len(sources)
+                and all(year == old_year and payload is old_payload
+                        for (year, payload), (old_year, old_payload) in zip(sources, previous)))
+    
+    def expense_context(self, message: str, token: Optional[str], year: int,
+                        years) -> Tuple[Optional[Dict], Optional['ExpenseHistory']]:
+        """The expense data a chat turn needs: the selected year, plus every year for year-over-year questions"""
+        if not token:
+            return None, None
+        expense_data = self.get_expense_data(token, year)
+        history = self.get_expense_history(token, years) if self.needs_history(message) else None
+        return expense_data, history
+    
+    def create_history_visualization(self, history: 'ExpenseHistory') -> Optional[Any]:
+        """Monthly spend per year, one line per year"""
+        if history is None or history.empty:
+            return None
+        
+        import plotly.express as px
+        
+        return px.line(history.trend_frame(), x='Month', y='Amount', color='Year',
+                       title='Monthly Expenses by Year',
+                       labels={'Month': 'Month', 'Amount': 'Amount (₹)'})
+    
+    def generate_expense_advice(self, query: str, user_type: str, expense_data: Dict = None,
+                                history: Optional['ExpenseHistory'] = None) -> str:
+        """Generate contextual advice using Hugging Face AI (primary) with Groq and IBM Watson as fallbacks"""
+        return "".join(self.stream_expense_advice(query, user_type, expense_data, history))
+    
+    def stream_expense_advice(self, query: str, user_type: str, expense_data: Dict = None,
+                              history: Optional['ExpenseHistory'] = None) -> Iterator[str]:
+        """Stream contextual advice, falling back to the next AI service if one fails before answering"""
+        
+        # Create context from expense data
+        context = ""
+        if expense_data and "error" not in expense_data:
+            context = self.analyze_expenses(expense_data)
+        if history is not None and not history.empty:
+            context = f"{context}\n{history.comparison_markdown()}" if context else history.comparison_markdown()
+        
+        # Enhanced prompt with expense context
+        if context:
+            enhanced_query = f"""
+            Here's my expense data context:
+            {context}
+            
+            My question: {query}
+            
+            Please provide advice considering my actual spending patterns.
+            """
+        else:
+            enhanced_query = query
+        
+        # Repeated questions against the same expense data and conversation reuse the earlier answer
+        cache_context = f"{context}\x1e{self.memory.fingerprint()}" if self.memory else context
+        cached = response_cache.get(query, user_type, cache_context)
+        if cached is not None:
+            self.last_stream_stats = {"provider": "cache", "ttft": 0.0, "total": 0.0}
+            metrics.observe("generation", 0.0, "cache")
+            self.memory.add_turn(query, cached)
+            yield cached
+            return
+        
+        # Earlier turns, packed to each model's token budget; the local model counts with its own tokenizer
+        hf_budget = self.huggingface_memory_budget(enhanced_query, user_type)
+        hf_history = self.memory.pack(hf_budget or 0, self.hf_token_counter)
+        groq_history = self.memory.pack(MEMORY_BUDGETS["groq"])
+        watson_history = self.memory.pack(MEMORY_BUDGETS["watson"])
+        
+        # Hugging Face first (primary service), then Groq, then IBM Watson. Fallbacks are
+        # hedged: each starts after PROVIDER_HEDGE_DELAY or as soon as the previous one fails
+        providers = []
+        if self.hf_pipeline and hf_budget is None:
+            logger.info("Prompt does not fit the local model's context window, skipping Hugging Face")
+        if self.hf_pipeline and hf_budget is not None:
+            hf_cancelled = Event()
+            providers.append(Provider("huggingface", lambda: self.stream_huggingface_response(enhanced_query, user_type, hf_history, hf_cancelled),
+                                      DEFAULT_DEADLINES["huggingface"], cancelled=hf_cancelled))
+        if self.groq_client:
+            providers.append(Provider("groq", lambda: self.stream_groq_response(enhanced_query, user_type, groq_history),
+                                      DEFAULT_DEADLINES["groq"]))
+        if self.model:
+            providers.append(Provider("watson", lambda: self.stream_watson_response(query, user_type, context, watson_history),
+                                      DEFAULT_DEADLINES["watson"]))
+        
+        if not providers:
+            yield """I'm sorry, but all AI services are currently unavailable. 
+            However, I can still help you with basic expense tracking and analysis. 
+            Please make sure to configure your API keys in the .env file:
+            - HUGGINGFACE_TOKEN for Hugging Face AI responses (primary)
+            - GROQ_API_KEY for fast Groq AI responses (fallback)
+            - IBM_WATSONX_API_KEY for IBM Watson fallback"""
+            return
+        
+        orchestrator = ProviderOrchestrator(
+            hedge_delay=PROVIDER_HEDGE_DELAY,
+            on_failure=lambda name, error: self.notify("warning", f"{PROVIDER_LABELS[name]} failed, trying the next AI service: {str(error)}"),
+            breakers=breakers,
+        )
+        started = time.perf_counter()
+        first_token_at = None
+        winner = None
+        chunks = []
+        try:
+            for name, chunk in orchestrator.stream(providers):
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    winner = name
+                    self.last_stream_stats = {"provider": name, "ttft": first_token_at - started}
+                    metrics.observe("first_token", first_token_at - started, name)
+                    logger.info("%s won the race, time to first token: %.3fs", name, first_token_at - started)
+                chunks.append(chunk)
+                yield chunk
+        except AllProvidersFailed as e:
+            metrics.observe("generation_failed", time.perf_counter() - started)
+            yield f"I encountered an error while generating advice: {str(e)}"
+            return
+        except Exception as e:
+            # Text is already on screen, so finish this answer instead of switching services
+            yield f"\n\n⚠️ The response was interrupted: {str(e)}"
+            return
+        
+        total = time.perf_counter() - started
+        self.last_stream_stats = {**self.last_stream_stats, "total": total}
+        metrics.observe("generation", total, winner)
+        logger.info("%s streamed response in %.3fs", winner, total)
+        response = "".join(chunks)
+        response_cache.set(query, user_type, cache_context, response)
+        self.memory.add_turn(query, response)
+    
+    def stream_watson_response(self, query: str, user_type: str = "general", context: str = "",
+                               history: str = "") -> Iterator[str]:
+        """Stream an IBM Watson Granite response; raises on failure"""
+        template = get_template("watson", user_type)
+        
+        for chunk in self.model.generate_text_stream(prompt=template.render(query, context, history)):
+            if chunk:
+                yield chunk
+    
+    def create_expense_visualization(self, data: Dict) -> Optional[Any]:
+        """Create visualizations for expense data"""
+        summary = self.get_summary(data)
+        if summary is None or summary.empty:
+            return None
+        
+        import plotly.express as px
+        
+        # Monthly totals come from the same summary as the text insights
+        df = summary.monthly_frame()
+        
+        # Create line chart
+        fig = px.line(df, x='Month', y='Amount', 
+                     title='Monthly Expense Trend',
+                     labels={'Month': 'Month', 'Amount': 'Amount (₹)'})
+        
+        return fig
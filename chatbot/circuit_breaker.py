@@ -0,0 +1,150 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised in place of calling a provider whose breaker is open"""
+
+
+def percentile(values, fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a rolling window of recent calls"""
+
+    def __init__(self, name: str, window_size: int = 20, min_calls: int = 5,
+                 error_threshold: float = 0.5, open_seconds: float = 30.0,
+                 slow_call_seconds: Optional[float] = None, half_open_max_calls: int = 1,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.open_seconds = open_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        # (succeeded, latency seconds) for the most recent calls
+        self._window: Deque[Tuple[bool, float]] = deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._last_error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._half_open_in_flight = 0
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; half-open admits a limited number of trial calls"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+            return False
+
+    def release(self):
+        """Give back a call slot when the call was cancelled without an outcome"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._half_open_in_flight:
+                self._half_open_in_flight -= 1
+
+    def record_success(self, latency: float):
+        if self.slow_call_seconds is not None and latency > self.slow_call_seconds:
+            self.record_failure(latency, f"slow call ({latency:.1f}s)")
+            return
+        with self._lock:
+            self._window.append((True, latency))
+            if self._current_state() == HALF_OPEN:
+                # The trial call worked: start over with a clean window
+                self._state = CLOSED
+                self._window.clear()
+                self._window.append((True, latency))
+
+    def record_failure(self, latency: float, error: Any = None):
+        with self._lock:
+            self._window.append((False, latency))
+            self._last_error = None if error is None else str(error)
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._trip()
+            elif state == CLOSED and len(self._window) >= self.min_calls and self._error_rate() >= self.error_threshold:
+                self._trip()
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._half_open_in_flight = 0
+
+    def _error_rate(self) -> float:
+        if not self._window:
+            return 0.0
+        return sum(1 for ok, _ in self._window if not ok) / len(self._window)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Health of this provider for dashboards"""
+        with self._lock:
+            state = self._current_state()
+            latencies = [latency for _, latency in self._window]
+            return {
+                "state": state,
+                "calls": len(self._window),
+                "error_rate": self._error_rate(),
+                "p50_latency": percentile(latencies, 0.5),
+                "p95_latency": percentile(latencies, 0.95),
+                "last_error": self._last_error,
+                "retry_in": max(0.0, self.open_seconds - (self._clock() - self._opened_at)) if state == OPEN else 0.0,
+            }
+
+
+class BreakerBoard:
+    """One circuit breaker per provider, created on first use"""
+
+    def __init__(self, **breaker_options):
+        self._options = breaker_options
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(name, **self._options)
+                self._breakers[name] = breaker
+            return breaker
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.snapshot() for name, breaker in breakers.items()}
+
+
+# Shared by every session so one user's failures protect everyone else
+breakers = BreakerBoard(
+    window_size=int(os.getenv('BREAKER_WINDOW', '20')),
+    min_calls=int(os.getenv('BREAKER_MIN_CALLS', '5')),
+    error_threshold=float(os.getenv('BREAKER_ERROR_THRESHOLD', '0.5')),
+    open_seconds=float(os.getenv('BREAKER_OPEN_SECONDS', '30')),
+)
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List
+
+# Tokens of conversation history each provider may receive on top of its prompt
+MEMORY_BUDGETS = {
+    "huggingface": int(os.getenv('MEMORY_TOKENS_HF', '256')),
+    "groq": int(os.getenv('MEMORY_TOKENS_GROQ', '2000')),
+    "watson": int(os.getenv('MEMORY_TOKENS_WATSON', '1000')),
+}
+MEMORY_RECENT_TURNS = int(os.getenv('MEMORY_RECENT_TURNS', '4'))
+MEMORY_SUMMARY_LINES = int(os.getenv('MEMORY_SUMMARY_LINES', '20'))
+
+SUMMARY_CLIP = 160
+
+
+def approximate_tokens(text: str) -> int:
+    """Rough token count for models without a local tokenizer (about four characters per token)"""
+    return max(1, len(text) // 4) if text else 0
+
+
+def token_counter(tokenizer: Any = None) -> Callable[[str], int]:
+    """Count tokens with a model's own tokenizer, or approximately when there is none"""
+    if tokenizer is None:
+        return approximate_tokens
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+
+
+def first_sentence(text: str, limit: int = SUMMARY_CLIP) -> str:
+    text = ' '.join(re.sub(r'[*_#>`]+', '', text).split())
+    match = re.match(r'(.+?[.!?])(\s|$)', text)
+    sentence = match.group(1) if match else text
+    return sentence if len(sentence) <= limit else sentence[:limit - 1].rstrip() + "…"
+
+
+def summarize_turn(user: str, assistant: str) -> str:
+    """One line per older turn: cheap, extractive, and no extra model call"""
+    return f"- Asked: {first_sentence(user)} → Answered: {first_sentence(assistant)}"
+
+
+@dataclass
+class Turn:
+    user: str
+    assistant: str
+    # Token counts per counter, so each turn is tokenized once per model
+    _tokens: Dict[int, int] = field(default_factory=dict, repr=False)
+
+    @property
+    def text(self) -> str:
+        return f"User: {self.user}\nAssistant: {self.assistant}"
+
+    def tokens(self, counter: Callable[[str], int]) -> int:
+        key = id(counter)
+        if key not in self._tokens:
+            self._tokens[key] = counter(self.text)
+        return self._tokens[key]
+
+
+class ConversationMemory:
+    """A session's conversation: the last few turns verbatim and older turns as one-line summaries.
+
+    Both parts are bounded, so memory per session stays constant however long the
+    chat runs. pack() fits as much of it as a model's token budget allows.
+    """
+
+    def __init__(self, recent_turns: int = MEMORY_RECENT_TURNS, summary_lines: int = MEMORY_SUMMARY_LINES,
+                 summarizer: Callable[[str, str], str] = summarize_turn):
+        self.recent: Deque[Turn] = deque(maxlen=recent_turns)
+        self.summary: Deque[str] = deque(maxlen=summary_lines)
+        self.summarizer = summarizer
+        self.turns = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.recent or self.summary)
+
+    def add_turn(self, user: str, assistant: str):
+        if self.recent.maxlen and len(self.recent) == self.recent.maxlen:
+            oldest = self.recent[0]
+            self.summary.append(self.summarizer(oldest.user, oldest.assistant))
+        self.recent.append(Turn(user.strip(), assistant.strip()))
+        self.turns += 1
+
+    def clear(self):
+        self.recent.clear()
+        self.summary.clear()
+        self.turns = 0
+
+    def state(self) -> Dict[str, Any]:
+        """The conversation as plain JSON data, for keeping it outside this process"""
+        return {"recent": [[turn.user, turn.assistant] for turn in self.recent],
+                "summary": list(self.summary), "turns": self.turns}
+
+    def restore(self, state: Dict[str, Any]):
+        """Replace the conversation with one saved by state()"""
+        self.clear()
+        self.recent.extend(Turn(user, assistant) for user, assistant in state.get("recent", []))
+        self.summary.extend(state.get("summary", []))
+        self.turns = state.get("turns", len(self.recent))
+
+    def fingerprint(self) -> str:
+        """Changes whenever the remembered conversation does; empty when there is none"""
+        if not self:
+            return ""
+        digest = hashlib.sha256()
+        for line in self.summary:
+            digest.update(line.encode('utf-8'))
+        for turn in self.recent:
+            digest.update(turn.text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def pack(self, budget: int, counter: Callable[[str], int] = approximate_tokens) -> str:
+        """The conversation so far, filled newest first until `budget` tokens are used.
+
+        Recent turns go in verbatim, or as their one-line summary when they are too
+        long to fit; summaries of older turns fill whatever is left. Returns a block
+        ready to place before the user's question, or "".
+        """
+        if not self or budget <= 0:
+            return ""
+
+        used = counter("Conversation so far:\n")
+        lines: List[str] = []
+        full = False
+        for turn in reversed(self.recent):
+            text, cost = turn.text, turn.tokens(counter)
+            if used + cost > budget:
+                text = self.summarizer(turn.user, turn.assistant)
+                cost = counter(text)
+            if used + cost > budget:
+                full = True
+                break
+            lines.append(text)
+            used += cost
+
+        if not full:
+            for line in reversed(self.summary):
+                cost = counter(line)
+                if used + cost > budget:
+                    break
+                lines.append(line)
+                used += cost
+
+        if not lines:
+            return ""
+        return "Conversation so far:\n" + "\n".join(reversed(lines)) + "\n\n"
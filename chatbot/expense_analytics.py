@@ -0,0 +1,135 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from categorizer import KeywordCategorizer, default_categorizer
+
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+               'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+class ExpenseAnalytics:
+    """Columnar view of an annual expense payload with vectorized aggregates"""
+
+    def __init__(self, frame: pd.DataFrame, months: List[int]):
+        self.frame = frame
+        # Months present in the payload, including ones with no expenses
+        self.months = months
+
+    @property
+    def categories(self) -> List[str]:
+        return list(self.frame['category'].cat.categories)
+
+    @classmethod
+    def from_payload(cls, data: Dict[str, Any],
+                     categorizer: KeywordCategorizer = default_categorizer) -> 'ExpenseAnalytics':
+        """Load a `{month: [expense, ...]}` payload into a single DataFrame"""
+        months: List[int] = []
+        counts: List[int] = []
+        names: List[str] = []
+        amounts: List[Any] = []
+
+        for month_key, expenses in data.items():
+            if not isinstance(expenses, list):
+                continue
+            months.append(int(month_key))
+            counts.append(len(expenses))
+            names.extend([expense.get('name', '') or '' for expense in expenses])
+            amounts.extend([expense.get('amount', 0) for expense in expenses])
+
+        # Missing or malformed amounts count as zero
+        try:
+            amount_column = np.asarray(amounts, dtype=np.float64)
+        except (TypeError, ValueError):
+            amount_column = pd.to_numeric(pd.Series(amounts, dtype=object), errors='coerce').to_numpy(np.float64)
+        amount_column = np.nan_to_num(amount_column, nan=0.0)
+
+        # Expense names repeat heavily, so categorize each distinct name once
+        name_codes, unique_names = pd.factorize(np.asarray(names, dtype=object))
+        unique_categories = categorizer.category_codes(unique_names)
+        category_codes = unique_categories[name_codes] if len(name_codes) else np.array([], dtype=np.int16)
+
+        frame = pd.DataFrame({
+            'month': np.repeat(np.asarray(months, dtype=np.int16), counts),
+            'name': np.asarray(names, dtype=object),
+            'amount': amount_column,
+            'category': pd.Categorical.from_codes(category_codes, categories=categorizer.categories),
+        })
+        return cls(frame, months)
+
+    @property
+    def empty(self) -> bool:
+        return not self.months
+
+    @property
+    def total(self) -> float:
+        return float(self.frame['amount'].sum())
+
+    def category_totals(self) -> pd.Series:
+        """Spend per category that has expenses, largest first"""
+        categories = self.categories
+        codes = self.frame['category'].cat.codes.to_numpy()
+        totals = np.bincount(codes, weights=self.frame['amount'].to_numpy(), minlength=len(categories))
+        present = np.bincount(codes, minlength=len(categories)) > 0
+        series = pd.Series(totals[present], index=np.asarray(categories, dtype=object)[present])
+        return series.sort_values(ascending=False, kind='stable')
+
+    def category_percentages(self) -> pd.Series:
+        totals = self.category_totals()
+        total = self.total
+        if total <= 0:
+            return totals * 0.0
+        return totals / total * 100
+
+    def monthly_totals(self) -> pd.Series:
+        """Spend per month for every month in the payload, in month order"""
+        months = sorted(self.months)
+        if not months:
+            return pd.Series(dtype=np.float64)
+        totals = np.bincount(self.frame['month'].to_numpy(), weights=self.frame['amount'].to_numpy(),
+                             minlength=max(months) + 1)
+        return pd.Series(totals[months], index=months)
+
+    def top_expenses(self, n: int = 5) -> pd.DataFrame:
+        """The n largest individual expenses"""
+        return self.frame.nlargest(n, 'amount')
+
+    def monthly_frame(self) -> pd.DataFrame:
+        """Month/Amount frame for the trend chart"""
+        totals = self.monthly_totals()
+        return pd.DataFrame({'Month': totals.index.astype(int), 'Amount': totals.to_numpy()})
+
+    def insights_markdown(self, top_n: int = 3) -> str:
+        """Render the text insights shown in chat and injected into prompts"""
+        total = self.total
+        insights = f"💰 **Total Expenses**: ₹{total:.2f}\n\n"
+
+        categories = self.category_totals()
+        if not categories.empty:
+            insights += "📊 **Expense Categories**:\n"
+            percentages = self.category_percentages()
+            for category, amount in categories.items():
+                insights += f"- {category}: ₹{amount:.2f} ({percentages[category]:.1f}%)\n"
+
+        monthly = self.monthly_totals()
+        if len(monthly) > 1:
+            insights += "\n📈 **Monthly Spending Pattern**:\n"
+            for month_num, amount in monthly.items():
+                if month_num < len(MONTH_NAMES):
+                    insights += f"- {MONTH_NAMES[month_num]}: ₹{amount:.2f}\n"
+
+        if top_n and len(self.frame):
+            insights += "\n🔝 **Largest Expenses**:\n"
+            for row in self.top_expenses(top_n).itertuples(index=False):
+                month_label = MONTH_NAMES[row.month] if row.month < len(MONTH_NAMES) else row.month
+                insights += f"- {row.name or 'Unnamed'} ({month_label}): ₹{row.amount:.2f}\n"
+
+        return insights
+
+
+def build_analytics(data: Optional[Dict[str, Any]],
+                    categorizer: KeywordCategorizer = default_categorizer) -> Optional[ExpenseAnalytics]:
+    """Build the analytics engine for a payload, or None when there is nothing to analyze"""
+    if not data or "error" in data:
+        return None
+    return ExpenseAnalytics.from_payload(data, categorizer)
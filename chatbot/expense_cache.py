@@ -0,0 +1,171 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from shared_cache import SharedCache, shared_cache
+
+CacheKey = Tuple[str, int, Optional[int]]
+
+
+def hash_token(token: str) -> str:
+    """Hash an auth token so raw credentials never sit in the cache"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class TTLLRUCache:
+    """Thread-safe LRU cache with a per-entry time to live and hit/miss counters"""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_item(self, key: Hashable) -> Optional[Any]:
+        """Return a fresh cached value, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set_item(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a value, evicting the least recently used entries when full"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def remove_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches; returns how many were removed"""
+        with self._lock:
+            stale: List[Hashable] = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def keys(self) -> List[Hashable]:
+        """Keys currently held, oldest first; expired entries may still be listed"""
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class ExpenseDataCache(TTLLRUCache):
+    """Bounded LRU cache of backend expense payloads keyed by token hash, year and month.
+
+    With a `shared` cache behind it, payloads fetched by other worker processes
+    are found there on a local miss. Local copies are stamped with the user's
+    shared generation and dropped once another process invalidates that user.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic, shared: Optional[SharedCache] = None):
+        super().__init__(max_entries, ttl_seconds, clock)
+        self.shared = shared
+
+    @staticmethod
+    def make_key(token: str, year: int, month: Optional[int] = None) -> CacheKey:
+        return (hash_token(token), int(year), None if month is None else int(month))
+
+    def _generation(self, token_hash: str) -> Optional[int]:
+        # None without a shared cache, or when it cannot be read; local copies are then trusted
+        return None if self.shared is None else self.shared.generation(token_hash)
+
+    def get(self, token: str, year: int, month: Optional[int] = None) -> Optional[Any]:
+        """Return a fresh cached payload, or None on a miss"""
+        key = self.make_key(token, year, month)
+        generation = self._generation(key[0])
+        local = self.get_item(key)
+        if local is not None:
+            seen, data = local
+            if generation is None or seen == generation:
+                return data
+            # Another worker invalidated this user after the copy was made
+            self.remove_where(lambda cached: cached == key)
+        if self.shared is not None:
+            found = self.shared.get_with_age(key)
+            if found is not None:
+                data, age = found
+                # Expire locally when the shared copy does
+                self.set_item(key, (generation, data), max(0.0, self.ttl_seconds - age))
+                return data
+        return None
+
+    def set(self, token: str, year: int, month: Optional[int], data: Any,
+            ttl_seconds: Optional[float] = None):
+        """Store a payload for a user, year and optional month"""
+        key = self.make_key(token, year, month)
+        self.set_item(key, (self._generation(key[0]), data), ttl_seconds)
+        if self.shared is not None:
+            self.shared.set_item(key, data, ttl_seconds)
+
+    def invalidate(self, token: str, year: Optional[int] = None, month: Optional[int] = None) -> int:
+        """Drop cached payloads for a user after an add or delete.
+
+        Invalidating a month also drops that year's annual payload, since the
+        annual view contains it. Returns the number of entries removed.
+        """
+        token_hash = hash_token(token)
+
+        def matches(key: CacheKey) -> bool:
+            return (key[0] == token_hash
+                    and (year is None or key[1] == int(year))
+                    and (month is None or key[2] is None or key[2] == int(month)))
+
+        removed = self.remove_where(matches)
+        if self.shared is not None:
+            removed += self.shared.remove_where(matches)
+            # After the shared copies are gone, so a worker that notices never reloads them
+            self.shared.bump_generation(token_hash)
+        return removed
+
+
+# Shared by every session in the process, and by every worker when SHARED_CACHE_DB is set;
+# entries are keyed by token hash
+expense_cache = ExpenseDataCache(
+    max_entries=int(os.getenv('EXPENSE_CACHE_SIZE', '256')),
+    ttl_seconds=float(os.getenv('EXPENSE_CACHE_TTL', '60')),
+    shared=shared_cache("expenses", max_entries=int(os.getenv('EXPENSE_CACHE_SIZE', '256')),
+                        ttl_seconds=float(os.getenv('EXPENSE_CACHE_TTL', '60'))),
+)
@@ -0,0 +1,138 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend_client import BackendClient
+from categorizer import KeywordCategorizer, default_categorizer
+from expense_analytics import MONTH_NAMES, ExpenseAnalytics
+from expense_sync import IncrementalExpenseSync, SyncError, expense_sync
+
+HISTORY_MAX_WORKERS = int(os.getenv('HISTORY_MAX_WORKERS', '4'))
+
+# Questions that need more than the selected year
+MULTI_YEAR_PATTERN = re.compile(
+    r"year[\s-]*over[\s-]*year|\byoy\b|last year|previous year|past years|over the years|"
+    r"compared? (?:to|with) (?:last|previous|\d{4})|\b(?:19|20)\d{2}\s*(?:vs\.?|versus|and|to)\s*(?:19|20)\d{2}",
+    re.IGNORECASE,
+)
+
+
+def is_multi_year_question(message: str) -> bool:
+    return bool(MULTI_YEAR_PATTERN.search(message))
+
+
+def fetch_years(backend: BackendClient, token: str, years: Iterable[int],
+                max_workers: int = HISTORY_MAX_WORKERS,
+                sync: IncrementalExpenseSync = expense_sync) -> Tuple[Dict[int, Dict[str, Any]], Dict[int, str]]:
+    """Sync several years concurrently, at most max_workers requests in flight.
+
+    Returns ({year: payload}, {year: error}); a failed year does not fail the others.
+    """
+    years = sorted(set(int(year) for year in years))
+    payloads: Dict[int, Dict[str, Any]] = {}
+    errors: Dict[int, str] = {}
+    if not years:
+        return payloads, errors
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(years))),
+                            thread_name_prefix="history-fetch") as pool:
+        futures = {year: pool.submit(sync.sync, backend, token, year) for year in years}
+        for year, future in futures.items():
+            try:
+                payloads[year] = future.result().payload()
+            except SyncError as e:
+                errors[year] = str(e)
+            except Exception as e:
+                errors[year] = f"API call failed: {str(e)}"
+    return payloads, errors
+
+
+class ExpenseHistory:
+    """Several years of expenses in one columnar frame, for year-over-year comparisons"""
+
+    def __init__(self, frame: pd.DataFrame, years: List[int]):
+        self.frame = frame
+        self.years = years
+
+    @classmethod
+    def from_payloads(cls, payloads: Dict[int, Dict[str, Any]],
+                      categorizer: KeywordCategorizer = default_categorizer) -> 'ExpenseHistory':
+        frames = []
+        for year, payload in sorted(payloads.items()):
+            frame = ExpenseAnalytics.from_payload(payload, categorizer).frame
+            frames.append(frame.assign(year=np.full(len(frame), year, dtype=np.int16)))
+        if frames:
+            frame = pd.concat(frames, ignore_index=True)
+        else:
+            frame = pd.DataFrame({'year': np.array([], dtype=np.int16), 'month': np.array([], dtype=np.int16),
+                                  'name': np.array([], dtype=object), 'amount': np.array([], dtype=np.float64),
+                                  'category': pd.Categorical([], categories=categorizer.categories)})
+        return cls(frame, sorted(payloads))
+
+    @property
+    def empty(self) -> bool:
+        return self.frame.empty
+
+    def yearly_totals(self) -> pd.Series:
+        """Spend per year, including years with no expenses"""
+        totals = self.frame.groupby('year', observed=True)['amount'].sum()
+        return totals.reindex(self.years, fill_value=0.0)
+
+    def year_over_year(self) -> pd.Series:
+        """Percentage change of each year's total against the year before"""
+        totals = self.yearly_totals()
+        previous = totals.shift(1).replace(0.0, np.nan)
+        return (totals - previous) / previous * 100
+
+    def monthly_matrix(self) -> pd.DataFrame:
+        """Year x month spend, zero where a month had no expenses"""
+        matrix = self.frame.pivot_table(index='year', columns='month', values='amount', aggfunc='sum', fill_value=0.0)
+        return matrix.reindex(index=self.years, columns=range(12), fill_value=0.0)
+
+    def category_by_year(self) -> pd.DataFrame:
+        """Year x category spend"""
+        table = self.frame.pivot_table(index='year', columns='category', values='amount',
+                                       aggfunc='sum', fill_value=0.0, observed=True)
+        return table.reindex(index=self.years, fill_value=0.0)
+
+    def trend_frame(self) -> pd.DataFrame:
+        """Year/Month/Amount frame for a multi-year trend chart"""
+        matrix = self.monthly_matrix()
+        return pd.DataFrame({
+            'Year': np.repeat(matrix.index.astype(str), 12),
+            'Month': np.tile([MONTH_NAMES[m] for m in range(12)], len(matrix)),
+            'Amount': matrix.to_numpy().ravel(),
+        })
+
+    def comparison_markdown(self) -> str:
+        """Render the year-over-year comparison shown in chat and injected into prompts"""
+        totals = self.yearly_totals()
+        changes = self.year_over_year()
+        insights = "📅 **Year-over-Year Spending**:\n"
+        # A year that failed to load is missing, so compare against the previous year actually held
+        previous_year = None
+        for year, amount in totals.items():
+            change = changes[year]
+            trend = "" if np.isnan(change) else f" ({change:+.1f}% vs {previous_year})"
+            insights += f"- {year}: ₹{amount:.2f}{trend}\n"
+            previous_year = year
+
+        categories = self.category_by_year()
+        active = [year for year in self.years if totals[year] > 0]
+        if len(active) >= 2 and not categories.empty:
+            first, last = active[0], active[-1]
+            insights += f"\n📊 **Category Changes ({first} → {last})**:\n"
+            delta = (categories.loc[last] - categories.loc[first]).sort_values(key=np.abs, ascending=False)
+            for category, amount in delta.items():
+                if amount:
+                    insights += f"- {category}: ₹{categories.loc[first, category]:.2f} → ₹{categories.loc[last, category]:.2f} ({amount:+.2f})\n"
+        return insights
+
+
+def build_history(payloads: Dict[int, Dict[str, Any]],
+                  categorizer: KeywordCategorizer = default_categorizer) -> ExpenseHistory:
+    return ExpenseHistory.from_payloads(payloads, categorizer)
@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from categorizer import KeywordCategorizer, default_categorizer
+from expense_analytics import ExpenseAnalytics, build_analytics
+
+
+@dataclass(frozen=True)
+class ExpenseSummary:
+    """Compact, render-once digest of one version of a user's expenses.
+
+    Holds only the aggregates and the markdown that prompts and charts need, so
+    the per-expense frame can be dropped once the summary is built.
+    """
+    total: float
+    expense_count: int
+    categories: Tuple[str, ...]
+    category_totals: np.ndarray
+    months: Tuple[int, ...]
+    monthly_totals: np.ndarray
+    markdown: str
+
+    @classmethod
+    def from_analytics(cls, analytics: ExpenseAnalytics) -> 'ExpenseSummary':
+        categories = tuple(analytics.categories)
+        category_totals = analytics.category_totals().reindex(categories, fill_value=0.0).to_numpy()
+        monthly = analytics.monthly_totals()
+        return cls(
+            total=analytics.total,
+            expense_count=len(analytics.frame),
+            categories=categories,
+            category_totals=category_totals,
+            months=tuple(int(month) for month in monthly.index),
+            monthly_totals=monthly.to_numpy(dtype=np.float64),
+            markdown=analytics.insights_markdown(),
+        )
+
+    @property
+    def empty(self) -> bool:
+        return not self.months
+
+    def category_breakdown(self) -> Dict[str, float]:
+        """Spend per category that has expenses"""
+        return {category: float(amount) for category, amount in zip(self.categories, self.category_totals)
+                if amount}
+
+    def monthly_frame(self) -> pd.DataFrame:
+        """Month/Amount frame for the trend chart"""
+        return pd.DataFrame({'Month': np.asarray(self.months, dtype=int), 'Amount': self.monthly_totals})
+
+
+def build_summary(data: Optional[Dict[str, Any]],
+                  categorizer: KeywordCategorizer = default_categorizer) -> Optional[ExpenseSummary]:
+    """Summarize a payload, or None when there is nothing to summarize"""
+    analytics = build_analytics(data, categorizer)
+    if analytics is None:
+        return None
+    return ExpenseSummary.from_analytics(analytics)
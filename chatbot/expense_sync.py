@@ -0,0 +1,360 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend_client import BackendClient
+from categorizer import KeywordCategorizer, default_categorizer
+from expense_cache import TTLLRUCache, hash_token
+from shared_cache import SharedCache, shared_cache
+
+logger = logging.getLogger("expense_chatbot")
+
+SnapshotKey = Tuple[str, str, int]
+
+
+class SyncError(Exception):
+    """Raised when the backend cannot provide a user's expenses and nothing is cached"""
+
+
+def _coerce_amount(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def month_digest(expenses: List[Dict[str, Any]]) -> str:
+    """Fingerprint of a month's expenses, independent of which endpoint delivered them"""
+    return hashlib.sha256(json.dumps(expenses, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class MonthEntry:
+    """One month of a user's expenses plus its precomputed aggregates"""
+    expenses: List[Dict[str, Any]]
+    digest: str
+    fetched_at: float
+    total: float
+    category_totals: np.ndarray
+    stale: bool = False
+
+
+class ExpenseSnapshot:
+    """A user's year held month by month, with a yearly aggregate kept current as months change.
+
+    `version` only moves when a month's contents actually change, so anything
+    derived from the snapshot can be reused until then.
+    """
+
+    def __init__(self, year: int, categories: List[str]):
+        self.year = year
+        self.categories = list(categories)
+        self.months: Dict[int, MonthEntry] = {}
+        self.version = 0
+        self.monthly_totals = np.zeros(12)
+        self.category_totals = np.zeros(len(self.categories))
+        self.lock = threading.Lock()
+        # The user's shared invalidation generation when the snapshot was last synced
+        self.generation: Optional[int] = None
+        self._payload: Optional[Dict[str, List[Dict[str, Any]]]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self.months)
+
+    @property
+    def total(self) -> float:
+        return float(self.monthly_totals.sum())
+
+    def apply(self, month: int, entry: MonthEntry) -> bool:
+        """Merge a freshly fetched month; returns whether anything changed"""
+        current = self.months.get(month)
+        if current is not None and current.digest == entry.digest:
+            current.fetched_at = entry.fetched_at
+            current.stale = False
+            return False
+
+        self.months[month] = entry
+        self.monthly_totals[month] = entry.total
+        self.category_totals = np.sum([m.category_totals for m in self.months.values()], axis=0)
+        self.version += 1
+        self._payload = None
+        return True
+
+    def payload(self) -> Dict[str, List[Dict[str, Any]]]:
+        """The snapshot in the annual endpoint's `{month: [expense, ...]}` shape.
+
+        The same dict is returned until a month changes, so callers can memoize on it.
+        """
+        if self._payload is None:
+            self._payload = {str(month): entry.expenses
+                             for month, entry in sorted(self.months.items()) if entry.expenses}
+        return self._payload
+
+    def category_breakdown(self) -> Dict[str, float]:
+        return {category: float(amount) for category, amount in zip(self.categories, self.category_totals)
+                if amount}
+
+
+class IncrementalExpenseSync:
+    """Keeps per-user expense snapshots current by re-fetching only the months that may have changed.
+
+    The first sync of a year loads it with one annual request. Later syncs refresh
+    the current month once it is older than `current_month_ttl` and past months
+    once they are older than `past_month_ttl`; future months are only fetched again
+    when invalidated or with the rest of the year. A few stale months go through
+    the month endpoint, but past months expire together, so when more than
+    `max_month_requests` are due the year is reloaded with one annual request.
+
+    With a `shared` cache, every fetched month is published for other worker
+    processes, and a month another worker fetched recently is taken from there
+    instead of the backend. Invalidating a user bumps their shared generation,
+    and a snapshot synced at an older generation treats every month as stale.
+    """
+
+    def __init__(self, max_snapshots: int = 64, current_month_ttl: float = 60.0,
+                 past_month_ttl: float = 3600.0, max_month_requests: int = 3, categorizer: KeywordCategorizer = default_categorizer,
+                 clock: Callable[[], float] = time.monotonic, today: Callable[[], date] = date.today,
+                 shared: Optional[SharedCache] = None):
+        self.current_month_ttl = current_month_ttl
+        self.past_month_ttl = past_month_ttl
+        self.max_month_requests = max_month_requests
+        self.categorizer = categorizer
+        self._clock = clock
+        self._today = today
+        self._snapshots = TTLLRUCache(max_entries=max_snapshots, ttl_seconds=24 * 3600, clock=clock)
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.bytes_received = 0
+        self.full_loads = 0
+        self.months_refreshed = 0
+        self.months_changed = 0
+        self.parse_seconds = 0.0
+        self.shared_months = 0
+
+    @staticmethod
+    def make_key(backend: BackendClient, token: str, year: int) -> SnapshotKey:
+        return (backend.base_url, hash_token(token), int(year))
+
+    def _snapshot(self, key: SnapshotKey) -> ExpenseSnapshot:
+        with self._lock:
+            snapshot = self._snapshots.get_item(key)
+            if snapshot is None:
+                snapshot = ExpenseSnapshot(key[2], self.categorizer.categories)
+                self._snapshots.set_item(key, snapshot)
+            return snapshot
+
+    def sync(self, backend: BackendClient, token: str, year: int) -> ExpenseSnapshot:
+        """Bring a user's snapshot for a year up to date and return it"""
+        snapshot = self._snapshot(self.make_key(backend, token, year))
+        generation = None if self.shared is None else self.shared.generation(hash_token(token))
+        with snapshot.lock:
+            if generation is not None and generation != snapshot.generation:
+                # Another worker invalidated this user; months it kept shared are reused below
+                for entry in snapshot.months.values():
+                    entry.stale = True
+                snapshot.generation = generation
+            if not snapshot.loaded:
+                self._load_year(backend, token, snapshot)
+                return snapshot
+
+            # Months another worker fetched recently cost no request
+            due = [month for month in self._stale_months(snapshot)
+                   if not self._apply_shared(backend, token, snapshot, month)]
+            if len(due) > self.max_month_requests:
+                try:
+                    self._fetch_year(backend, token, snapshot)
+                except SyncError as e:
+                    # Keep answering from the older copy; the months stay due for a refresh
+                    logger.warning("Could not refresh %s, using cached expenses: %s", year, e)
+                return snapshot
+
+            for month in due:
+                try:
+                    self._refresh_month(backend, token, snapshot, month)
+                except SyncError as e:
+                    logger.warning("Could not refresh %s-%02d, using cached expenses: %s", year, month + 1, e)
+        return snapshot
+
+    def _month_ttl(self, year: int, month: int) -> float:
+        today = self._today()
+        # Months are zero-based, as in the backend API
+        if year == today.year and month == today.month - 1:
+            return self.current_month_ttl
+        return self.past_month_ttl
+
+    def _is_future(self, year: int, month: int) -> bool:
+        today = self._today()
+        return (year, month) > (today.year, today.month - 1)
+
+    def _stale_months(self, snapshot: ExpenseSnapshot) -> List[int]:
+        now = self._clock()
+        return [month for month in range(12)
+                if month not in snapshot.months
+                or snapshot.months[month].stale
+                or (not self._is_future(snapshot.year, month)
+                    and now - snapshot.months[month].fetched_at >= self._month_ttl(snapshot.year, month))]
+
+    def _fetch(self, backend: BackendClient, path: str, token: str) -> Any:
+        try:
+            response = backend.get(path, token)
+        except Exception as e:
+            raise SyncError(f"API call failed: {str(e)}") from e
+        if response.status_code != 200:
+            raise SyncError(f"Failed to fetch data: {response.status_code}")
+
+        started = time.perf_counter()
+        try:
+            data = response.json()
+        except ValueError as e:
+            # e.g. an HTML page from a proxy or a backend that is still waking up
+            raise SyncError("Invalid response from the expenses API") from e
+        with self._stats_lock:
+            self.requests += 1
+            self.bytes_received += len(response.content)
+            self.parse_seconds += time.perf_counter() - started
+        return data
+
+    def _entry(self, expenses: List[Dict[str, Any]], digest: Optional[str] = None, age: float = 0.0) -> MonthEntry:
+        try:
+            raw_amounts = [e.get('amount', 0) or 0 for e in expenses]
+            names = [e.get('name', '') or '' for e in expenses]
+        except AttributeError as e:
+            raise SyncError("Unexpected response from the expenses API") from e
+        # Malformed amounts count as zero, as in ExpenseAnalytics
+        try:
+            amounts = np.asarray(raw_amounts, dtype=np.float64)
+        except (TypeError, ValueError):
+            amounts = np.asarray([_coerce_amount(amount) for amount in raw_amounts], dtype=np.float64)
+        amounts = np.nan_to_num(amounts)
+        codes = self.categorizer.category_codes(names)
+        category_totals = np.bincount(codes, weights=amounts, minlength=len(self.categorizer.categories))
+        return MonthEntry(expenses, digest or month_digest(expenses), self._clock() - age,
+                          float(amounts.sum()), category_totals)
+
+    def _shared_entry(self, backend: BackendClient, token: str, year: int, month: int) -> Optional[MonthEntry]:
+        """A month another worker fetched within its TTL, or None"""
+        if self.shared is None:
+            return None
+        found = self.shared.get_with_age((backend.base_url, hash_token(token), year, month))
+        if found is None:
+            return None
+        (expenses, digest), age = found
+        return self._entry(expenses, digest, age)
+
+    def _count_shared(self, months: int):
+        with self._stats_lock:
+            self.shared_months += months
+
+    def _publish(self, backend: BackendClient, token: str, year: int, month: int, entry: MonthEntry):
+        if self.shared is not None:
+            self.shared.set_item((backend.base_url, hash_token(token), year, month),
+                                 [entry.expenses, entry.digest], self._month_ttl(year, month))
+
+    def _load_year(self, backend: BackendClient, token: str, snapshot: ExpenseSnapshot):
+        entries = [self._shared_entry(backend, token, snapshot.year, month) for month in range(12)]
+        if all(entries):
+            for month, entry in enumerate(entries):
+                snapshot.apply(month, entry)
+            self._count_shared(len(entries))
+            return
+        # Months found in the shared copy are discarded; the annual request replaces them all
+        self._fetch_year(backend, token, snapshot)
+
+    def _fetch_year(self, backend: BackendClient, token: str, snapshot: ExpenseSnapshot):
+        data = self._fetch(backend, f"/api/expenses/annual/{snapshot.year}", token)
+        if not isinstance(data, dict):
+            raise SyncError("Unexpected response from the expenses API")
+        entries = [self._entry(data.get(str(month)) if isinstance(data.get(str(month)), list) else [])
+                   for month in range(12)]
+        for month, entry in enumerate(entries):
+            snapshot.apply(month, entry)
+            self._publish(backend, token, snapshot.year, month, entry)
+        with self._stats_lock:
+            self.full_loads += 1
+
+    def _apply_shared(self, backend: BackendClient, token: str, snapshot: ExpenseSnapshot, month: int) -> bool:
+        # invalidate() clears the shared copy too, so a stale month is never served from it
+        entry = self._shared_entry(backend, token, snapshot.year, month)
+        if entry is None:
+            return False
+        self._record(snapshot, month, entry)
+        self._count_shared(1)
+        return True
+
+    def _refresh_month(self, backend: BackendClient, token: str, snapshot: ExpenseSnapshot, month: int):
+        expenses = self._fetch(backend, f"/api/expenses/{snapshot.year}/{month}", token)
+        if not isinstance(expenses, list):
+            raise SyncError("Unexpected response from the expenses API")
+        entry = self._entry(expenses)
+        self._publish(backend, token, snapshot.year, month, entry)
+        self._record(snapshot, month, entry)
+
+    def _record(self, snapshot: ExpenseSnapshot, month: int, entry: MonthEntry):
+        changed = snapshot.apply(month, entry)
+        with self._stats_lock:
+            self.months_refreshed += 1
+            self.months_changed += int(changed)
+
+    def invalidate(self, token: str, year: Optional[int] = None, month: Optional[int] = None) -> int:
+        """Mark months stale after an add or delete so the next sync re-fetches them.
+
+        Without a month the whole snapshot is dropped and reloaded with one annual
+        request. Returns the number of snapshots affected.
+        """
+        token_hash = hash_token(token)
+        # Local snapshots first, so a shared store that cannot be written never leaves them stale
+        if month is None:
+            affected = self._snapshots.remove_where(
+                lambda key: key[1] == token_hash and (year is None or key[2] == int(year)))
+        else:
+            affected = 0
+            with self._lock:
+                snapshots = [self._snapshots.get_item(key) for key in self._snapshots.keys()
+                             if key[1] == token_hash and (year is None or key[2] == int(year))]
+            for snapshot in snapshots:
+                if snapshot is not None and int(month) in snapshot.months:
+                    snapshot.months[int(month)].stale = True
+                    affected += 1
+
+        if self.shared is not None:
+            self.shared.remove_where(lambda key: key[1] == token_hash
+                                     and (year is None or key[2] == int(year))
+                                     and (month is None or key[3] == int(month)))
+            # After the shared months are gone, so a worker that notices never reloads them
+            self.shared.bump_generation(token_hash)
+        return affected
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "snapshots": self._snapshots.stats()["size"],
+                "requests": self.requests,
+                "bytes_received": self.bytes_received,
+                "full_loads": self.full_loads,
+                "months_refreshed": self.months_refreshed,
+                "months_changed": self.months_changed,
+                "parse_seconds": self.parse_seconds,
+                "shared_months": self.shared_months,
+            }
+
+
+# Shared by every session; snapshots are keyed by backend URL, token hash and year
+expense_sync = IncrementalExpenseSync(
+    max_snapshots=int(os.getenv('EXPENSE_SYNC_SNAPSHOTS', '64')),
+    current_month_ttl=float(os.getenv('EXPENSE_SYNC_CURRENT_TTL', '60')),
+    past_month_ttl=float(os.getenv('EXPENSE_SYNC_PAST_TTL', '3600')),
+    max_month_requests=int(os.getenv('EXPENSE_SYNC_MAX_MONTH_REQUESTS', '3')),
+    shared=shared_cache("expense_months", max_entries=int(os.getenv('EXPENSE_SYNC_SHARED_MONTHS', '4096')),
+                        ttl_seconds=float(os.getenv('EXPENSE_SYNC_PAST_TTL', '3600'))),
+)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Deterministic stand-ins for the AI providers, with injectable latency and
+failures, for exercising the provider orchestrator without API keys:
+
+    python fake_providers.py --hf-latency 5 --groq-latency 0.3 --hedge-delay 1
+"""
+
+import argparse
+import time
+from typing import Iterator, Optional
+
+from provider_orchestrator import AllProvidersFailed, Provider, ProviderOrchestrator
+
+DEFAULT_ANSWER = ("Track every expense for a month, then move 20% of your income to savings "
+                  "on payday before spending on anything else.")
+
+
+class FakeProvider:
+    """Streams a fixed answer word by word after a configurable delay"""
+
+    def __init__(self, name: str, text: str = DEFAULT_ANSWER,
+                 first_token_latency: float = 0.0, token_latency: float = 0.0,
+                 error: Optional[str] = None):
+        self.name = name
+        self.text = text
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.error = error
+        self.calls = 0
+
+    def stream(self) -> Iterator[str]:
+        self.calls += 1
+        time.sleep(self.first_token_latency)
+        if self.error:
+            raise RuntimeError(self.error)
+        for index, word in enumerate(self.text.split(' ')):
+            if index:
+                time.sleep(self.token_latency)
+            yield word + ' '
+
+    def generate(self) -> str:
+        return "".join(self.stream())
+
+    def as_provider(self, deadline: float = 30.0) -> Provider:
+        return Provider(self.name, self.stream, deadline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Race fake providers through the orchestrator")
+    parser.add_argument('--hf-latency', type=float, default=5.0)
+    parser.add_argument('--groq-latency', type=float, default=0.3)
+    parser.add_argument('--watson-latency', type=float, default=1.0)
+    parser.add_argument('--hf-error', default=None, help="Make the Hugging Face fake fail with this message")
+    parser.add_argument('--hedge-delay', type=float, default=1.0)
+    parser.add_argument('--deadline', type=float, default=10.0)
+    args = parser.parse_args()
+
+    providers = [
+        FakeProvider("huggingface", first_token_latency=args.hf_latency, error=args.hf_error),
+        FakeProvider("groq", first_token_latency=args.groq_latency),
+        FakeProvider("watson", first_token_latency=args.watson_latency),
+    ]
+    orchestrator = ProviderOrchestrator(
+        hedge_delay=args.hedge_delay,
+        on_failure=lambda name, error: print(f"⚠️  {name} failed: {error}"),
+    )
+
+    started = time.perf_counter()
+    first_token = None
+    winner = None
+    try:
+        for name, chunk in orchestrator.stream([p.as_provider(args.deadline) for p in providers]):
+            if first_token is None:
+                first_token = time.perf_counter() - started
+                winner = name
+    except AllProvidersFailed as e:
+        print(f"❌ {e}")
+    else:
+        print(f"🏁 Winner: {winner}")
+        print(f"  Time to first token: {first_token:.2f}s")
+        print(f"  Total time:          {time.perf_counter() - started:.2f}s")
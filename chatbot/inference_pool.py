@@ -0,0 +1,368 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("expense_chatbot")
+
+# Set HF_PROCESS_POOL=true to run the local model in worker processes instead of the server process
+PROCESS_POOL_ENABLED = os.getenv('HF_PROCESS_POOL', 'false').lower() in ('1', 'true', 'yes')
+# Torch threads per worker; the pool gets one worker per that many cores unless HF_POOL_SIZE is set
+POOL_THREADS = int(os.getenv('HF_POOL_THREADS', '2'))
+# Generations running or queued before new ones are turned away (default: four per worker)
+POOL_MAX_PENDING = int(os.getenv('HF_POOL_QUEUE', '0'))
+# Seconds a request may wait for a place in the queue before it is turned away
+POOL_QUEUE_TIMEOUT = float(os.getenv('HF_POOL_QUEUE_TIMEOUT', '0'))
+# Seconds between checks of a stream's cancel event while it waits for output
+CANCEL_POLL_SECONDS = 0.1
+
+# Streams a generation for one request payload; the callable reports whether the caller gave up
+Generate = Callable[[Dict[str, Any], Callable[[], bool]], Iterator[str]]
+
+
+def default_pool_size(threads_per_worker: int = POOL_THREADS, cpu_count: Optional[int] = None) -> int:
+    cpus = cpu_count or os.cpu_count() or 1
+    return max(1, cpus // max(1, threads_per_worker))
+
+
+POOL_SIZE = int(os.getenv('HF_POOL_SIZE', '0')) or default_pool_size()
+
+
+def pool_size_per_process(processes: int, cpu_count: Optional[int] = None) -> int:
+    """Workers for each of several app processes, so that together they fill the cores once"""
+    return max(1, default_pool_size(cpu_count=cpu_count) // max(1, processes))
+
+
+class InferencePoolBusy(Exception):
+    """Raised when every place in the inference queue is taken, so the caller can fall back"""
+
+
+def _worker_main(loader: Callable[..., Generate], loader_kwargs: Dict[str, Any], tasks, results, flags):
+    """Worker process: load the model once, then stream one request at a time back to the parent"""
+    try:
+        generate = loader(**loader_kwargs)
+    except Exception as e:
+        results.put((None, "fatal", f"{type(e).__name__}: {e}"))
+        return
+    results.put((None, "ready", os.getpid()))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        request_id, slot, payload = task
+
+        def cancelled() -> bool:
+            return bool(flags[slot])
+
+        # Requests abandoned while queued are dropped without generating
+        if cancelled():
+            results.put((request_id, "cancelled", None))
+            continue
+        results.put((request_id, "started", os.getpid()))
+        texts = generate(payload, cancelled)
+        try:
+            for text in texts:
+                if cancelled():
+                    break
+                results.put((request_id, "text", text))
+        except Exception as e:
+            outcome = ("error", f"{type(e).__name__}: {e}")
+        else:
+            outcome = ("cancelled" if cancelled() else "done", None)
+        finally:
+            # Wait for the generation to wind down while the flag is still ours: the parent
+            # clears it and reuses the slot as soon as it sees the outcome
+            if hasattr(texts, 'close'):
+                texts.close()
+        results.put((request_id, *outcome))
+
+
+class InferencePool:
+    """Runs generation in worker processes so it never holds the server's GIL.
+
+    Every worker loads its own copy of the model and takes requests from one
+    shared queue. At most max_pending requests are running or queued; beyond
+    that, stream() raises InferencePoolBusy instead of letting the backlog grow.
+    A caller that stops reading cancels its request: a queued one is skipped and
+    a running one stops at the next token.
+    """
+
+    def __init__(self, loader: Callable[..., Generate], loader_kwargs: Optional[Dict[str, Any]] = None,
+                 size: int = POOL_SIZE, max_pending: int = POOL_MAX_PENDING,
+                 queue_timeout: float = POOL_QUEUE_TIMEOUT, name: str = "inference"):
+        self.loader = loader
+        self.loader_kwargs = loader_kwargs or {}
+        self.size = max(1, size)
+        self.max_pending = max_pending or self.size * 4
+        self.queue_timeout = queue_timeout
+        self.name = name
+        self._context = multiprocessing.get_context('spawn')
+        self._tasks = self._context.Queue()
+        self._results = self._context.Queue()
+        # One cancellation flag per queue place, written here and read by the workers
+        self._flags = self._context.RawArray('b', self.max_pending)
+        self._slots: "queue.Queue[int]" = queue.Queue()
+        for slot in range(self.max_pending):
+            self._slots.put(slot)
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._streams: Dict[int, "queue.Queue[Tuple[str, Any]]"] = {}
+        self._slot_of: Dict[int, int] = {}
+        self._running_on: Dict[int, int] = {}
+        self._ready: set = set()
+        self.error: Optional[str] = None
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.rejected = 0
+        self.restarts = 0
+        self._stopping = False
+        self._processes = [self._spawn(index) for index in range(self.size)]
+        self._dispatcher = threading.Thread(target=self._dispatch, name=f"{name}-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def _spawn(self, index: int):
+        process = self._context.Process(target=_worker_main, name=f"{self.name}-worker-{index}", daemon=True,
+                                        args=(self.loader, self.loader_kwargs, self._tasks, self._results, self._flags))
+        process.start()
+        return process
+
+    def stream(self, payload: Dict[str, Any], timeout: Optional[float] = None,
+               cancelled: Optional[threading.Event] = None) -> Iterator[str]:
+        """Queue a generation and yield its text as the worker produces it.
+
+        `timeout` bounds the wait for each piece of text, including time spent queued.
+        Setting `cancelled` ends the stream and frees the worker, or drops the request
+        before a worker starts it if it is still queued.
+        """
+        if self.error:
+            raise RuntimeError(f"Inference pool failed to start: {self.error}")
+        try:
+            slot = self._slots.get(timeout=self.queue_timeout) if self.queue_timeout > 0 else self._slots.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self.rejected += 1
+            raise InferencePoolBusy(f"{self.max_pending} local generations already running or queued")
+
+        request_id = next(self._ids)
+        output: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        self._flags[slot] = 0
+        with self._lock:
+            self._streams[request_id] = output
+            self._slot_of[request_id] = slot
+            self.submitted += 1
+        self._tasks.put((request_id, slot, payload))
+
+        finished = False
+        # With a cancel event, wait in short slices so it is noticed even while nothing arrives
+        poll = timeout if cancelled is None else CANCEL_POLL_SECONDS
+        try:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                if cancelled is not None and cancelled.is_set():
+                    return
+                try:
+                    kind, value = output.get(timeout=poll if deadline is None
+                                             else max(0.0, min(poll, deadline - time.monotonic())))
+                except queue.Empty:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        raise TimeoutError(f"No output from the local model for {timeout:.0f}s")
+                    continue
+                deadline = None if timeout is None else time.monotonic() + timeout
+                if kind == "text":
+                    yield value
+                elif kind == "error":
+                    finished = True
+                    raise RuntimeError(value)
+                else:
+                    finished = True
+                    return
+        finally:
+            if not finished:
+                # The caller stopped reading: free the worker at its next token
+                self._flags[slot] = 1
+
+    def _finish(self, request_id: int, kind: str, value: Any = None):
+        with self._lock:
+            output = self._streams.pop(request_id, None)
+            slot = self._slot_of.pop(request_id, None)
+            self._running_on.pop(request_id, None)
+            if kind == "done":
+                self.completed += 1
+            elif kind == "cancelled":
+                self.cancelled += 1
+            else:
+                self.failed += 1
+        if slot is not None:
+            self._flags[slot] = 0
+            self._slots.put(slot)
+        if output is not None:
+            output.put((kind, value))
+
+    def _dispatch(self):
+        while not self._stopping:
+            try:
+                request_id, kind, value = self._results.get(timeout=1.0)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            except (EOFError, OSError):
+                return
+
+            if kind == "fatal":
+                self._fail(value)
+            elif kind == "ready":
+                self._ready.add(value)
+            elif kind == "started":
+                with self._lock:
+                    self._running_on[request_id] = value
+            elif kind == "text":
+                with self._lock:
+                    output = self._streams.get(request_id)
+                if output is not None:
+                    output.put((kind, value))
+            else:
+                self._finish(request_id, kind, value)
+
+    def _fail(self, error: str):
+        """A worker could not load the model: fail everything queued and refuse new requests"""
+        self.error = error
+        logger.error("Inference worker could not load the model: %s", error)
+        with self._lock:
+            waiting = list(self._streams)
+        for request_id in waiting:
+            self._finish(request_id, "error", error)
+
+    def _check_workers(self):
+        """Fail the requests of a worker that died and start a replacement"""
+        if self.error or self._stopping:
+            return
+        for index, process in enumerate(self._processes):
+            if process.is_alive():
+                continue
+            if process.pid not in self._ready:
+                # Restarting a worker that never finished loading would only crash again
+                self._fail(f"inference worker exited with code {process.exitcode} while loading the model")
+                return
+            with self._lock:
+                lost = [request_id for request_id, pid in self._running_on.items() if pid == process.pid]
+            for request_id in lost:
+                self._finish(request_id, "error", f"inference worker exited with code {process.exitcode}")
+            logger.warning("Inference worker %s exited with code %s, restarting it", process.name, process.exitcode)
+            self._processes[index] = self._spawn(index)
+            self.restarts += 1
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        self._stopping = True
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.size,
+                "alive": sum(process.is_alive() for process in self._processes),
+                "max_pending": self.max_pending,
+                "pending": len(self._streams),
+                "running": len(self._running_on),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "restarts": self.restarts,
+            }
+
+
+def huggingface_stream_loader(model_name: str, backend: str, token: Optional[str] = None,
+                              threads: int = POOL_THREADS, **generate_kwargs) -> Generate:
+    """Runs in each worker: load the model and return a function that streams one generation.
+
+    Payloads carry the encoded prompt, the user type (whose system prefix can be
+    served from the worker's KV cache) and max_new_tokens.
+    """
+    import torch
+    from transformers import AutoTokenizer, StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+
+    from kv_prefix_cache import PREFIX_CACHE_ENABLED, prefix_kv_cache
+    from local_backends import load_local_model
+    from prompt_templates import get_template, prefix_tokens
+
+    torch.set_num_threads(max(1, threads))
+    tokenizer = AutoTokenizer.from_pretrained(model_name, token=token)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    model, details = load_local_model(model_name, backend, token)
+    use_prefix_cache = PREFIX_CACHE_ENABLED and details["prefix_cache"]
+
+    class StopWhenCancelled(StoppingCriteria):
+        def __init__(self, cancelled: Callable[[], bool]):
+            self.cancelled = cancelled
+
+        def __call__(self, input_ids, scores, **kwargs):
+            return torch.full((input_ids.shape[0],), self.cancelled(), dtype=torch.bool)
+
+    def generate(payload: Dict[str, Any], cancelled: Callable[[], bool]) -> Iterator[str]:
+        input_ids = torch.tensor([payload["prompt_ids"]])
+        past_key_values = None
+        if use_prefix_cache:
+            template = get_template("huggingface", payload.get("user_type", "general"))
+            past_key_values = prefix_kv_cache.get(model_name, model, template,
+                                                  prefix_tokens.prefix_ids(model_name, tokenizer, template))
+        streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        errors: List[Exception] = []
+
+        def run_generation():
+            try:
+                model.generate(
+                    input_ids=input_ids,
+                    attention_mask=torch.ones_like(input_ids),
+                    past_key_values=past_key_values,
+                    max_new_tokens=payload.get("max_new_tokens", 200),
+                    pad_token_id=tokenizer.eos_token_id,
+                    streamer=streamer,
+                    stopping_criteria=StoppingCriteriaList([StopWhenCancelled(cancelled)]),
+                    **generate_kwargs
+                )
+            except Exception as e:
+                errors.append(e)
+                streamer.end()
+
+        thread = threading.Thread(target=run_generation, daemon=True)
+        thread.start()
+        try:
+            yield from streamer
+        finally:
+            # Closing early is only ever done after cancelling, so the stopping criteria end it at the next token
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    return generate
+
+
+_pools: Dict[str, InferencePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_inference_pool(name: str, loader: Callable[..., Generate], loader_kwargs: Optional[Dict[str, Any]] = None,
+                       size: int = POOL_SIZE, max_pending: int = POOL_MAX_PENDING) -> InferencePool:
+    """The process-wide pool for a model, started on first use"""
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = InferencePool(loader, loader_kwargs, size=size, max_pending=max_pending, name=name)
+                _pools[name] = pool
+    return pool
@@ -0,0 +1,151 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Set HF_MICRO_BATCH=true to serve the local model through one batching worker per process
+MICRO_BATCH_ENABLED = os.getenv('HF_MICRO_BATCH', 'false').lower() in ('1', 'true', 'yes')
+MICRO_BATCH_SIZE = int(os.getenv('HF_MICRO_BATCH_SIZE', '8'))
+MICRO_BATCH_WAIT = float(os.getenv('HF_MICRO_BATCH_WAIT', '0.02'))
+
+
+@dataclass
+class GenerationRequest:
+    """One prompt waiting for the worker; the answer arrives through its future"""
+    input_ids: Sequence[int]
+    max_new_tokens: int = 200
+    future: Future = field(default_factory=Future)
+    submitted_at: float = field(default_factory=time.monotonic)
+
+
+class MicroBatchWorker:
+    """Owns one model and serves every caller from a single thread.
+
+    Requests are gathered into a batch until it holds max_batch_size prompts or
+    max_wait seconds have passed since the first one arrived, then the batch is
+    generated in one call and each caller's future is resolved with its text.
+    """
+
+    def __init__(self, generate_batch: Callable[[List[GenerationRequest]], List[Any]],
+                 max_batch_size: int = 8, max_wait: float = 0.02, name: str = "inference"):
+        self.generate_batch = generate_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[Optional[GenerationRequest]]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.failures = 0
+        self._thread = threading.Thread(target=self._run, name=f"{name}-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, input_ids: Sequence[int], max_new_tokens: int = 200) -> Future:
+        """Queue a prompt and return a future for its generated text"""
+        if not self._thread.is_alive():
+            raise RuntimeError("inference worker is stopped")
+        request = GenerationRequest(list(input_ids), max_new_tokens)
+        self._queue.put(request)
+        return request.future
+
+    def _collect(self, first: GenerationRequest) -> List[GenerationRequest]:
+        batch = [first]
+        flush_at = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = flush_at - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                # Stop once this batch is served
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            # Callers that gave up while queued are dropped before the batch is built
+            batch = [r for r in self._collect(first) if r.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = self.generate_batch(batch)
+            except Exception as e:
+                with self._stats_lock:
+                    self.failures += 1
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            with self._stats_lock:
+                self.batches += 1
+                self.requests += len(batch)
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
+
+    def stop(self, timeout: Optional[float] = None):
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "batches": self.batches,
+                "requests": self.requests,
+                "failures": self.failures,
+                "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+                "queued": self._queue.qsize(),
+            }
+
+
+def huggingface_batch_generator(model: Any, tokenizer: Any, lock: Optional[threading.Lock] = None,
+                                **generate_kwargs) -> Callable[[List[GenerationRequest]], List[str]]:
+    """A generate_batch function that left-pads a batch of prompts into one model.generate call"""
+    pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+
+    def generate_batch(batch: List[GenerationRequest]) -> List[str]:
+        import torch
+
+        width = max(len(request.input_ids) for request in batch)
+        input_ids = [[pad_token_id] * (width - len(r.input_ids)) + list(r.input_ids) for r in batch]
+        attention_mask = [[0] * (width - len(r.input_ids)) + [1] * len(r.input_ids) for r in batch]
+        with lock or nullcontext(), torch.no_grad():
+            output = model.generate(
+                input_ids=torch.tensor(input_ids),
+                attention_mask=torch.tensor(attention_mask),
+                max_new_tokens=max(request.max_new_tokens for request in batch),
+                pad_token_id=pad_token_id,
+                **generate_kwargs
+            )
+        return [
+            tokenizer.decode(row[width:width + request.max_new_tokens], skip_special_tokens=True)
+            for row, request in zip(output.tolist(), batch)
+        ]
+
+    return generate_batch
+
+
+_workers: Dict[str, MicroBatchWorker] = {}
+_workers_lock = threading.Lock()
+
+
+def get_batch_worker(name: str, generate_batch_factory: Callable[[], Callable[[List[GenerationRequest]], List[Any]]],
+                     max_batch_size: int = MICRO_BATCH_SIZE, max_wait: float = MICRO_BATCH_WAIT) -> MicroBatchWorker:
+    """The process-wide worker for a model, started on first use"""
+    worker = _workers.get(name)
+    if worker is None:
+        with _workers_lock:
+            worker = _workers.get(name)
+            if worker is None:
+                worker = MicroBatchWorker(generate_batch_factory(), max_batch_size, max_wait, name=name)
+                _workers[name] = worker
+    return worker
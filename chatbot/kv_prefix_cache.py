@@ -0,0 +1,63 @@
+import copy
+import os
+import threading
+from typing import Any, Dict, Sequence, Tuple
+
+from prompt_templates import PromptTemplate
+
+# Set HF_PREFIX_CACHE=false to run the full prompt through the model on every request
+PREFIX_CACHE_ENABLED = os.getenv('HF_PREFIX_CACHE', 'true').lower() in ('1', 'true', 'yes')
+
+
+class PrefixKVCache:
+    """past_key_values of each fixed system prefix, computed once per model.
+
+    A request copies the prefix's keys and values from here, so the model only
+    runs attention over the query tokens that follow it.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str, str], Tuple[Tuple[int, ...], Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model_name: str, model: Any, template: PromptTemplate, prefix_ids: Sequence[int]) -> Any:
+        """A private copy of the prefix's past_key_values, running the prefix on first use"""
+        key = (model_name, template.provider, template.user_type)
+        prefix_ids = tuple(prefix_ids)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == prefix_ids:
+                self.hits += 1
+            else:
+                entry = None
+                self.misses += 1
+
+        if entry is None:
+            import torch
+
+            with torch.no_grad():
+                outputs = model(input_ids=torch.tensor([list(prefix_ids)]), use_cache=True)
+            entry = (prefix_ids, outputs.past_key_values)
+            with self._lock:
+                self._entries[key] = entry
+
+        # generate() extends the cache in place, so every request works on its own copy
+        return copy.deepcopy(entry[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "prefixes": len(self._entries),
+                "prefix_tokens": sum(len(ids) for ids, _ in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+prefix_kv_cache = PrefixKVCache()
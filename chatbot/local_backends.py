@@ -0,0 +1,65 @@
+import os
+from typing import Any, Dict, Optional, Tuple
+
+# Which runtime serves the local model on CPU:
+#   pytorch - the original fp32 PyTorch weights
+#   int8    - PyTorch with dynamic int8 quantization of the linear layers
+#   onnx    - an ONNX Runtime session exported with optimum (pip install optimum[onnxruntime])
+LOCAL_BACKENDS = ("pytorch", "int8", "onnx")
+HF_BACKEND = os.getenv('HF_BACKEND', 'pytorch').lower()
+
+
+def conv1d_to_linear(model: Any) -> int:
+    """Swap GPT-2 style Conv1D layers for nn.Linear so dynamic quantization can reach them.
+
+    Conv1D stores its weight transposed relative to nn.Linear; the outputs are identical.
+    Returns the number of layers replaced.
+    """
+    import torch
+    from transformers.pytorch_utils import Conv1D
+
+    replaced = 0
+    for parent in list(model.modules()):
+        for child_name, child in list(parent.named_children()):
+            if isinstance(child, Conv1D):
+                in_features, out_features = child.weight.shape
+                linear = torch.nn.Linear(in_features, out_features)
+                with torch.no_grad():
+                    linear.weight.copy_(child.weight.t())
+                    linear.bias.copy_(child.bias)
+                setattr(parent, child_name, linear)
+                replaced += 1
+    return replaced
+
+
+def quantize_int8(model: Any) -> Any:
+    """Dynamic int8 quantization of every linear layer; activations stay in float"""
+    import torch
+
+    conv1d_to_linear(model)
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_local_model(model_name: str, backend: str = HF_BACKEND,
+                     token: Optional[str] = None) -> Tuple[Any, Dict[str, Any]]:
+    """Load a causal LM for CPU inference on the chosen backend.
+
+    Returns the model (anything with a transformers-style generate()) and details
+    for the registry: the backend name and whether the prefix KV cache applies.
+    """
+    if backend not in LOCAL_BACKENDS:
+        raise ValueError(f"Unknown HF_BACKEND '{backend}', expected one of: {', '.join(LOCAL_BACKENDS)}")
+
+    if backend == "onnx":
+        from optimum.onnxruntime import ORTModelForCausalLM
+
+        model = ORTModelForCausalLM.from_pretrained(model_name, export=True, use_cache=True, token=token)
+        # The ONNX session keeps its own past key/value layout, so cached prefixes are not shared
+        return model, {"backend": backend, "prefix_cache": False}
+
+    from transformers import AutoModelForCausalLM
+
+    model = AutoModelForCausalLM.from_pretrained(model_name, token=token).eval()
+    if backend == "int8":
+        model = quantize_int8(model)
+    return model, {"backend": backend, "prefix_cache": True}
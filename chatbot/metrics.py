@@ -0,0 +1,200 @@
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from circuit_breaker import percentile
+
+# Bucket upper bounds in seconds, from cache hits up to slow model generations
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_NAME = "chatbot_stage_seconds"
+
+SeriesKey = Tuple[str, str]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram plus a window of recent samples for percentiles"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, window: int = 1024):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, count) pairs in Prometheus order, ending with +Inf"""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            pairs.append((f"{bound:g}", total))
+        pairs.append(("+Inf", self.count))
+        return pairs
+
+    def summary(self) -> Dict[str, Any]:
+        recent = list(self.recent)
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": percentile(recent, 0.5),
+            "p95": percentile(recent, 0.95),
+            "p99": percentile(recent, 0.99),
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class StageMetrics:
+    """Latency histograms per chat pipeline stage, optionally split by provider"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._series: Dict[SeriesKey, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, provider: Optional[str] = None):
+        key = (stage, provider or "")
+        with self._lock:
+            histogram = self._series.get(key)
+            if histogram is None:
+                histogram = Histogram(self.buckets)
+                self._series[key] = histogram
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str, provider: Optional[str] = None) -> Iterator[None]:
+        """Time a block and record it under a stage, even when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started, provider)
+
+    def timed(self, stage: str) -> Callable[[Callable], Callable]:
+        """Decorator form of timer() for a function that is always one stage"""
+        def decorate(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def samples(self) -> Dict[SeriesKey, List[float]]:
+        """Recent samples per (stage, provider), for combining metrics from several processes"""
+        with self._lock:
+            return {key: list(histogram.recent) for key, histogram in self._series.items()}
+
+    def merge(self, samples: Dict[SeriesKey, List[float]]):
+        """Record samples taken by samples() in another process"""
+        for (stage, provider), values in samples.items():
+            for seconds in values:
+                self.observe(stage, seconds, provider)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Every series with its count, sum, percentiles and buckets, for JSON export"""
+        with self._lock:
+            return [{"stage": stage, "provider": provider or None, **histogram.summary()}
+                    for (stage, provider), histogram in sorted(self._series.items())]
+
+    def prometheus_text(self) -> str:
+        """The histograms in the Prometheus text exposition format"""
+        lines = [f"# HELP {METRIC_NAME} Latency of each chat pipeline stage in seconds",
+                 f"# TYPE {METRIC_NAME} histogram"]
+        with self._lock:
+            for (stage, provider), histogram in sorted(self._series.items()):
+                labels = f'stage="{stage}"' + (f',provider="{provider}"' if provider else "")
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"{METRIC_NAME}_sum{{{labels}}} {histogram.sum:.6f}")
+                lines.append(f"{METRIC_NAME}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Sidecar HTTP endpoint: /metrics in Prometheus text, /metrics.json as JSON"""
+
+    def __init__(self, stage_metrics: StageMetrics, host: str = '127.0.0.1', port: int = 0):
+        self.stage_metrics = stage_metrics
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        stage_metrics = self.stage_metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body, content_type = stage_metrics.prometheus_text().encode('utf-8'), 'text/plain; version=0.0.4'
+                elif self.path == '/metrics.json':
+                    body, content_type = json.dumps(stage_metrics.snapshot()).encode('utf-8'), 'application/json'
+                else:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self) -> 'MetricsServer':
+        self._thread = threading.Thread(target=self.server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# Shared by every session in the process
+metrics = StageMetrics()
+
+_server: Optional[MetricsServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: Optional[int] = None, host: Optional[str] = None) -> Optional[MetricsServer]:
+    """Start the sidecar endpoint once per process when METRICS_PORT (or port) is set"""
+    global _server
+    port = port if port is not None else int(os.getenv('METRICS_PORT', '0') or 0)
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = MetricsServer(metrics, host or os.getenv('METRICS_HOST', '127.0.0.1'), port).start()
+            except OSError:
+                # Another worker process already serves this port
+                return None
+        return _server
@@ -0,0 +1,248 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+# Provider SDKs are imported inside their loaders, so a backend that is not
+# configured never pays for importing transformers, groq or ibm_watsonx_ai.
+
+HF_MODEL_NAME = "microsoft/DialoGPT-small"
+WATSON_MODEL_ID = "ibm/granite-3b-code-instruct"
+# A backend that failed to load is retried after this many seconds instead of staying down
+LOAD_RETRY_SECONDS = float(os.getenv('MODEL_LOAD_RETRY_SECONDS', '30'))
+
+
+def current_rss_mb() -> Optional[float]:
+    """Return the resident memory of this process in MB, if the platform exposes it"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+@dataclass
+class BackendHandle:
+    """A loaded AI backend plus the cost of loading it"""
+    name: str
+    client: Any = None
+    components: Dict[str, Any] = field(default_factory=dict)
+    status: str = ""
+    error: Optional[str] = None
+    load_seconds: float = 0.0
+    rss_delta_mb: Optional[float] = None
+    loaded_at: float = 0.0
+    # Serializes inference on clients that are not safe to call concurrently
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def available(self) -> bool:
+        return self.client is not None
+
+
+class ModelRegistry:
+    """Loads each AI backend once per process and shares it across sessions"""
+
+    def __init__(self, retry_seconds: float = LOAD_RETRY_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.retry_seconds = retry_seconds
+        self._clock = clock
+        self._loaders: Dict[str, Callable[[], BackendHandle]] = {}
+        self._handles: Dict[str, BackendHandle] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], BackendHandle]):
+        """Register a loader; it runs lazily on the first get()"""
+        with self._lock:
+            self._loaders[name] = loader
+            self._load_locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str) -> BackendHandle:
+        """Return the shared handle for a backend, loading it on first use"""
+        handle = self._handles.get(name)
+        if handle is not None and not self._retry_due(handle):
+            return handle
+
+        with self._lock:
+            loader = self._loaders.get(name)
+            load_lock = self._load_locks.get(name)
+        if loader is None:
+            raise KeyError(f"Unknown AI backend: {name}")
+
+        # Only one session pays the load cost; the others wait for its result
+        with load_lock:
+            handle = self._handles.get(name)
+            if handle is not None and not self._retry_due(handle):
+                return handle
+
+            rss_before = current_rss_mb()
+            started = time.perf_counter()
+            try:
+                handle = loader()
+            except Exception as e:
+                handle = BackendHandle(name=name, error=str(e))
+            handle.load_seconds = time.perf_counter() - started
+            rss_after = current_rss_mb()
+            if rss_before is not None and rss_after is not None:
+                handle.rss_delta_mb = rss_after - rss_before
+            handle.loaded_at = self._clock()
+
+            self._handles[name] = handle
+            return handle
+
+    def _retry_due(self, handle: BackendHandle) -> bool:
+        """A load that raised is retried after a backoff, so one network blip does not disable a backend"""
+        return handle.error is not None and self._clock() - handle.loaded_at >= self.retry_seconds
+
+    def loaded(self) -> Dict[str, BackendHandle]:
+        """Return the handles that have been loaded so far"""
+        return dict(self._handles)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Load time and memory footprint of every loaded backend"""
+        return {
+            name: {
+                "available": handle.available,
+                "load_seconds": round(handle.load_seconds, 3),
+                "rss_delta_mb": None if handle.rss_delta_mb is None else round(handle.rss_delta_mb, 1),
+                "error": handle.error,
+            }
+            for name, handle in self.loaded().items()
+        }
+
+    def reset(self, name: Optional[str] = None):
+        """Drop loaded handles so the next get() reloads them"""
+        with self._lock:
+            if name is None:
+                self._handles.clear()
+            else:
+                self._handles.pop(name, None)
+
+
+def _context_window(config: Any) -> Optional[int]:
+    """Token positions the model attends over: prompt plus generated tokens must fit"""
+    return getattr(config, "n_positions", None) or getattr(config, "max_position_embeddings", None)
+
+
+def load_huggingface() -> BackendHandle:
+    """Load the DialoGPT tokenizer and text-generation pipeline"""
+    hf_token = os.getenv('HUGGINGFACE_TOKEN')
+    if not hf_token or hf_token == 'your_huggingface_token_here':
+        return BackendHandle(name="huggingface", status="⚠️ Hugging Face token not provided. Using fallback mode.")
+
+    from transformers import pipeline, AutoConfig, AutoTokenizer
+    from inference_pool import PROCESS_POOL_ENABLED, POOL_THREADS, get_inference_pool, huggingface_stream_loader
+    from local_backends import HF_BACKEND, load_local_model
+
+    tokenizer = AutoTokenizer.from_pretrained(HF_MODEL_NAME, token=hf_token)
+
+    # Add pad token if it doesn't exist
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+
+    if PROCESS_POOL_ENABLED:
+        # Generation runs in worker processes; this process only tokenizes prompts
+        pool = get_inference_pool(f"huggingface:{HF_MODEL_NAME}", huggingface_stream_loader, {
+            "model_name": HF_MODEL_NAME, "backend": HF_BACKEND, "token": hf_token,
+            "threads": POOL_THREADS, "temperature": 0.7, "do_sample": True,
+        })
+        return BackendHandle(
+            name="huggingface",
+            client=pool,
+            components={"tokenizer": tokenizer, "model_name": HF_MODEL_NAME, "backend": HF_BACKEND,
+                        "prefix_cache": False, "pool": pool,
+                        "context_window": _context_window(AutoConfig.from_pretrained(HF_MODEL_NAME, token=hf_token))},
+            status=f"✅ Hugging Face AI running in {pool.size} worker processes!",
+        )
+
+    # fp32 PyTorch by default; HF_BACKEND selects int8 or ONNX Runtime on CPU
+    model, details = load_local_model(HF_MODEL_NAME, HF_BACKEND, hf_token)
+
+    # Use pipeline for easier inference
+    hf_pipeline = pipeline(
+        "text-generation",
+        model=model,
+        tokenizer=tokenizer,
+        token=hf_token,
+        max_new_tokens=200,  # Use max_new_tokens instead of max_length
+        temperature=0.7,
+        do_sample=True,
+        pad_token_id=tokenizer.eos_token_id
+    )
+    return BackendHandle(
+        name="huggingface",
+        client=hf_pipeline,
+        components={"tokenizer": tokenizer, "model_name": HF_MODEL_NAME,
+                    "context_window": _context_window(model.config), **details},
+        status="✅ Hugging Face AI initialized successfully!",
+    )
+
+
+def load_groq() -> BackendHandle:
+    """Create the Groq API client"""
+    groq_api_key = os.getenv('GROQ_API_KEY')
+    if not groq_api_key or groq_api_key == 'your_groq_api_key_here':
+        return BackendHandle(name="groq", status="ℹ️ Groq API key not provided. Using other fallback modes.")
+
+    from groq import Groq
+
+    return BackendHandle(
+        name="groq",
+        client=Groq(api_key=groq_api_key),
+        status="✅ Groq AI initialized as fallback service!",
+    )
+
+
+def load_watson() -> BackendHandle:
+    """Create the IBM Watson Granite model client"""
+    if not os.getenv('IBM_WATSONX_API_KEY'):
+        return BackendHandle(name="watson", status="ℹ️ IBM Watson API key not provided. Watson fallback disabled.")
+
+    from ibm_watsonx_ai import Credentials
+    from ibm_watsonx_ai.foundation_models import Model
+    from ibm_watsonx_ai.metanames import GenTextParamsMetaNames as GenParams
+
+    credentials = Credentials(
+        url=os.getenv('IBM_WATSONX_URL', 'https://us-south.ml.cloud.ibm.com'),
+        api_key=os.getenv('IBM_WATSONX_API_KEY')
+    )
+
+    # Model parameters for IBM Granite 3B
+    model_params = {
+        GenParams.DECODING_METHOD: "greedy",
+        GenParams.MAX_NEW_TOKENS: 500,
+        GenParams.MIN_NEW_TOKENS: 1,
+        GenParams.TEMPERATURE: 0.7,
+        GenParams.TOP_P: 1.0,
+        GenParams.REPETITION_PENALTY: 1.1
+    }
+
+    model = Model(
+        model_id=WATSON_MODEL_ID,
+        params=model_params,
+        credentials=credentials,
+        project_id=os.getenv('IBM_WATSONX_PROJECT_ID')
+    )
+    return BackendHandle(
+        name="watson",
+        client=model,
+        components={"params": model_params},
+    )
+
+
+# Module-level singleton: Streamlit re-runs app.py per interaction, but imported
+# modules live for the whole server process, so every session shares these.
+registry = ModelRegistry()
+registry.register("huggingface", load_huggingface)
+registry.register("groq", load_groq)
+registry.register("watson", load_watson)
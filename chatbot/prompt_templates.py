@@ -0,0 +1,223 @@
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+# Built once at import and shared by every provider and session
+
+SYSTEM_PROMPTS = {
+    "student": """You are a smart, helpful, and friendly financial assistant specifically for students. Your job is to guide users step-by-step through financial topics including expense tracking, budgeting, saving strategies, and taxes. Your answers should be detailed, practical, and personalized for students.
+
+🟢 When a student asks a financial question:
+- Start by understanding their financial situation (income, expenses, goals)
+- Ask clarifying questions if needed (e.g., pocket money, rent, location, goals)
+- Break down the response into clear steps or strategies
+- Provide helpful tools or formulas (e.g., savings rate, emergency fund calculations)
+- Warn about common student financial mistakes and suggest best practices
+- Include practical tips for students (part-time work, student discounts, etc.)
+
+🧠 Focus on student-specific scenarios like:
+- Budgeting pocket money or part-time income
+- Saving for gadgets, books, or education expenses
+- Managing hostel/PG expenses
+- Building early financial habits
+
+🔐 Assume user data privacy and never store or share user info.
+🚀 Goal: Make financial literacy simple, actionable, and achievable for Indian students.
+
+Always conclude with: "Would you like a summary, a downloadable guide, or help creating a plan now?" """,
+
+    "professional": """You are a smart, helpful, and friendly financial assistant specifically for working professionals. Your job is to guide users step-by-step through financial topics including expense tracking, budgeting, saving strategies, taxes, and investments. Your answers should be detailed, practical, and personalized for professionals.
+
+🟢 When a professional asks a financial question:
+- Start by understanding their career stage and financial situation (salary, family, goals)
+- Ask clarifying questions if needed (e.g., income, EMIs, dependents, investment goals)
+- Break down the response into clear steps or strategies
+- Provide advanced tools or formulas (e.g., tax calculations, investment returns, retirement planning)
+- Warn about common professional financial mistakes and suggest best practices
+- Include professional-specific advice (tax savings, career investments, insurance)
+
+🧠 Focus on professional scenarios like:
+- Salary budgeting and tax planning
+- Investment strategies and portfolio management
+- Home loans, insurance, and major purchases
+- Retirement planning and wealth building
+
+🔐 Assume user data privacy and never store or share user info.
+🚀 Goal: Make advanced financial planning simple, actionable, and achievable for Indian professionals.
+
+Always conclude with: "Would you like a summary, a downloadable guide, or help creating a plan now?" """,
+
+    "general": """You are a smart, helpful, and friendly financial assistant for both students and professionals. Your job is to guide users step-by-step through financial topics including expense tracking, budgeting, saving strategies, and taxes. Your answers should be detailed, practical, and personalized based on whether the user is a student or a working professional.
+
+🟢 When a user asks a financial question:
+- Start by understanding if they are a student or a working professional (if not already known)
+- Ask clarifying questions if needed to personalize the answer (e.g., income, rent, location, goals)
+- Break down the response into clear steps or strategies
+- Provide helpful tools or formulas (e.g., how to calculate savings rate, emergency fund, tax slab, etc.)
+- Warn about common mistakes and suggest best practices
+- Include links or references to trustworthy resources when necessary
+
+🧠 You can handle queries like:
+- "How to budget my monthly income?"
+- "How much should I save as a student with ₹10,000 per month?"
+- "I'm a professional earning ₹60,000/month—how much tax will I pay?"
+- "How do I track my expenses?"
+- "Suggest the best app or method to manage finances."
+
+🔐 Assume user data privacy and never store or share user info.
+🚀 Goal: Make financial literacy simple, actionable, and achievable for Indian users.
+
+Always conclude with: "Would you like a summary, a downloadable guide, or help creating a plan now?" """
+}
+
+# Watson gets shorter variants of the same instructions
+WATSON_SYSTEM_PROMPTS = {
+    "student": """You are a smart, helpful, and friendly financial assistant specifically for students. Your job is to guide users step-by-step through financial topics including expense tracking, budgeting, saving strategies, and taxes. Your answers should be detailed, practical, and personalized for students.
+
+🟢 When a student asks a financial question:
+- Start by understanding their financial situation (income, expenses, goals)
+- Ask clarifying questions if needed (e.g., pocket money, rent, location, goals)
+- Break down the response into clear steps or strategies
+- Provide helpful tools or formulas (e.g., savings rate, emergency fund calculations)
+- Warn about common student financial mistakes and suggest best practices
+- Include practical tips for students (part-time work, student discounts, etc.)
+
+Focus on student-specific scenarios and always conclude with: "Would you like a summary, a downloadable guide, or help creating a plan now?" """,
+
+    "professional": """You are a smart, helpful, and friendly financial assistant specifically for working professionals. Your job is to guide users step-by-step through financial topics including expense tracking, budgeting, saving strategies, taxes, and investments. Your answers should be detailed, practical, and personalized for professionals.
+
+🟢 When a professional asks a financial question:
+- Start by understanding their career stage and financial situation (salary, family, goals)
+- Ask clarifying questions if needed (e.g., income, EMIs, dependents, investment goals)
+- Break down the response into clear steps or strategies
+- Provide advanced tools or formulas (e.g., tax calculations, investment returns, retirement planning)
+- Warn about common professional financial mistakes and suggest best practices
+- Include professional-specific advice (tax savings, career investments, insurance)
+
+Focus on professional scenarios and always conclude with: "Would you like a summary, a downloadable guide, or help creating a plan now?" """,
+
+    "general": """You are a smart, helpful, and friendly financial assistant for both students and professionals. Your job is to guide users step-by-step through financial topics including expense tracking, budgeting, saving strategies, and taxes. Your answers should be detailed, practical, and personalized.
+
+🟢 When a user asks a financial question:
+- Start by understanding if they are a student or a working professional (if not already known)
+- Ask clarifying questions if needed to personalize the answer (e.g., income, rent, location, goals)
+- Break down the response into clear steps or strategies
+- Provide helpful tools or formulas (e.g., how to calculate savings rate, emergency fund, tax slab, etc.)
+- Warn about common mistakes and suggest best practices
+
+Goal: Make financial literacy simple, actionable, and achievable for Indian users. Always conclude with: "Would you like a summary, a downloadable guide, or help creating a plan now?" """
+}
+
+# Tone guidance is part of the primary prompt, so no second generation is needed
+TONE_INSTRUCTIONS = {
+    "student": "Tone: keep explanations simple, educational and encouraging.",
+    "professional": "Tone: be formal and use relevant business terminology.",
+    "general": "Tone: be conversational and helpful."
+}
+
+USER_TYPES = tuple(SYSTEM_PROMPTS)
+
+
+def with_tone(system_prompt: str, user_type: str) -> str:
+    """Append the tone guidance for a user type to a system prompt"""
+    return f"{system_prompt}\n\n{TONE_INSTRUCTIONS.get(user_type, TONE_INSTRUCTIONS['general'])}"
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A provider's prompt for one user type: a fixed prefix plus a per-request suffix.
+
+    The prefix never changes between requests, so it can be tokenized (and, for a
+    local model, run through the network) once and reused.
+    """
+    provider: str
+    user_type: str
+    system: str
+    prefix: str
+    suffix: str
+
+    def render_suffix(self, query: str, context: str = "", history: str = "") -> str:
+        return self.suffix.format(query=query, context=context, history=history)
+
+    def render(self, query: str, context: str = "", history: str = "") -> str:
+        return self.prefix + self.render_suffix(query, context, history)
+
+
+# Per-request text for each provider; {query}, {context} and {history} (the packed
+# conversation so far, see conversation_memory) are filled in per call
+SUFFIXES = {
+    "huggingface": "{history}User query: {query}\n\nResponse (provide detailed, step-by-step guidance):",
+    "groq": "{history}User query: {query}\n\nPlease provide detailed, step-by-step guidance following the system instructions above.",
+    "watson": ("Context about user's expenses:\n{context}\n\n{history}User question: {query}\n\n"
+               "Provide a helpful response that addresses their specific question while considering their expense data."),
+}
+
+
+def _build_templates() -> Dict[Tuple[str, str], PromptTemplate]:
+    templates = {}
+    for provider, suffix in SUFFIXES.items():
+        prompts = WATSON_SYSTEM_PROMPTS if provider == "watson" else SYSTEM_PROMPTS
+        for user_type in USER_TYPES:
+            system = with_tone(prompts[user_type], user_type)
+            if provider == "groq":
+                # Groq sends the system prompt as its own message rather than a text prefix
+                templates[(provider, user_type)] = PromptTemplate(provider, user_type, system, "", suffix)
+            else:
+                # The blank line opens the suffix so the prefix ends on a word, not on whitespace
+                templates[(provider, user_type)] = PromptTemplate(provider, user_type, system, system, "\n\n" + suffix)
+    return templates
+
+
+TEMPLATES = _build_templates()
+
+
+def get_template(provider: str, user_type: str) -> PromptTemplate:
+    """The precompiled template for a provider, falling back to the general user type"""
+    return TEMPLATES.get((provider, user_type)) or TEMPLATES[(provider, "general")]
+
+
+class PrefixTokenCache:
+    """Token ids of each template's fixed prefix, encoded once per model.
+
+    Byte-level BPE never merges across a word/whitespace boundary, and the prefix
+    ends on punctuation with the suffix opening on its blank line, so encoding the
+    two separately gives the same tokens as encoding the whole prompt. A prefix
+    ending in whitespace would not: GPT-2 splits "\n\nUser" as "\n", "\n", "User"
+    but a trailing "\n\n" on its own as one token.
+    """
+
+    def __init__(self):
+        self._ids: Dict[Tuple[str, str, str], Tuple[int, ...]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def prefix_ids(self, model_name: str, tokenizer: Any, template: PromptTemplate) -> Tuple[int, ...]:
+        key = (model_name, template.provider, template.user_type)
+        with self._lock:
+            ids = self._ids.get(key)
+            if ids is not None:
+                self.hits += 1
+                return ids
+            self.misses += 1
+        ids = tuple(tokenizer.encode(template.prefix, add_special_tokens=False))
+        with self._lock:
+            self._ids[key] = ids
+        return ids
+
+    def encode(self, model_name: str, tokenizer: Any, template: PromptTemplate,
+               query: str, context: str = "", history: str = "") -> List[int]:
+        """Token ids for a full prompt: the cached prefix followed by the encoded suffix"""
+        suffix_ids = tokenizer.encode(template.render_suffix(query, context, history), add_special_tokens=False)
+        return list(self.prefix_ids(model_name, tokenizer, template)) + list(suffix_ids)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"prefixes": len(self._ids), "hits": self.hits, "misses": self.misses}
+
+
+prefix_tokens = PrefixTokenCache()
@@ -0,0 +1,210 @@
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from circuit_breaker import BreakerBoard, CircuitOpenError
+
+# Seconds a provider may take to produce its first token before it is abandoned
+DEFAULT_DEADLINES = {
+    "huggingface": float(os.getenv('HF_DEADLINE', '30')),
+    "groq": float(os.getenv('GROQ_DEADLINE', '15')),
+    "watson": float(os.getenv('WATSON_DEADLINE', '30')),
+}
+
+
+@dataclass
+class Provider:
+    """A blocking, streaming AI provider to race against the others"""
+    name: str
+    stream: Callable[[], Iterator[str]]
+    deadline: float = 30.0
+    # Set when the provider loses the race or misses its deadline, so it can stop work the stream does not own
+    cancelled: Optional[threading.Event] = None
+
+
+class AllProvidersFailed(Exception):
+    """Raised when every provider failed or missed its deadline before answering"""
+
+    def __init__(self, errors: Dict[str, BaseException]):
+        self.errors = errors
+        details = "; ".join(f"{name}: {error}" for name, error in errors.items())
+        super().__init__(f"All AI providers failed ({details})")
+
+
+class _Run:
+    """One provider's stream pumped from a worker thread into the event loop"""
+
+    def __init__(self, provider: Provider, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        self.provider = provider
+        self.started = time.monotonic()
+        self.finished = False
+        self.cancelled = provider.cancelled or threading.Event()
+        self._loop = loop
+        self._queue = queue
+        self._thread = threading.Thread(target=self._pump, name=f"provider-{provider.name}", daemon=True)
+        self._thread.start()
+
+    def _emit(self, kind: str, payload=None):
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, (self, kind, payload))
+        except RuntimeError:
+            # The loop is already closed: the race is over
+            pass
+
+    def _pump(self):
+        stream = None
+        try:
+            stream = self.provider.stream()
+            for chunk in stream:
+                if self.cancelled.is_set():
+                    return
+                if chunk:
+                    self._emit("chunk", chunk)
+            self._emit("done")
+        except Exception as e:
+            self._emit("error", e)
+        finally:
+            if stream is not None and hasattr(stream, 'close'):
+                try:
+                    stream.close()
+                except Exception:
+                    pass
+
+    def cancel(self):
+        self.cancelled.set()
+
+    @property
+    def deadline_at(self) -> float:
+        return self.started + self.provider.deadline
+
+
+class ProviderOrchestrator:
+    """Races providers with hedging: the next one starts after a delay or a failure,
+    the first to produce a token wins and the rest are cancelled. Providers whose
+    circuit breaker is open are skipped without being called."""
+
+    def __init__(self, hedge_delay: float = 3.0,
+                 on_failure: Optional[Callable[[str, BaseException], None]] = None,
+                 breakers: Optional[BreakerBoard] = None):
+        self.hedge_delay = hedge_delay
+        self.on_failure = on_failure
+        self.breakers = breakers
+
+    async def astream(self, providers: Sequence[Provider]) -> AsyncIterator[Tuple[str, str]]:
+        """Yield (provider name, chunk) from whichever provider answers first"""
+        if not providers:
+            raise AllProvidersFailed({})
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        pending = list(providers)
+        runs: List[_Run] = []
+        errors: Dict[str, BaseException] = {}
+        winner: Optional[_Run] = None
+        next_hedge_at = 0.0
+
+        def breaker_for(provider: Provider):
+            return self.breakers.get(provider.name) if self.breakers is not None else None
+
+        def launch_next():
+            nonlocal next_hedge_at
+            while pending:
+                provider = pending.pop(0)
+                breaker = breaker_for(provider)
+                if breaker is not None and not breaker.allow():
+                    errors[provider.name] = CircuitOpenError(f"{provider.name} circuit is open")
+                    continue
+                runs.append(_Run(provider, loop, queue))
+                next_hedge_at = time.monotonic() + self.hedge_delay
+                return
+
+        def fail(run: _Run, error: BaseException):
+            run.finished = True
+            run.cancel()
+            errors[run.provider.name] = error
+            breaker = breaker_for(run.provider)
+            if breaker is not None:
+                breaker.record_failure(time.monotonic() - run.started, error)
+            if self.on_failure:
+                self.on_failure(run.provider.name, error)
+            # A failure hands over to the next provider immediately
+            if not any(not r.finished for r in runs):
+                launch_next()
+
+        launch_next()
+        try:
+            while True:
+                if winner is None and all(r.finished for r in runs) and not pending:
+                    raise AllProvidersFailed(errors)
+
+                timeout = None
+                if winner is None:
+                    now = time.monotonic()
+                    wakeups = [r.deadline_at for r in runs if not r.finished]
+                    if pending:
+                        wakeups.append(next_hedge_at)
+                    timeout = max(0.0, min(wakeups) - now) if wakeups else None
+
+                try:
+                    run, kind, payload = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    now = time.monotonic()
+                    for r in runs:
+                        if not r.finished and now >= r.deadline_at:
+                            fail(r, TimeoutError(f"no response within {r.provider.deadline:.1f}s"))
+                    if pending and now >= next_hedge_at:
+                        launch_next()
+                    continue
+
+                if winner is not None and run is not winner:
+                    continue
+                if run.finished:
+                    continue
+
+                if kind == "chunk":
+                    if winner is None:
+                        winner = run
+                        for other in runs:
+                            if other is not run:
+                                other.cancel()
+                    yield run.provider.name, payload
+                elif kind == "done":
+                    if winner is run:
+                        run.finished = True
+                        breaker = breaker_for(run.provider)
+                        if breaker is not None:
+                            breaker.record_success(time.monotonic() - run.started)
+                        return
+                    fail(run, RuntimeError("empty response"))
+                else:
+                    if winner is run:
+                        run.finished = True
+                        breaker = breaker_for(run.provider)
+                        if breaker is not None:
+                            breaker.record_failure(time.monotonic() - run.started, payload)
+                        raise payload
+                    fail(run, payload)
+        finally:
+            for run in runs:
+                run.cancel()
+                breaker = breaker_for(run.provider)
+                if breaker is not None and not run.finished:
+                    # Cancelled losers have no outcome; free any half-open trial slot
+                    breaker.release()
+
+    def stream(self, providers: Sequence[Provider]) -> Iterator[Tuple[str, str]]:
+        """Synchronous wrapper around astream for callers without an event loop"""
+        loop = asyncio.new_event_loop()
+        agen = self.astream(providers)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            loop.run_until_complete(agen.aclose())
+            loop.close()
@@ -0,0 +1,142 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from expense_cache import TTLLRUCache
+from shared_cache import SHARED_CACHE_DB
+
+logger = logging.getLogger("expense_chatbot")
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case a question, collapse whitespace and drop trailing punctuation"""
+    return re.sub(r'[\s?.!]+$', '', ' '.join(query.lower().split()))
+
+
+def response_key(query: str, user_type: str, context: str = "") -> str:
+    """Cache key: normalized query + user type + fingerprint of the expense context"""
+    context_hash = hashlib.sha256((context or "").encode('utf-8')).hexdigest()
+    raw = f"{normalize_query(query)}\x1f{user_type}\x1f{context_hash}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Bounded in-memory cache of generated answers with optional SQLite persistence"""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 24 * 3600,
+                 db_path: Optional[str] = None, max_disk_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self._memory = TTLLRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.disk_hits = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        if db_path:
+            try:
+                self._open_db(db_path)
+            except sqlite3.Error as e:
+                # An unwritable path or locked file must not stop the app from starting
+                logger.warning("Response cache database %s unavailable, caching in memory only: %s", db_path, e)
+                if self._db is not None:
+                    self._db.close()
+                self._db = None
+
+    def _open_db(self, db_path: str):
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+        with self._db_lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+
+    def get(self, query: str, user_type: str, context: str = "") -> Optional[str]:
+        """Return a cached answer, checking memory first and then disk"""
+        key = response_key(query, user_type, context)
+        response = self._memory.get_item(key)
+        if response is not None or self._db is None:
+            return response
+
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT response, expires_at FROM responses WHERE key = ? AND expires_at > ?",
+                    (key, time.time()),
+                ).fetchone()
+        except sqlite3.Error as e:
+            # Other workers may hold the write lock; treat it as a miss
+            logger.warning("Response cache read failed: %s", e)
+            return None
+        if row is None:
+            return None
+
+        response, expires_at = row
+        self.disk_hits += 1
+        self._memory.set_item(key, response, ttl_seconds=expires_at - time.time())
+        return response
+
+    def set(self, query: str, user_type: str, context: str, response: str):
+        """Remember an answer in memory and, when enabled, on disk"""
+        key = response_key(query, user_type, context)
+        self._memory.set_item(key, response)
+        if self._db is None:
+            return
+
+        now = time.time()
+        try:
+            with self._db_lock, self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, expires_at, created_at) VALUES (?, ?, ?, ?)",
+                    (key, response, now + self.ttl_seconds, now),
+                )
+                # Keep the table bounded by dropping the oldest answers
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,),
+                )
+        except sqlite3.Error as e:
+            logger.warning("Response cache write failed: %s", e)
+
+    def clear(self):
+        self._memory.clear()
+        if self._db is not None:
+            try:
+                with self._db_lock, self._db:
+                    self._db.execute("DELETE FROM responses")
+            except sqlite3.Error as e:
+                logger.warning("Response cache clear failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate metrics across the memory and disk tiers"""
+        stats = self._memory.stats()
+        # A disk hit is recorded as a memory miss first
+        hits = stats["hits"] + self.disk_hits
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "memory_hits": stats["hits"],
+            "disk_hits": self.disk_hits,
+            "hits": hits,
+            "misses": lookups - hits,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "persistent": self._db is not None,
+        })
+        return stats
+
+
+# Shared by every session; set RESPONSE_CACHE_DB to persist answers across restarts.
+# Without it, SHARED_CACHE_DB shares answers between worker processes.
+response_cache = ResponseCache(
+    max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', '512')),
+    ttl_seconds=float(os.getenv('RESPONSE_CACHE_TTL', str(24 * 3600))),
+    db_path=os.getenv('RESPONSE_CACHE_DB') or SHARED_CACHE_DB,
+)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Run several chatbot worker processes that share one cache file, so user
+sessions stop contending for a single Python process and GIL:
+
+    python run_workers.py --workers 4                   # Streamlit on ports 8502-8505
+    python run_workers.py --workers 4 --nginx > chatbot.conf
+    python run_workers.py --api --workers 4 --port 8000 # the HTTP API under uvicorn
+
+A Streamlit session stays on one process over its websocket, so put a proxy with
+sticky sessions in front of the Streamlit workers; --nginx prints an upstream
+and server block (for nginx's http section) that pins each client IP to a worker.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import List
+
+from inference_pool import pool_size_per_process
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DB = os.path.join(HERE, '.cache', 'shared-cache.db')
+DEFAULT_WORKERS = int(os.getenv('WORKERS', str(os.cpu_count() or 1)))
+
+
+def nginx_config(listen_port: int, worker_ports: List[int]) -> str:
+    servers = "\n".join(f"    server 127.0.0.1:{port};" for port in worker_ports)
+    return f"""upstream chatbot_workers {{
+    ip_hash;
+{servers}
+}}
+
+server {{
+    listen {listen_port};
+
+    location / {{
+        proxy_pass http://chatbot_workers;
+        proxy_http_version 1.1;
+        proxy_set_header Upgrade $http_upgrade;
+        proxy_set_header Connection "upgrade";
+        proxy_set_header Host $host;
+        proxy_read_timeout 86400;
+    }}
+}}
+"""
+
+
+def worker_env(cache_db: str, workers: int) -> dict:
+    os.makedirs(os.path.dirname(os.path.abspath(cache_db)), exist_ok=True)
+    env = dict(os.environ, SHARED_CACHE_DB=cache_db)
+    # With HF_PROCESS_POOL every worker starts its own model processes; split the cores between them
+    env.setdefault('HF_POOL_SIZE', str(pool_size_per_process(workers)))
+    return env
+
+
+def run_streamlit_workers(ports: List[int], env: dict) -> int:
+    processes = [
+        subprocess.Popen([sys.executable, '-m', 'streamlit', 'run', os.path.join(HERE, 'app.py'),
+                          '--server.port', str(port), '--server.headless', 'true'], cwd=HERE, env=env)
+        for port in ports
+    ]
+    print(f"🚀 {len(processes)} Streamlit workers on ports {ports[0]}-{ports[-1]}, "
+          f"sharing {env['SHARED_CACHE_DB']}")
+    try:
+        # A worker that exits takes the group down, so a process manager can restart it
+        while all(process.poll() is None for process in processes):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in processes:
+            process.wait()
+    return max(process.returncode or 0 for process in processes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Worker processes (default: CPU cores)")
+    parser.add_argument('--port', type=int, default=8501,
+                        help="Proxy port for Streamlit (workers use the ports after it), or the API port")
+    parser.add_argument('--api', action='store_true', help="Run the HTTP API (api.py) instead of Streamlit")
+    parser.add_argument('--cache-db', default=os.getenv('SHARED_CACHE_DB') or DEFAULT_CACHE_DB,
+                        help="SQLite file the workers share caches through")
+    parser.add_argument('--nginx', action='store_true', help="Print an nginx config for the Streamlit workers and exit")
+    args = parser.parse_args()
+
+    worker_ports = [args.port + 1 + i for i in range(args.workers)]
+    if args.nginx:
+        print(nginx_config(args.port, worker_ports))
+        sys.exit(0)
+
+    env = worker_env(args.cache_db, args.workers)
+    if args.api:
+        sys.exit(subprocess.call([sys.executable, os.path.join(HERE, 'api.py'), '--port', str(args.port),
+                                  '--workers', str(args.workers)], cwd=HERE, env=env))
+    sys.exit(run_streamlit_workers(worker_ports, env))
@@ -0,0 +1,224 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger("expense_chatbot")
+
+# One SQLite file shared by every worker process on the host; unset keeps caches per process
+SHARED_CACHE_DB = os.getenv('SHARED_CACHE_DB') or None
+
+
+def encode_key(key: Hashable) -> str:
+    return json.dumps(key, separators=(',', ':'))
+
+
+def decode_key(raw: str) -> Hashable:
+    key = json.loads(raw)
+    return tuple(key) if isinstance(key, list) else key
+
+
+class SharedCache:
+    """TTL cache of JSON values in a SQLite file in WAL mode, so several worker processes share it.
+
+    Mirrors TTLLRUCache's get_item/set_item interface. Keys are JSON-encodable
+    (tuples come back as tuples); each namespace is bounded to max_entries,
+    dropping the oldest writes first. Expiry uses wall-clock time, which every
+    process agrees on. A busy or broken database only costs cache misses, never
+    a failed request.
+
+    Generation counters, kept apart from the entries so they are never evicted,
+    tell each process when another one invalidated a key's data, so it can drop
+    its own local copies too.
+    """
+
+    def __init__(self, db_path: str, namespace: str, max_entries: int = 1024, ttl_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.time):
+        self.db_path = db_path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # A connection must not cross a fork, so each process opens its own
+        if self._db is None or self._pid != os.getpid():
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5.0)
+            self._pid = os.getpid()
+            with self._db:
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS cache_entries ("
+                    " namespace TEXT NOT NULL,"
+                    " key TEXT NOT NULL,"
+                    " value TEXT NOT NULL,"
+                    " expires_at REAL NOT NULL,"
+                    " written_at REAL NOT NULL,"
+                    " PRIMARY KEY (namespace, key))"
+                )
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS cache_generations ("
+                    " namespace TEXT NOT NULL,"
+                    " key TEXT NOT NULL,"
+                    " generation INTEGER NOT NULL,"
+                    " PRIMARY KEY (namespace, key))"
+                )
+        return self._db
+
+    def get_item(self, key: Hashable) -> Optional[Any]:
+        """Return a fresh value written by any process, or None on a miss"""
+        found = self.get_with_age(key)
+        return None if found is None else found[0]
+
+    def get_with_age(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """(value, seconds since it was written), or None on a miss"""
+        with self._lock:
+            now = self._clock()
+            try:
+                row = self._connection().execute(
+                    "SELECT value, written_at FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+                    (self.namespace, encode_key(key), now),
+                ).fetchone()
+            except sqlite3.Error as e:
+                self._failed("read", e)
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0]), max(0.0, now - row[1])
+
+    def set_item(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a value for every process, dropping the oldest entries when full"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        raw = json.dumps(value, separators=(',', ':'))
+        with self._lock:
+            now = self._clock()
+            try:
+                db = self._connection()
+                with db:
+                    db.execute(
+                        "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, written_at)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        (self.namespace, encode_key(key), raw, now + ttl, now),
+                    )
+                    db.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+                        " SELECT key FROM cache_entries WHERE namespace = ?"
+                        " ORDER BY written_at DESC LIMIT -1 OFFSET ?)",
+                        (self.namespace, self.namespace, self.max_entries),
+                    )
+            except sqlite3.Error as e:
+                self._failed("write", e)
+
+    def generation(self, key: Hashable) -> Optional[int]:
+        """How many times a key has been invalidated, or None if the database cannot be read"""
+        with self._lock:
+            try:
+                row = self._connection().execute(
+                    "SELECT generation FROM cache_generations WHERE namespace = ? AND key = ?",
+                    (self.namespace, encode_key(key)),
+                ).fetchone()
+            except sqlite3.Error as e:
+                self._failed("read", e)
+                return None
+        return 0 if row is None else row[0]
+
+    def bump_generation(self, key: Hashable) -> Optional[int]:
+        """Advance a key's generation for every process; returns the new one, or None on failure"""
+        with self._lock:
+            try:
+                db = self._connection()
+                with db:
+                    # One statement, so concurrent bumps from several processes are never lost
+                    db.execute(
+                        "INSERT INTO cache_generations (namespace, key, generation) VALUES (?, ?, 1)"
+                        " ON CONFLICT (namespace, key) DO UPDATE SET generation = generation + 1",
+                        (self.namespace, encode_key(key)),
+                    )
+                    row = db.execute(
+                        "SELECT generation FROM cache_generations WHERE namespace = ? AND key = ?",
+                        (self.namespace, encode_key(key)),
+                    ).fetchone()
+            except sqlite3.Error as e:
+                self._failed("write", e)
+                return None
+        return row[0]
+
+    def _failed(self, operation: str, error: sqlite3.Error):
+        self.errors += 1
+        logger.warning("Shared cache %s failed for %s: %s", operation, self.namespace, error)
+
+    def remove_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches, in every process; returns how many were removed"""
+        with self._lock:
+            try:
+                db = self._connection()
+                rows = db.execute("SELECT key FROM cache_entries WHERE namespace = ?", (self.namespace,)).fetchall()
+                stale = [(self.namespace, raw) for (raw,) in rows if predicate(decode_key(raw))]
+                with db:
+                    db.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", stale)
+            except sqlite3.Error as e:
+                self._failed("delete", e)
+                return 0
+        return len(stale)
+
+    def keys(self) -> List[Hashable]:
+        """Keys currently held, oldest first; expired entries may still be listed"""
+        with self._lock:
+            try:
+                rows = self._connection().execute(
+                    "SELECT key FROM cache_entries WHERE namespace = ? ORDER BY written_at", (self.namespace,)
+                ).fetchall()
+            except sqlite3.Error as e:
+                self._failed("read", e)
+                rows = []
+        return [decode_key(raw) for (raw,) in rows]
+
+    def clear(self):
+        with self._lock:
+            try:
+                db = self._connection()
+                with db:
+                    db.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+            except sqlite3.Error as e:
+                self._failed("delete", e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of this process, and the namespace's size across all of them (None if unreadable)"""
+        with self._lock:
+            try:
+                size = self._connection().execute(
+                    "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+                ).fetchone()[0]
+            except sqlite3.Error as e:
+                self._failed("read", e)
+                size = None
+            lookups = self.hits + self.misses
+            return {
+                "size": size,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "errors": self.errors,
+                "shared": True,
+            }
+
+
+def shared_cache(namespace: str, max_entries: int, ttl_seconds: float,
+                 db_path: Optional[str] = SHARED_CACHE_DB) -> Optional[SharedCache]:
+    """A namespace of the shared store, or None when SHARED_CACHE_DB is not set"""
+    if not db_path:
+        return None
+    return SharedCache(db_path, namespace, max_entries=max_entries, ttl_seconds=ttl_seconds)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Report where chatbot start-up time goes, using Python's -X importtime:
+
+    python startup_report.py                # import app.py, show the slowest packages
+    python startup_report.py --top 25 --module app_simple
+    python startup_report.py --json > startup.json
+
+Run it before and after a change to catch cold-start regressions.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+
+def measure_imports(module: str) -> Tuple[float, List[Tuple[str, int, int]]]:
+    """Import a module in a fresh interpreter; return wall time and (name, self_us, cumulative_us) rows"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get('PYTHONPATH')])))
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=here, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        raise RuntimeError(f"Importing {module} failed:\n" + "\n".join(errors[-10:]))
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return wall, rows
+
+
+def by_package(rows: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    """Sum self time per top-level package, in microseconds"""
+    totals: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        totals[name.strip().split('.')[0]] += self_us
+    return dict(totals)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Break down chatbot import time by package")
+    parser.add_argument('--module', default='app', help="Module to import (default: app)")
+    parser.add_argument('--top', type=int, default=15, help="Number of packages to show")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    wall, rows = measure_imports(args.module)
+    packages = sorted(by_package(rows).items(), key=lambda item: item[1], reverse=True)
+    total_us = sum(self_us for _, self_us, _ in rows)
+
+    if args.json:
+        print(json.dumps({
+            "module": args.module,
+            "wall_seconds": round(wall, 3),
+            "import_seconds": round(total_us / 1e6, 3),
+            "packages": {name: round(us / 1e6, 4) for name, us in packages[:args.top]},
+        }, indent=2))
+    else:
+        print(f"⏱️  Start-up report for `import {args.module}`")
+        print(f"  Interpreter wall time: {wall:.2f}s")
+        print(f"  Time spent importing:  {total_us / 1e6:.2f}s across {len(rows)} modules\n")
+        for name, us in packages[:args.top]:
+            share = us / total_us * 100 if total_us else 0
+            print(f"  {name:<28} {us / 1000:9.1f} ms  {share:5.1f}%")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Express expense API, for exercising the chatbot without
+the real backend. Serves synthetic expenses per token:
+
+    python stub_backend.py --port 5000 --expenses-per-year 5000
+
+then point the chatbot at it with BACKEND_API_URL=http://127.0.0.1:5000
+"""
+
+import argparse
+import gzip
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+EXPENSE_NAMES = [
+    'Grocery shopping', 'Restaurant dinner', 'Food delivery', 'Bus pass', 'Taxi ride',
+    'Fuel refill', 'Rent', 'Electricity bill', 'Utilities', 'Movie tickets',
+    'Books', 'Mobile recharge', 'Gym membership', 'Medicine', 'Online shopping',
+]
+
+ANNUAL_PATH = re.compile(r'^/api/expenses/annual/(\d{4})$')
+MONTH_PATH = re.compile(r'^/api/expenses/(\d{4})/(\d{1,2})$')
+
+
+def generate_month(token: str, year: int, month: int, count: int) -> List[Dict]:
+    """Deterministic synthetic expenses for one user and month"""
+    rng = random.Random(f"{token}:{year}:{month}")
+    return [
+        {
+            '_id': f"{year}{month:02d}{i:08d}",
+            'year': year,
+            'month': month,
+            'date': rng.randint(1, 28),
+            'name': rng.choice(EXPENSE_NAMES),
+            'amount': round(rng.uniform(20, 5000), 2),
+        }
+        for i in range(count)
+    ]
+
+
+class StubBackend:
+    """Threaded HTTP server mimicking /api/expenses with injectable latency and failures"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0,
+                 expenses_per_year: int = 1200, latency: float = 0.0,
+                 fail_first: int = 0, fail_status: int = 503):
+        self.expenses_per_year = expenses_per_year
+        self.latency = latency
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._payloads: Dict[tuple, bytes] = {}
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def month_payload(self, token: str, year: int, month: int) -> List[Dict]:
+        per_month = self.expenses_per_year // 12 + (1 if month < self.expenses_per_year % 12 else 0)
+        return generate_month(token, year, month, per_month)
+
+    def annual_payload(self, token: str, year: int) -> Dict[str, List[Dict]]:
+        payload = {}
+        for month in range(12):
+            expenses = self.month_payload(token, year, month)
+            if expenses:
+                payload[str(month)] = expenses
+        return payload
+
+    def _encoded(self, key: tuple, build) -> bytes:
+        # Synthetic data is deterministic, so encode each payload only once
+        body = self._payloads.get(key)
+        if body is None:
+            body = json.dumps(build()).encode('utf-8')
+            self._payloads[key] = body
+        return body
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, compress: bool = False):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                if compress:
+                    body = gzip.compress(body, compresslevel=5)
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.request_count += 1
+                    should_fail = stub.request_count <= stub.fail_first
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if should_fail:
+                    self._send(stub.fail_status, b'{"message": "Injected failure"}')
+                    return
+
+                auth = self.headers.get('Authorization', '')
+                if not auth.startswith('Bearer ') or len(auth) <= len('Bearer '):
+                    self._send(401, b'{"message": "No token, authorization denied"}')
+                    return
+                token = auth[len('Bearer '):]
+                compress = 'gzip' in self.headers.get('Accept-Encoding', '')
+
+                annual = ANNUAL_PATH.match(self.path)
+                if annual:
+                    year = int(annual.group(1))
+                    body = stub._encoded((token, year, None), lambda: stub.annual_payload(token, year))
+                    self._send(200, body, compress)
+                    return
+
+                monthly = MONTH_PATH.match(self.path)
+                if monthly:
+                    year, month = int(monthly.group(1)), int(monthly.group(2))
+                    if month > 11:
+                        self._send(400, b'{"message": "Invalid year or month"}')
+                        return
+                    body = stub._encoded((token, year, month), lambda: stub.month_payload(token, year, month))
+                    self._send(200, body, compress)
+                    return
+
+                self._send(404, b'{"message": "Not found"}')
+
+        return Handler
+
+    def start(self) -> 'StubBackend':
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> 'StubBackend':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub expense tracker backend")
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--expenses-per-year', type=int, default=1200)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--fail-first', type=int, default=0, help="Answer the first N requests with --fail-status")
+    parser.add_argument('--fail-status', type=int, default=503)
+    args = parser.parse_args()
+
+    stub = StubBackend(port=args.port, expenses_per_year=args.expenses_per_year,
+                       latency=args.latency, fail_first=args.fail_first, fail_status=args.fail_status)
+    print(f"🧪 Stub backend listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
@@ -0,0 +1,75 @@
+import os
+import sys
+from typing import Dict, List, Tuple
+
+import pytest
+
+# The chatbot modules import each other by name, as they do when run from chatbot/
+CHATBOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if CHATBOT_DIR not in sys.path:
+    sys.path.insert(0, CHATBOT_DIR)
+
+from backend_client import BackendClient  # noqa: E402
+from shared_cache import SharedCache  # noqa: E402
+from stub_backend import StubBackend  # noqa: E402
+
+
+class EditableBackend(StubBackend):
+    """StubBackend whose months can gain expenses, as when a user adds one in the app"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.added: Dict[Tuple[str, int, int], List[Dict]] = {}
+
+    def add_expense(self, token: str, year: int, month: int, expense: Dict):
+        self.added.setdefault((token, year, month), []).append(expense)
+        # Payloads are encoded once per key; drop them so the next request sees the change
+        self._payloads.clear()
+
+    def month_payload(self, token: str, year: int, month: int) -> List[Dict]:
+        return super().month_payload(token, year, month) + self.added.get((token, year, month), [])
+
+
+class FakeClock:
+    """A monotonic clock the test moves by hand"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def backend():
+    with EditableBackend(expenses_per_year=120) as stub:
+        yield stub
+
+
+@pytest.fixture
+def client(backend):
+    # No retries or backoff, so injected failures surface at once
+    client = BackendClient(backend.url, max_retries=0, backoff_factor=0)
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def shared_db(tmp_path):
+    return str(tmp_path / "shared-cache.db")
+
+
+@pytest.fixture
+def make_shared(shared_db):
+    """Opens a namespace of one SQLite file the way each worker process would"""
+    def make(namespace: str, max_entries: int = 1024, ttl_seconds: float = 3600.0) -> SharedCache:
+        return SharedCache(shared_db, namespace, max_entries=max_entries, ttl_seconds=ttl_seconds)
+    return make
@@ -0,0 +1,21 @@
+"""Model loaders for InferencePool tests; worker processes are spawned, so they must be importable"""
+
+import time
+
+
+def counting(delay: float = 0.05):
+    """Yields payload["n"] tokens, one every `delay` seconds, and logs each request it starts"""
+    def generate(payload, cancelled):
+        if payload.get("log"):
+            with open(payload["log"], "a") as log:
+                log.write(payload.get("tag", "") + "\n")
+        for index in range(payload.get("n", 1)):
+            if cancelled():
+                return
+            time.sleep(payload.get("delay", delay))
+            yield f"t{index} "
+    return generate
+
+
+def broken():
+    raise RuntimeError("no model")
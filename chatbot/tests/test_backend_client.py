@@ -0,0 +1,61 @@
+import pytest
+import requests
+
+from backend_client import BackendClient, get_backend_client
+from stub_backend import StubBackend
+
+
+def test_retries_transient_failures():
+    with StubBackend(fail_first=2, fail_status=503) as stub:
+        client = BackendClient(stub.url, max_retries=3, backoff_factor=0)
+        response = client.get("/api/expenses/2024/3", "token")
+
+        assert response.status_code == 200
+        assert stub.request_count == 3
+
+
+def test_retries_rate_limiting():
+    with StubBackend(fail_first=1, fail_status=429) as stub:
+        client = BackendClient(stub.url, max_retries=1, backoff_factor=0)
+        assert client.get("/api/expenses/2024/3", "token").status_code == 200
+        assert stub.request_count == 2
+
+
+def test_gives_up_after_max_retries():
+    with StubBackend(fail_first=10, fail_status=502) as stub:
+        client = BackendClient(stub.url, max_retries=2, backoff_factor=0)
+        response = client.get("/api/expenses/2024/3", "token")
+
+        assert response.status_code == 502
+        assert stub.request_count == 3
+        with pytest.raises(requests.HTTPError):
+            client.get_json("/api/expenses/2024/3", "token")
+
+
+def test_client_errors_are_not_retried():
+    with StubBackend() as stub:
+        client = BackendClient(stub.url, max_retries=3, backoff_factor=0)
+
+        assert client.get("/api/expenses/2024/3").status_code == 401
+        assert client.get("/api/unknown", "token").status_code == 404
+        assert stub.request_count == 2
+
+
+def test_decodes_gzip_responses(backend, client):
+    response = client.get("/api/expenses/annual/2024", "token")
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.json() == backend.annual_payload("token", 2024)
+    assert len(response.content) > int(response.headers["Content-Length"])
+
+
+def test_read_timeout_is_enforced():
+    with StubBackend(latency=1.0) as stub:
+        client = BackendClient(stub.url, read_timeout=0.2, max_retries=0)
+        with pytest.raises(requests.ConnectionError):
+            client.get("/api/expenses/2024/3", "token")
+
+
+def test_one_client_per_backend_url():
+    assert get_backend_client("http://backend.test") is get_backend_client("http://backend.test")
+    assert get_backend_client("http://backend.test") is not get_backend_client("http://other.test")
@@ -0,0 +1,171 @@
+import sqlite3
+
+from expense_cache import ExpenseDataCache, TTLLRUCache, hash_token
+from response_cache import ResponseCache
+from shared_cache import SharedCache
+
+
+def test_lru_evicts_least_recently_used(clock):
+    cache = TTLLRUCache(max_entries=2, ttl_seconds=60, clock=clock)
+    cache.set_item("a", 1)
+    cache.set_item("b", 2)
+    assert cache.get_item("a") == 1
+    cache.set_item("c", 3)
+
+    assert cache.get_item("b") is None
+    assert cache.get_item("a") == 1 and cache.get_item("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = TTLLRUCache(max_entries=8, ttl_seconds=60, clock=clock)
+    cache.set_item("default", 1)
+    cache.set_item("short", 2, ttl_seconds=5)
+
+    clock.advance(10)
+    assert cache.get_item("short") is None
+    assert cache.get_item("default") == 1
+    clock.advance(60)
+    assert cache.get_item("default") is None
+
+    stats = cache.stats()
+    assert stats["expirations"] == 2
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_remove_where_drops_matching_keys():
+    cache = TTLLRUCache()
+    for key in [("a", 1), ("a", 2), ("b", 1)]:
+        cache.set_item(key, True)
+    assert cache.remove_where(lambda key: key[0] == "a") == 2
+    assert cache.keys() == [("b", 1)]
+
+
+def test_expense_cache_keys_by_token_hash():
+    cache = ExpenseDataCache()
+    cache.set("secret-token", 2024, 3, {"3": []})
+    assert cache.get("secret-token", 2024, 3) == {"3": []}
+    assert cache.get("other-token", 2024, 3) is None
+    assert all("secret-token" not in key for key in cache.keys())
+    assert cache.keys()[0][0] == hash_token("secret-token")
+
+
+def test_invalidating_a_month_drops_its_year_too():
+    cache = ExpenseDataCache()
+    cache.set("t", 2024, None, {"annual": True})
+    cache.set("t", 2024, 3, {"march": True})
+    cache.set("t", 2024, 4, {"april": True})
+    cache.set("t", 2023, None, {"last year": True})
+
+    assert cache.invalidate("t", 2024, 3) == 2
+    assert cache.get("t", 2024) is None and cache.get("t", 2024, 3) is None
+    assert cache.get("t", 2024, 4) == {"april": True}
+    assert cache.get("t", 2023) == {"last year": True}
+
+
+def test_expense_cache_finds_other_workers_entries(make_shared):
+    first = ExpenseDataCache(shared=make_shared("expenses"))
+    second = ExpenseDataCache(shared=make_shared("expenses"))
+    first.set("t", 2024, 3, {"3": [{"amount": 5}]})
+
+    assert second.get("t", 2024, 3) == {"3": [{"amount": 5}]}
+
+
+def test_invalidation_reaches_other_workers_local_copies(make_shared):
+    first = ExpenseDataCache(shared=make_shared("expenses"))
+    second = ExpenseDataCache(shared=make_shared("expenses"))
+    first.set("t", 2024, 3, {"version": 1})
+    assert second.get("t", 2024, 3) == {"version": 1}
+
+    first.invalidate("t", 2024, 3)
+    # The second worker's local copy predates the invalidation
+    assert second.get("t", 2024, 3) is None
+
+    first.set("t", 2024, 3, {"version": 2})
+    assert second.get("t", 2024, 3) == {"version": 2}
+    assert first.get("t", 2024, 3) == {"version": 2}
+
+
+def test_invalidating_one_user_keeps_other_users_local_copies(make_shared):
+    first = ExpenseDataCache(shared=make_shared("expenses"))
+    second = ExpenseDataCache(shared=make_shared("expenses"))
+    second.set("other", 2024, 3, {"kept": True})
+
+    first.invalidate("t")
+    assert second.get("other", 2024, 3) == {"kept": True}
+
+
+def test_shared_generation_counts_invalidations(make_shared):
+    first, second = make_shared("expenses"), make_shared("expenses")
+    assert first.generation("user") == 0
+    assert first.bump_generation("user") == 1
+    assert second.bump_generation("user") == 2
+    assert first.generation("user") == 2
+    assert first.generation("someone else") == 0
+    assert make_shared("other namespace").generation("user") == 0
+
+
+def test_shared_cache_expires_by_wall_clock(shared_db, clock):
+    cache = SharedCache(shared_db, "expiry", ttl_seconds=60, clock=clock)
+    cache.set_item(("k", 1), [1, 2])
+    clock.advance(30)
+    assert cache.get_with_age(("k", 1)) == ([1, 2], 30)
+    clock.advance(31)
+    assert cache.get_item(("k", 1)) is None
+
+
+def test_shared_cache_is_bounded(make_shared):
+    cache = make_shared("bounded", max_entries=3)
+    for index in range(5):
+        cache.set_item(index, index)
+    assert sorted(cache.keys()) == [2, 3, 4]
+
+
+def test_locked_shared_cache_only_costs_misses(shared_db):
+    cache = SharedCache(shared_db, "locked")
+    cache.set_item("k", 1)
+    blocker = sqlite3.connect(shared_db, timeout=0)
+    blocker.execute("BEGIN EXCLUSIVE")
+    try:
+        # Make the wait for the lock short rather than the default five seconds
+        cache._connection().execute("PRAGMA busy_timeout = 10")
+        cache.set_item("k", 2)
+        assert cache.remove_where(lambda key: True) == 0
+        assert cache.bump_generation("user") is None
+    finally:
+        blocker.rollback()
+        blocker.close()
+    assert cache.stats()["errors"] >= 3
+    assert cache.get_item("k") == 1
+
+
+def test_expense_cache_invalidates_locally_when_shared_store_is_locked(shared_db):
+    cache = ExpenseDataCache(shared=SharedCache(shared_db, "expenses"))
+    cache.set("t", 2024, 3, {"v": 1})
+    blocker = sqlite3.connect(shared_db, timeout=0)
+    blocker.execute("BEGIN EXCLUSIVE")
+    try:
+        cache.shared._connection().execute("PRAGMA busy_timeout = 10")
+        cache.invalidate("t", 2024, 3)
+        assert cache.get_item(cache.make_key("t", 2024, 3)) is None
+    finally:
+        blocker.rollback()
+        blocker.close()
+
+
+def test_response_cache_falls_back_to_memory_when_db_cannot_open(tmp_path):
+    cache = ResponseCache(db_path=str(tmp_path / "missing" / "responses.db"))
+    cache.set("How do I save?", "general", "", "Save 20%.")
+
+    assert cache.get("how do i save", "general") == "Save 20%."
+    assert cache.stats()["persistent"] is False
+
+
+def test_response_cache_persists_answers(tmp_path):
+    path = str(tmp_path / "responses.db")
+    ResponseCache(db_path=path).set("How do I save?", "general", "ctx", "Save 20%.")
+
+    restarted = ResponseCache(db_path=path)
+    assert restarted.get("how do I save?", "general", "ctx") == "Save 20%."
+    assert restarted.get("how do I save?", "student", "ctx") is None
+    assert restarted.stats()["disk_hits"] == 1
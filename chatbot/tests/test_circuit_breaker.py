@@ -0,0 +1,94 @@
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, BreakerBoard, CircuitBreaker
+
+
+def make_breaker(clock, **options):
+    defaults = dict(window_size=4, min_calls=4, error_threshold=0.5, open_seconds=30)
+    defaults.update(options)
+    return CircuitBreaker("groq", clock=clock, **defaults)
+
+
+def test_opens_once_the_error_rate_crosses_the_threshold(clock):
+    breaker = make_breaker(clock)
+    breaker.record_success(0.1)
+    breaker.record_failure(0.1, "boom")
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+
+    breaker.record_failure(0.1, "boom")
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.snapshot()["last_error"] == "boom"
+
+
+def test_needs_min_calls_before_opening(clock):
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        breaker.record_failure(0.1)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_admits_limited_trial_calls(clock):
+    breaker = make_breaker(clock, half_open_max_calls=1)
+    for _ in range(4):
+        breaker.record_failure(0.1)
+
+    clock.advance(29)
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["retry_in"] == 1
+    clock.advance(1)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_successful_trial_closes_with_a_clean_window(clock):
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_failure(0.1)
+    clock.advance(30)
+    assert breaker.allow()
+
+    breaker.record_success(0.2)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["calls"] == 1
+    assert breaker.snapshot()["error_rate"] == 0
+
+
+def test_failed_trial_opens_again(clock):
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_failure(0.1)
+    clock.advance(30)
+    assert breaker.allow()
+
+    breaker.record_failure(0.1)
+    assert breaker.state == OPEN
+    clock.advance(29)
+    assert not breaker.allow()
+
+
+def test_released_trial_frees_its_slot(clock):
+    breaker = make_breaker(clock, half_open_max_calls=1)
+    for _ in range(4):
+        breaker.record_failure(0.1)
+    clock.advance(30)
+    assert breaker.allow()
+
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_slow_calls_count_as_failures(clock):
+    breaker = make_breaker(clock, slow_call_seconds=1.0)
+    for _ in range(4):
+        breaker.record_success(2.0)
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["last_error"] == "slow call (2.0s)"
+
+
+def test_board_keeps_one_breaker_per_provider():
+    board = BreakerBoard(min_calls=1)
+    assert board.get("groq") is board.get("groq")
+    board.get("groq").record_failure(0.1)
+    assert board.snapshot()["groq"]["state"] == OPEN
+    assert board.get("watson").state == CLOSED
@@ -0,0 +1,165 @@
+from datetime import date
+
+import pytest
+
+from expense_sync import IncrementalExpenseSync, SyncError
+
+TODAY = date(2024, 6, 15)
+# Months are zero-based, as in the backend API
+CURRENT_MONTH = TODAY.month - 1
+
+
+def make_sync(clock, **options):
+    defaults = dict(current_month_ttl=60, past_month_ttl=3600, max_month_requests=3)
+    defaults.update(options)
+    return IncrementalExpenseSync(clock=clock, today=lambda: TODAY, **defaults)
+
+
+def fail_from_now(backend):
+    backend.fail_first = backend.request_count + 1000
+    backend.fail_status = 500
+
+
+def test_first_sync_loads_the_year_in_one_request(backend, client, clock):
+    sync = make_sync(clock)
+    snapshot = sync.sync(client, "t", 2024)
+
+    assert snapshot.payload() == backend.annual_payload("t", 2024)
+    assert sync.stats()["requests"] == 1 and sync.stats()["full_loads"] == 1
+    assert snapshot.total == pytest.approx(sum(e["amount"] for month in snapshot.payload().values() for e in month))
+
+
+def test_fresh_snapshot_costs_no_requests(client, clock):
+    sync = make_sync(clock)
+    payload = sync.sync(client, "t", 2024).payload()
+    clock.advance(30)
+
+    assert sync.sync(client, "t", 2024).payload() is payload
+    assert sync.stats()["requests"] == 1
+
+
+def test_stale_current_month_is_refreshed_alone(backend, client, clock):
+    sync = make_sync(clock)
+    sync.sync(client, "t", 2024)
+    backend.add_expense("t", 2024, CURRENT_MONTH, {"name": "Coffee", "amount": 120})
+    clock.advance(61)
+
+    snapshot = sync.sync(client, "t", 2024)
+
+    assert sync.stats()["requests"] == 2 and sync.stats()["full_loads"] == 1
+    assert sync.stats()["months_changed"] == 1
+    assert snapshot.payload()[str(CURRENT_MONTH)][-1]["name"] == "Coffee"
+
+
+def test_future_months_are_not_refreshed_by_age(client, clock):
+    sync = make_sync(clock, past_month_ttl=10 ** 6)
+    sync.sync(client, "t", 2024)
+    clock.advance(61)
+    sync.sync(client, "t", 2024)
+
+    # Only the current month was due; July to December wait for an invalidation
+    assert sync.stats()["months_refreshed"] == 1
+
+
+def test_many_stale_months_reload_the_whole_year(client, clock):
+    sync = make_sync(clock)
+    sync.sync(client, "t", 2024)
+    clock.advance(3601)
+
+    sync.sync(client, "t", 2024)
+
+    assert sync.stats()["requests"] == 2
+    assert sync.stats()["full_loads"] == 2
+
+
+def test_invalidated_month_is_fetched_again(backend, client, clock):
+    sync = make_sync(clock)
+    sync.sync(client, "t", 2024)
+    backend.add_expense("t", 2024, 2, {"name": "Rent", "amount": 9000})
+
+    assert sync.invalidate("t", 2024, 2) == 1
+    snapshot = sync.sync(client, "t", 2024)
+
+    assert sync.stats()["requests"] == 2
+    assert snapshot.payload()["2"][-1]["name"] == "Rent"
+
+
+def test_invalidated_year_is_reloaded(client, clock):
+    sync = make_sync(clock)
+    sync.sync(client, "t", 2024)
+    sync.sync(client, "t", 2023)
+
+    assert sync.invalidate("t", 2024) == 1
+    sync.sync(client, "t", 2024)
+    sync.sync(client, "t", 2023)
+
+    assert sync.stats()["full_loads"] == 3
+
+
+def test_failed_refresh_keeps_the_cached_year(backend, client, clock):
+    sync = make_sync(clock)
+    payload = sync.sync(client, "t", 2024).payload()
+    fail_from_now(backend)
+    clock.advance(61)
+
+    assert sync.sync(client, "t", 2024).payload() is payload
+    clock.advance(3600)
+    assert sync.sync(client, "t", 2024).payload() is payload
+
+
+def test_failed_first_load_raises(backend, client, clock):
+    fail_from_now(backend)
+    with pytest.raises(SyncError):
+        make_sync(clock).sync(client, "t", 2024)
+
+
+def test_other_workers_months_cost_no_requests(client, clock, make_shared):
+    first = make_sync(clock, shared=make_shared("expense_months"))
+    second = make_sync(clock, shared=make_shared("expense_months"))
+    payload = first.sync(client, "t", 2024).payload()
+
+    assert second.sync(client, "t", 2024).payload() == payload
+    assert second.stats()["requests"] == 0
+    assert second.stats()["shared_months"] == 12
+
+
+def test_partial_shared_year_is_not_counted(client, clock, make_shared):
+    first = make_sync(clock, shared=make_shared("expense_months"))
+    first.sync(client, "t", 2024)
+    first.shared.remove_where(lambda key: key[3] == 5)
+
+    second = make_sync(clock, shared=make_shared("expense_months"))
+    second.sync(client, "t", 2024)
+
+    assert second.stats()["full_loads"] == 1
+    assert second.stats()["shared_months"] == 0
+
+
+def test_invalidation_reaches_other_workers_snapshots(backend, client, clock, make_shared):
+    first = make_sync(clock, shared=make_shared("expense_months"))
+    second = make_sync(clock, shared=make_shared("expense_months"))
+    first.sync(client, "t", 2024)
+    second.sync(client, "t", 2024)
+    backend.add_expense("t", 2024, 2, {"name": "Rent", "amount": 9000})
+
+    # The add landed on the second worker; the first one's snapshot is still fresh by age
+    second.invalidate("t", 2024, 2)
+    snapshot = first.sync(client, "t", 2024)
+
+    assert snapshot.payload()["2"][-1]["name"] == "Rent"
+    # Only the invalidated month is fetched; the others come from the shared cache
+    assert first.stats()["requests"] == 2
+    assert first.stats()["full_loads"] == 1
+
+
+def test_shared_generation_is_only_acted_on_once(client, clock, make_shared):
+    first = make_sync(clock, shared=make_shared("expense_months"))
+    second = make_sync(clock, shared=make_shared("expense_months"))
+    first.sync(client, "t", 2024)
+    second.invalidate("t", 2024, 2)
+
+    first.sync(client, "t", 2024)
+    refreshed = first.stats()["months_refreshed"]
+    first.sync(client, "t", 2024)
+
+    assert first.stats()["months_refreshed"] == refreshed
@@ -0,0 +1,208 @@
+import threading
+import time
+import types
+
+import pytest
+
+import chatbot_core
+import pool_loaders
+from inference_pool import InferencePool, InferencePoolBusy, default_pool_size, pool_size_per_process
+from inference_worker import MicroBatchWorker
+from prompt_templates import PrefixTokenCache
+
+
+def wait_until(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def pool():
+    pool = InferencePool(pool_loaders.counting, size=1, max_pending=2)
+    yield pool
+    pool.stop()
+
+
+def started_tags(log_path):
+    with open(log_path) as log:
+        return log.read().split()
+
+
+def test_pool_streams_tokens(pool):
+    assert "".join(pool.stream({"n": 3}, timeout=30)) == "t0 t1 t2 "
+    wait_until(lambda: pool.stats()["completed"] == 1)
+
+
+def test_full_pool_turns_requests_away(pool):
+    running = pool.stream({"n": 100}, timeout=30)
+    next(running)
+    queued = pool.stream({"n": 1}, timeout=30)
+    # A generator only queues its request once it is first read
+    reader = threading.Thread(target=lambda: list(queued), daemon=True)
+    reader.start()
+    wait_until(lambda: pool.stats()["submitted"] == 2)
+
+    with pytest.raises(InferencePoolBusy):
+        next(pool.stream({"n": 1}))
+    assert pool.stats()["rejected"] == 1
+
+    running.close()
+    reader.join(10)
+    # The places are free again once both requests are done
+    assert "".join(pool.stream({"n": 1}, timeout=30)) == "t0 "
+
+
+def test_cancel_event_drops_a_queued_request(pool, tmp_path):
+    log = str(tmp_path / "started.log")
+    running = pool.stream({"n": 10, "tag": "running", "log": log}, timeout=30)
+    next(running)
+    cancelled, received = threading.Event(), []
+    queued = pool.stream({"n": 10, "tag": "queued", "log": log}, timeout=30, cancelled=cancelled)
+    reader = threading.Thread(target=lambda: received.extend(queued), daemon=True)
+    reader.start()
+    wait_until(lambda: pool.stats()["submitted"] == 2)
+
+    cancelled.set()
+    reader.join(2)
+    assert not reader.is_alive() and received == []
+
+    assert len(list(running)) == 9
+    wait_until(lambda: pool.stats()["cancelled"] == 1)
+    assert started_tags(log) == ["running"]
+
+
+def test_cancel_event_stops_a_running_request(pool):
+    cancelled = threading.Event()
+    stream = pool.stream({"n": 1000}, timeout=30, cancelled=cancelled)
+    next(stream)
+    threading.Timer(0.2, cancelled.set).start()
+
+    assert len(list(stream)) < 20
+    wait_until(lambda: pool.stats()["cancelled"] == 1)
+    assert "".join(pool.stream({"n": 2}, timeout=30)) == "t0 t1 "
+
+
+def test_closing_a_stream_frees_its_worker(pool):
+    stream = pool.stream({"n": 1000}, timeout=30)
+    next(stream)
+    stream.close()
+
+    assert "".join(pool.stream({"n": 1}, timeout=30)) == "t0 "
+    assert pool.stats()["cancelled"] == 1
+
+
+def test_silent_worker_times_out(pool):
+    stream = pool.stream({"n": 2, "delay": 1.0}, timeout=0.3, cancelled=threading.Event())
+    with pytest.raises(TimeoutError):
+        next(stream)
+    # Timing out cancels the request, so the worker is soon free again
+    assert "".join(pool.stream({"n": 1}, timeout=30)) == "t0 "
+
+
+def test_pool_reports_a_model_that_cannot_load():
+    pool = InferencePool(pool_loaders.broken, size=1)
+    try:
+        wait_until(lambda: pool.error is not None)
+        with pytest.raises(RuntimeError, match="no model"):
+            next(pool.stream({"n": 1}))
+    finally:
+        pool.stop()
+
+
+def test_pool_size_is_split_across_processes():
+    assert default_pool_size(threads_per_worker=2, cpu_count=16) == 8
+    assert pool_size_per_process(4, cpu_count=16) == 2
+    assert pool_size_per_process(32, cpu_count=16) == 1
+
+
+def echo_batches(batches, delay=0.0):
+    def generate(batch):
+        batches.append([request.input_ids[0] for request in batch])
+        time.sleep(delay)
+        return [f"answer {request.input_ids[0]}" for request in batch]
+    return generate
+
+
+def test_micro_batch_worker_batches_concurrent_prompts():
+    batches = []
+    worker = MicroBatchWorker(echo_batches(batches), max_batch_size=4, max_wait=0.2)
+    try:
+        futures = [worker.submit([index]) for index in range(4)]
+        assert [future.result(5) for future in futures] == [f"answer {index}" for index in range(4)]
+        assert batches == [[0, 1, 2, 3]]
+        assert worker.stats()["batches"] == 1
+    finally:
+        worker.stop(5)
+
+
+def test_micro_batch_worker_drops_cancelled_prompts():
+    batches = []
+    worker = MicroBatchWorker(echo_batches(batches, delay=0.3), max_batch_size=1)
+    try:
+        busy = worker.submit([1])
+        wait_until(lambda: batches)
+        queued = worker.submit([2])
+        assert queued.cancel()
+        assert busy.result(5) == "answer 1"
+        assert worker.submit([3]).result(5) == "answer 3"
+        assert batches == [[1], [3]]
+    finally:
+        worker.stop(5)
+
+
+def test_batched_generation_leaves_the_queue_when_cancelled(monkeypatch):
+    batches = []
+    worker = MicroBatchWorker(echo_batches(batches, delay=0.3), max_batch_size=1)
+    monkeypatch.setattr(chatbot_core, "get_batch_worker", lambda name, factory: worker)
+    session = types.SimpleNamespace(hf_pipeline=types.SimpleNamespace(model=None), hf_tokenizer=None,
+                                    hf_lock=None, hf_model_name="gpt2")
+    try:
+        busy = worker.submit([1])
+        wait_until(lambda: batches)
+        cancelled, received = threading.Event(), []
+        reader = threading.Thread(daemon=True, target=lambda: received.extend(
+            chatbot_core.ExpenseChatbot.batched_huggingface_text(session, [2], cancelled)))
+        reader.start()
+        time.sleep(0.05)
+
+        cancelled.set()
+        reader.join(1)
+        assert not reader.is_alive() and received == []
+        assert busy.result(5) == "answer 1"
+        assert worker.submit([3]).result(5) == "answer 3"
+        assert batches == [[1], [3]]
+    finally:
+        worker.stop(5)
+
+
+def test_batched_generation_returns_the_answer(monkeypatch):
+    worker = MicroBatchWorker(echo_batches([]))
+    monkeypatch.setattr(chatbot_core, "get_batch_worker", lambda name, factory: worker)
+    session = types.SimpleNamespace(hf_pipeline=types.SimpleNamespace(model=None), hf_tokenizer=None,
+                                    hf_lock=None, hf_model_name="gpt2")
+    try:
+        assert list(chatbot_core.ExpenseChatbot.batched_huggingface_text(session, [7])) == ["answer 7"]
+    finally:
+        worker.stop(5)
+
+
+def test_pooled_generation_receives_the_cancel_event(monkeypatch):
+    calls = []
+
+    class RecordingPool:
+        def stream(self, payload, timeout=None, cancelled=None):
+            calls.append(cancelled)
+            yield "Here is a plan for your savings."
+
+    monkeypatch.setattr(chatbot_core, "prefix_tokens", PrefixTokenCache())
+    session = types.SimpleNamespace(hf_pipeline=object(), hf_pool=RecordingPool(), hf_model_name="gpt2",
+                                    hf_tokenizer=types.SimpleNamespace(encode=lambda text, **kwargs: [len(text)]))
+    cancelled = threading.Event()
+
+    answer = "".join(chatbot_core.ExpenseChatbot.stream_huggingface_response(session, "How do I save?",
+                                                                            cancelled=cancelled))
+    assert answer == "Here is a plan for your savings."
+    assert calls == [cancelled]
@@ -0,0 +1,75 @@
+import re
+
+import pytest
+
+from prompt_templates import TEMPLATES, PrefixTokenCache, get_template
+
+# GPT-2's pre-tokenizer with ASCII classes; byte-level BPE only merges within these pieces
+GPT2_PIECES = re.compile(r"""'s|'t|'re|'ve|'m|'ll|'d| ?[A-Za-z]+| ?[0-9]+| ?[^\sA-Za-z0-9]+|\s+(?!\S)|\s+""")
+
+
+class PieceTokenizer:
+    """One token id per pre-tokenized piece, which is enough to tell where a split changes the tokens"""
+
+    def __init__(self):
+        self.vocab = {}
+        self.calls = 0
+
+    def encode(self, text, add_special_tokens=True):
+        self.calls += 1
+        return [self.vocab.setdefault(piece, len(self.vocab)) for piece in GPT2_PIECES.findall(text)]
+
+
+QUERIES = [
+    ("How do I save 20% of my salary?", "", ""),
+    ("Explain budgets", "Total: ₹12,500 across 14 expenses", "User: hi\nAssistant: Hello!\n\n"),
+    ("  leading spaces and 'quotes' ", "", "User: what's rent?\n"),
+]
+
+
+@pytest.mark.parametrize("key", sorted(TEMPLATES))
+@pytest.mark.parametrize("query, context, history", QUERIES)
+def test_split_encoding_matches_whole_prompt(key, query, context, history):
+    tokenizer = PieceTokenizer()
+    template = TEMPLATES[key]
+
+    split = PrefixTokenCache().encode("gpt2", tokenizer, template, query, context, history)
+
+    assert split == tokenizer.encode(template.render(query, context, history))
+
+
+def test_prefix_ending_in_whitespace_would_not_split_cleanly():
+    tokenizer = PieceTokenizer()
+    whole = tokenizer.encode("Be helpful.\n\nUser")
+    assert tokenizer.encode("Be helpful.\n\n") + tokenizer.encode("User") != whole
+
+
+def test_prefix_is_encoded_once_per_model_and_template():
+    tokenizer = PieceTokenizer()
+    cache = PrefixTokenCache()
+    template = get_template("huggingface", "student")
+
+    cache.encode("gpt2", tokenizer, template, "first")
+    cache.encode("gpt2", tokenizer, template, "second")
+    cache.encode("distilgpt2", tokenizer, template, "third")
+
+    assert cache.stats() == {"prefixes": 2, "hits": 1, "misses": 2}
+    # Two prefixes plus three suffixes
+    assert tokenizer.calls == 5
+
+
+def test_unknown_user_type_falls_back_to_general():
+    assert get_template("groq", "pirate") is get_template("groq", "general")
+
+
+def test_split_matches_the_real_gpt2_tokenizer():
+    transformers = pytest.importorskip("transformers")
+    try:
+        tokenizer = transformers.AutoTokenizer.from_pretrained("gpt2", local_files_only=True)
+    except OSError:
+        pytest.skip("gpt2 tokenizer is not downloaded")
+
+    for template in TEMPLATES.values():
+        for query, context, history in QUERIES:
+            split = PrefixTokenCache().encode("gpt2", tokenizer, template, query, context, history)
+            assert split == tokenizer.encode(template.render(query, context, history), add_special_tokens=False)
@@ -0,0 +1,132 @@
+import threading
+import time
+
+import pytest
+
+from circuit_breaker import BreakerBoard, CircuitOpenError
+from fake_providers import DEFAULT_ANSWER, FakeProvider
+from provider_orchestrator import AllProvidersFailed, Provider, ProviderOrchestrator
+
+
+def race(orchestrator, providers):
+    """(winner, answer, seconds to the first chunk)"""
+    started = time.monotonic()
+    first_chunk_at = None
+    names, chunks = set(), []
+    for name, chunk in orchestrator.stream(providers):
+        if first_chunk_at is None:
+            first_chunk_at = time.monotonic() - started
+        names.add(name)
+        chunks.append(chunk)
+    assert len(names) == 1, "chunks from more than one provider"
+    return names.pop(), "".join(chunks), first_chunk_at
+
+
+def test_fast_primary_answers_alone():
+    primary, fallback = FakeProvider("huggingface"), FakeProvider("groq")
+    winner, answer, _ = race(ProviderOrchestrator(hedge_delay=1.0),
+                             [primary.as_provider(), fallback.as_provider()])
+
+    assert winner == "huggingface"
+    assert answer.strip() == DEFAULT_ANSWER
+    assert fallback.calls == 0
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    primary = FakeProvider("huggingface", first_token_latency=2.0)
+    fallback = FakeProvider("groq", first_token_latency=0.05)
+    primary_cancelled = threading.Event()
+    providers = [Provider("huggingface", primary.stream, 10.0, cancelled=primary_cancelled),
+                 fallback.as_provider()]
+
+    winner, answer, first_chunk_at = race(ProviderOrchestrator(hedge_delay=0.2), providers)
+
+    assert winner == "groq"
+    assert answer.strip() == DEFAULT_ANSWER
+    assert 0.2 <= first_chunk_at < 1.0
+    assert primary_cancelled.is_set()
+
+
+def test_failure_hands_over_without_waiting_for_the_hedge():
+    failures = []
+    primary = FakeProvider("huggingface", error="model crashed")
+    fallback = FakeProvider("groq")
+    orchestrator = ProviderOrchestrator(hedge_delay=10.0, on_failure=lambda name, e: failures.append((name, str(e))))
+
+    winner, _, first_chunk_at = race(orchestrator, [primary.as_provider(), fallback.as_provider()])
+
+    assert winner == "groq"
+    assert first_chunk_at < 1.0
+    assert failures == [("huggingface", "model crashed")]
+
+
+def test_missed_deadline_hands_over_and_cancels():
+    failures = []
+    primary = FakeProvider("huggingface", first_token_latency=2.0)
+    fallback = FakeProvider("groq")
+    primary_cancelled = threading.Event()
+    orchestrator = ProviderOrchestrator(hedge_delay=10.0, on_failure=lambda name, e: failures.append((name, e)))
+
+    winner, _, first_chunk_at = race(orchestrator, [
+        Provider("huggingface", primary.stream, 0.2, cancelled=primary_cancelled),
+        fallback.as_provider(),
+    ])
+
+    assert winner == "groq"
+    assert 0.2 <= first_chunk_at < 1.0
+    assert primary_cancelled.is_set()
+    assert [name for name, _ in failures] == ["huggingface"]
+    assert isinstance(failures[0][1], TimeoutError)
+
+
+def test_all_providers_failing_raises():
+    providers = [FakeProvider("huggingface", error="down").as_provider(),
+                 FakeProvider("groq", first_token_latency=2.0).as_provider(deadline=0.2)]
+
+    with pytest.raises(AllProvidersFailed) as failed:
+        list(ProviderOrchestrator(hedge_delay=0.1).stream(providers))
+
+    assert set(failed.value.errors) == {"huggingface", "groq"}
+    assert isinstance(failed.value.errors["groq"], TimeoutError)
+
+
+def test_open_circuit_skips_the_provider():
+    board = BreakerBoard(min_calls=1)
+    board.get("huggingface").record_failure(0.1, "down")
+    primary, fallback = FakeProvider("huggingface"), FakeProvider("groq")
+
+    winner, _, _ = race(ProviderOrchestrator(hedge_delay=1.0, breakers=board),
+                        [primary.as_provider(), fallback.as_provider()])
+
+    assert winner == "groq"
+    assert primary.calls == 0
+
+
+def test_open_circuits_everywhere_fail_fast():
+    board = BreakerBoard(min_calls=1)
+    board.get("groq").record_failure(0.1)
+
+    with pytest.raises(AllProvidersFailed) as failed:
+        list(ProviderOrchestrator(breakers=board).stream([FakeProvider("groq").as_provider()]))
+    assert isinstance(failed.value.errors["groq"], CircuitOpenError)
+
+
+def test_outcomes_are_recorded_on_the_breakers():
+    board = BreakerBoard(min_calls=1)
+    providers = [FakeProvider("huggingface", error="down").as_provider(), FakeProvider("groq").as_provider()]
+
+    race(ProviderOrchestrator(hedge_delay=1.0, breakers=board), providers)
+
+    snapshot = board.snapshot()
+    assert snapshot["huggingface"]["state"] == "open"
+    assert snapshot["groq"]["state"] == "closed" and snapshot["groq"]["calls"] == 1
+
+
+def test_reader_stopping_early_cancels_the_winner():
+    cancelled = threading.Event()
+    slow_words = FakeProvider("huggingface", token_latency=0.05)
+    stream = ProviderOrchestrator().stream([Provider("huggingface", slow_words.stream, 10.0, cancelled=cancelled)])
+
+    assert next(stream)[0] == "huggingface"
+    stream.close()
+    assert cancelled.is_set()
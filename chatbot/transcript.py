@@ -0,0 +1,94 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+import streamlit as st
+
+# Messages shown per page; older pages load on request
+CHAT_PAGE_SIZE = int(os.getenv('CHAT_PAGE_SIZE', '20'))
+# Messages kept per session; the oldest are dropped beyond this
+CHAT_HISTORY_LIMIT = int(os.getenv('CHAT_HISTORY_LIMIT', '200'))
+# Messages further back than this are shortened to CHAT_COMPACT_CHARS characters
+CHAT_COMPACT_AFTER = int(os.getenv('CHAT_COMPACT_AFTER', '40'))
+CHAT_COMPACT_CHARS = int(os.getenv('CHAT_COMPACT_CHARS', '1500'))
+
+COMPACTED_NOTE = "\n\n*…shortened to keep the conversation light.*"
+
+Message = Dict[str, str]
+
+
+class Transcript:
+    """A session's chat history, bounded in memory and rendered a page at a time.
+
+    The first message (the greeting) is always kept. Beyond max_messages the
+    oldest turns are dropped, and turns older than compact_after are shortened.
+    """
+
+    def __init__(self, messages: Optional[List[Message]] = None, max_messages: int = CHAT_HISTORY_LIMIT,
+                 compact_after: int = CHAT_COMPACT_AFTER, compact_chars: int = CHAT_COMPACT_CHARS):
+        self.messages: List[Message] = list(messages or [])
+        self.max_messages = max_messages
+        self.compact_after = compact_after
+        self.compact_chars = compact_chars
+        self.evicted = 0
+        # Index of the first message that has not been checked for compaction
+        self._compacted_until = 1
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def append(self, role: str, content: str) -> List[Message]:
+        """Add a message and enforce the bounds; returns any messages that were dropped"""
+        self.messages.append({"role": role, "content": content})
+        dropped = self._evict()
+        self._compact()
+        return dropped
+
+    def _evict(self) -> List[Message]:
+        overflow = len(self.messages) - self.max_messages
+        if overflow <= 0:
+            return []
+        dropped = self.messages[1:1 + overflow]
+        del self.messages[1:1 + overflow]
+        self.evicted += len(dropped)
+        self._compacted_until = max(1, self._compacted_until - len(dropped))
+        return dropped
+
+    def _compact(self):
+        boundary = len(self.messages) - self.compact_after
+        for index in range(self._compacted_until, max(self._compacted_until, boundary)):
+            message = self.messages[index]
+            if len(message["content"]) > self.compact_chars:
+                self.messages[index] = {**message, "content": message["content"][:self.compact_chars] + COMPACTED_NOTE}
+        self._compacted_until = max(self._compacted_until, boundary)
+
+    def window(self, pages: int = 1, page_size: int = CHAT_PAGE_SIZE) -> Tuple[int, List[Message]]:
+        """The greeting plus the latest `pages` pages, and how many messages are hidden before them"""
+        if not self.messages:
+            return 0, []
+        start = max(1, len(self.messages) - pages * page_size)
+        return start - 1, [self.messages[0]] + self.messages[start:]
+
+
+def _show_more_messages():
+    st.session_state.transcript_pages = st.session_state.get('transcript_pages', 1) + 1
+
+
+@st.fragment
+def render_transcript(transcript: Transcript, page_size: int = CHAT_PAGE_SIZE):
+    """Draw the visible part of the transcript.
+
+    Runs as a fragment, so paging through older messages reruns only this block
+    instead of the whole app; a normal rerun draws at most a page or two.
+    """
+    pages = st.session_state.setdefault('transcript_pages', 1)
+    hidden, visible = transcript.window(pages, page_size)
+
+    for index, message in enumerate(visible):
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+        if index == 0 and (hidden or transcript.evicted):
+            if hidden:
+                st.button(f"⬆️ Show {min(hidden, page_size)} earlier messages ({hidden} hidden)",
+                          key="transcript_more", on_click=_show_more_messages)
+            if transcript.evicted:
+                st.caption(f"{transcript.evicted} older messages are no longer kept in this session.")